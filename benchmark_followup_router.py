@@ -0,0 +1,117 @@
+"""
+Accuracy/latency benchmark for the local follow-up router
+
+Replays the labeled follow-ups in followup_router_cases.jsonl through
+followup_router.route_locally and reports coverage (share answered without
+an LLM call), accuracy of the local answers, per-rule results and latency.
+With --llm the same cases also go through the LLM router for comparison
+(needs ANTHROPIC_API_KEY).
+
+Usage:
+    python benchmark_followup_router.py
+    python benchmark_followup_router.py --min-confidence 0.8 --llm
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from config import config
+from followup_router import route_locally
+
+CASES_PATH = Path(__file__).with_name("followup_router_cases.jsonl")
+
+
+def load_cases(path: Path = CASES_PATH) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_local(cases: List[Dict], min_confidence: float, repeat: int = 200) -> Dict:
+    """Local router results; latency is averaged over `repeat` passes"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            route_locally(case["message"], case["has_existing"], case["artifact"])
+    latency_us = (time.perf_counter() - started) / (repeat * len(cases)) * 1e6
+
+    answered, correct, misses = 0, 0, []
+    per_rule = defaultdict(lambda: [0, 0])
+    for case in cases:
+        local = route_locally(case["message"], case["has_existing"], case["artifact"])
+        if not local or local["confidence"] < min_confidence:
+            continue
+        answered += 1
+        ok = local["route"] == case["route"] and local["use_web_search"] == case["use_web_search"]
+        correct += ok
+        per_rule[local["rule"]][0] += 1
+        per_rule[local["rule"]][1] += ok
+        if not ok:
+            misses.append((case, local))
+
+    return {"answered": answered, "correct": correct, "per_rule": dict(per_rule), "misses": misses, "latency_us": latency_us}
+
+
+async def run_llm(cases: List[Dict]) -> Dict:
+    """LLM router results on the same cases (fast path disabled)"""
+    from simple_search_claude_streaming_with_web_search import ClaudeConversation
+    import deep_search_with_claude
+    import lab_with_claude
+
+    config.ROUTER_LOCAL_FAST_PATH = False
+    client = ClaudeConversation().client
+    correct, latencies = 0, []
+    for case in cases:
+        started = time.perf_counter()
+        if case["artifact"] == "report":
+            result = await deep_search_with_claude.classify_followup_message(
+                [], case["message"], client, "claude-sonnet-4-20250514", has_existing_md=case["has_existing"]
+            )
+        else:
+            result = await lab_with_claude.classify_followup_message(
+                [], case["message"], client, "claude-sonnet-4-20250514", has_existing_html=case["has_existing"]
+            )
+        latencies.append(time.perf_counter() - started)
+        correct += result["route"] == case["route"] and result["use_web_search"] == case["use_web_search"]
+
+    return {"correct": correct, "latency_s": sum(latencies) / len(latencies)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-confidence", type=float, default=config.ROUTER_LOCAL_MIN_CONFIDENCE)
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="Assumed LLM router latency (s) for the savings estimate")
+    parser.add_argument("--llm", action="store_true", help="Also run the LLM router on the cases")
+    args = parser.parse_args()
+
+    cases = load_cases()
+    local = run_local(cases, args.min_confidence)
+
+    total = len(cases)
+    print(f"📊 {total} labeled follow-ups, min confidence {args.min_confidence}")
+    print(f"   Answered locally: {local['answered']}/{total} ({local['answered'] / total:.0%})")
+    if local["answered"]:
+        print(f"   Local accuracy:   {local['correct']}/{local['answered']} ({local['correct'] / local['answered']:.0%})")
+    print(f"   Local latency:    {local['latency_us']:.1f} µs per message")
+    print(f"   Est. time saved:  {local['answered'] * args.llm_latency:.1f}s of LLM routing over the set")
+
+    print("\n   Per rule (answered / correct):")
+    for rule, (answered, correct) in sorted(local["per_rule"].items()):
+        print(f"   - {rule:<28} {answered:>3} / {correct}")
+
+    for case, result in local["misses"]:
+        print(f"\n   ❌ {case['message']!r}: expected {case['route']}/{case['use_web_search']}, "
+              f"got {result['route']}/{result['use_web_search']} ({result['rule']})")
+
+    if args.llm:
+        llm = await run_llm(cases)
+        print(f"\n   LLM router accuracy: {llm['correct']}/{total} ({llm['correct'] / total:.0%}), "
+              f"{llm['latency_s']:.2f}s per message")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
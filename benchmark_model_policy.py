@@ -0,0 +1,192 @@
+"""
+Benchmark the model tiering policies against a local LLM stub
+
+Runs MarkdownResearch._create_markdown_report on synthetic research data
+once per policy. The stub answers every call with simulated per-model
+latency (time to first token + output speed), so no API calls are made.
+Reports wall-clock latency and calls / input tokens / output tokens per
+model for each policy.
+
+Usage:
+    python benchmark_model_policy.py
+    python benchmark_model_policy.py --policies quality balanced --branches 4 --sub-queries 3 --tier premium
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from evidence_selector import estimate_tokens
+from model_policy import POLICIES, ModelPolicy, OPUS, SONNET, HAIKU
+
+# Rough per-model latency profile: seconds to first token, output tokens per second
+MODEL_PROFILES = {
+    OPUS: {"ttft": 2.5, "tokens_per_second": 30},
+    SONNET: {"ttft": 1.2, "tokens_per_second": 60},
+    HAIKU: {"ttft": 0.6, "tokens_per_second": 120},
+}
+DEFAULT_PROFILE = {"ttft": 1.2, "tokens_per_second": 60}
+
+OUTPUT_TOKENS = 700  # Simulated answer length (capped by max_tokens)
+STREAM_CHUNKS = 10
+
+
+class _Delta:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Chunk:
+    type = "content_block_delta"
+
+    def __init__(self, text: str):
+        self.delta = _Delta(text)
+
+
+class _Content:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.content = [_Content(text)]
+
+
+class _Stream:
+    def __init__(self, messages: "StubMessages", model: str, max_tokens: int, prompt: str):
+        self.messages = messages
+        self.model = model
+        self.max_tokens = max_tokens
+        self.prompt = prompt
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        output_tokens, ttft, per_token = self.messages.record(self.model, self.max_tokens, self.prompt)
+        await asyncio.sleep(ttft)
+        chunk_tokens = max(1, output_tokens // STREAM_CHUNKS)
+        for _ in range(STREAM_CHUNKS):
+            await asyncio.sleep(chunk_tokens * per_token)
+            yield _Chunk("lorem " * chunk_tokens)
+
+
+class StubMessages:
+    """messages.create / messages.stream with simulated latency and token accounting"""
+
+    def __init__(self, time_scale: float):
+        self.time_scale = time_scale
+        self.usage: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+
+    def record(self, model: str, max_tokens: int, prompt: str):
+        """Account one call; returns (output_tokens, ttft, seconds_per_token) after time scaling"""
+        profile = MODEL_PROFILES.get(model, DEFAULT_PROFILE)
+        output_tokens = min(max_tokens, OUTPUT_TOKENS)
+
+        usage = self.usage[model]
+        usage["calls"] += 1
+        usage["input_tokens"] += estimate_tokens(prompt)
+        usage["output_tokens"] += output_tokens
+
+        return (
+            output_tokens,
+            profile["ttft"] * self.time_scale,
+            self.time_scale / profile["tokens_per_second"],
+        )
+
+    async def create(self, model: str, max_tokens: int, messages: List[Dict], **kwargs):
+        output_tokens, ttft, per_token = self.record(model, max_tokens, messages[-1]["content"])
+        await asyncio.sleep(ttft + output_tokens * per_token)
+        return _Response("lorem " * output_tokens)
+
+    def stream(self, model: str, max_tokens: int, messages: List[Dict], **kwargs):
+        return _Stream(self, model, max_tokens, messages[-1]["content"])
+
+
+class StubClient:
+    def __init__(self, time_scale: float):
+        self.messages = StubMessages(time_scale)
+
+
+class StubConversation:
+    """Stands in for ClaudeConversation (only .client and .model are used)"""
+
+    def __init__(self, time_scale: float):
+        self.client = StubClient(time_scale)
+        self.model = SONNET
+        self.messages = []
+
+
+def _synthetic_table(rng: random.Random, rows: int) -> str:
+    lines = ["| Year | Region | Value | Change |", "|---|---|---|---|"]
+    for _ in range(rows):
+        lines.append(
+            f"| {rng.randint(2015, 2025)} | Region {rng.randint(1, 40)} | "
+            f"{rng.randint(100, 99999):,} | {rng.uniform(-20, 20):.1f}% |"
+        )
+    return "\n".join(lines)
+
+
+def synthetic_research_data(branches: int, sub_queries: int, seed: int = 7) -> Dict:
+    """research_data with a realistic mix of table-less, light and data-heavy sub-queries"""
+    rng = random.Random(seed)
+    data = {"query": "How has the global market for residential heat pumps developed?", "branches": []}
+    for i in range(branches):
+        branch = {"title": f"Branch {i + 1}: market aspect {i + 1}", "sub_queries": []}
+        for j in range(sub_queries):
+            table_count = rng.choice([0, 0, 1, 2, 3, 5, 8])
+            tables = [
+                {"url": f"https://example{k}.com/report-{i}-{j}", "table": _synthetic_table(rng, rng.randint(5, 40))}
+                for k in range(table_count)
+            ]
+            branch["sub_queries"].append({"question": f"Sub-question {i + 1}.{j + 1} on market aspect {i + 1}", "tables": tables})
+        data["branches"].append(branch)
+    return data
+
+
+async def run_policy(name: str, research_data: Dict, user_tier: str, time_scale: float) -> Dict:
+    """Generate one report under a policy; returns simulated latency and per-model usage"""
+    from deep_search_with_claude import MarkdownResearch
+
+    conversation = StubConversation(time_scale)
+    research = MarkdownResearch(conversation, user_tier=user_tier)
+    research.policy = ModelPolicy(name, user_tier=user_tier, overrides={})
+
+    started = time.monotonic()
+    async for _ in research._create_markdown_report(research_data):
+        pass
+    elapsed = (time.monotonic() - started) / time_scale
+
+    return {"latency": elapsed, "usage": dict(conversation.client.messages.usage)}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES))
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--sub-queries", type=int, default=3)
+    parser.add_argument("--tier", default="user", choices=["anonymous", "user", "premium"])
+    parser.add_argument("--time-scale", type=float, default=0.02, help="Real seconds per simulated second")
+    args = parser.parse_args()
+
+    research_data = synthetic_research_data(args.branches, args.sub_queries)
+    print(f"📊 {args.branches} branches × {args.sub_queries} sub-queries, tier={args.tier}\n")
+
+    for name in args.policies:
+        result = await run_policy(name, research_data, args.tier, args.time_scale)
+        print(f"=== {name}: {result['latency']:.1f}s simulated latency")
+        print(f"    {'model':<30} {'calls':>5} {'input tok':>10} {'output tok':>10}")
+        for model, usage in sorted(result["usage"].items()):
+            print(f"    {model:<30} {usage['calls']:>5} {usage['input_tokens']:>10} {usage['output_tokens']:>10}")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
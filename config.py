@@ -18,6 +18,33 @@ class Config:
     # LLM API (adjust based on your provider)
     LLM_API_KEY: Optional[str] = os.getenv("LLM_API_KEY")
     LLM_API_URL: str = os.getenv("LLM_API_URL", "https://api.openai.com/v1")
+
+    # Web search (SerpAPI over a pooled async HTTP client)
+    SERPAPI_KEY: str = os.getenv("SERPAPI_KEY", "")
+    SEARCH_TIMEOUT_SECONDS: float = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "10"))
+    SEARCH_MAX_RETRIES: int = int(os.getenv("SEARCH_MAX_RETRIES", "2"))
+    SEARCH_RETRY_BACKOFF_SECONDS: float = float(os.getenv("SEARCH_RETRY_BACKOFF_SECONDS", "0.5"))
+    SEARCH_MAX_CONNECTIONS: int = int(os.getenv("SEARCH_MAX_CONNECTIONS", "20"))
+    # Search results cached in-process (LRU) and in Redis, TTL per freshness class
+    SEARCH_CACHE: bool = os.getenv("SEARCH_CACHE", "true").lower() == "true"
+    SEARCH_CACHE_LRU_SIZE: int = int(os.getenv("SEARCH_CACHE_LRU_SIZE", "2048"))
+
+    # Shared Anthropic clients (see llm_clients.py)
+    LLM_MAX_IN_FLIGHT: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "40"))
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    # Chat turns pick thinking on/off and budget per message (see thinking_budget.py)
+    ADAPTIVE_THINKING: bool = os.getenv("ADAPTIVE_THINKING", "true").lower() == "true"
+
+    # Follow-up routing: obvious cases are answered by local rules
+    ROUTER_LOCAL_FAST_PATH: bool = os.getenv("ROUTER_LOCAL_FAST_PATH", "true").lower() == "true"
+    ROUTER_LOCAL_MIN_CONFIDENCE: float = float(os.getenv("ROUTER_LOCAL_MIN_CONFIDENCE", "0.85"))
+
+    # Model tiering (see model_policy.POLICIES: quality | balanced | fast)
+    MODEL_POLICY: str = os.getenv("MODEL_POLICY", "quality")
+    MODEL_POLICY_OVERRIDES: str = os.getenv("MODEL_POLICY_OVERRIDES", "")
     
     # Task settings
     TASK_SOFT_TIME_LIMIT: int = 180  # 3 minutes
@@ -32,4 +59,56 @@ class Config:
     CELERY_WORKER_CONCURRENCY_LLM: int = int(os.getenv("CELERY_WORKER_CONCURRENCY_LLM", "10"))
     CELERY_WORKER_CONCURRENCY_SCRAPER: int = int(os.getenv("CELERY_WORKER_CONCURRENCY_SCRAPER", "2"))
 
+    # Deep research executor settings
+    RESEARCH_MAX_CONCURRENCY: int = int(os.getenv("RESEARCH_MAX_CONCURRENCY", "8"))
+    RESEARCH_PLAN_CONCURRENCY: int = int(os.getenv("RESEARCH_PLAN_CONCURRENCY", "4"))
+    RESEARCH_SEARCH_QUERY_CONCURRENCY: int = int(os.getenv("RESEARCH_SEARCH_QUERY_CONCURRENCY", "6"))
+    RESEARCH_SEARCH_CONCURRENCY: int = int(os.getenv("RESEARCH_SEARCH_CONCURRENCY", "6"))
+    RESEARCH_SCRAPE_CONCURRENCY: int = int(os.getenv("RESEARCH_SCRAPE_CONCURRENCY", "3"))
+    REPORT_SECTION_CONCURRENCY: int = int(os.getenv("REPORT_SECTION_CONCURRENCY", "4"))
+    RESEARCH_STRUCTURED_PLANNER: bool = os.getenv("RESEARCH_STRUCTURED_PLANNER", "true").lower() == "true"
+    RESEARCH_SPECULATIVE_PLANNING: bool = os.getenv("RESEARCH_SPECULATIVE_PLANNING", "true").lower() == "true"
+
+    # Adaptive research depth (0 = no budget)
+    RESEARCH_ADAPTIVE_DEPTH: bool = os.getenv("RESEARCH_ADAPTIVE_DEPTH", "true").lower() == "true"
+    RESEARCH_SATURATION_THRESHOLD: float = float(os.getenv("RESEARCH_SATURATION_THRESHOLD", "0.2"))
+    RESEARCH_MAX_QUERIES: int = int(os.getenv("RESEARCH_MAX_QUERIES", "0"))
+    RESEARCH_MAX_SECONDS: float = float(os.getenv("RESEARCH_MAX_SECONDS", "0"))
+
+    # L1 table evidence: "skip" (don't scrape, nothing reads it) or "children" (route to sub-queries)
+    RESEARCH_L1_TABLES: str = os.getenv("RESEARCH_L1_TABLES", "skip")
+    # Result pages loaded for table extraction per search
+    RESEARCH_SCRAPE_TOP_RESULTS: int = int(os.getenv("RESEARCH_SCRAPE_TOP_RESULTS", "5"))
+    REPORT_PARTIAL_UPDATES: bool = os.getenv("REPORT_PARTIAL_UPDATES", "true").lower() == "true"
+    RESEARCH_SUMMARY_LLM_POLISH: bool = os.getenv("RESEARCH_SUMMARY_LLM_POLISH", "false").lower() == "true"
+    RESEARCH_JOB_CHECKPOINTS: bool = os.getenv("RESEARCH_JOB_CHECKPOINTS", "true").lower() == "true"
+    RESEARCH_JOB_TTL: int = int(os.getenv("RESEARCH_JOB_TTL", str(24 * 60 * 60)))
+
+    # Finished reports/apps replayed for repeat queries (TTL per freshness class)
+    REPORT_CACHE: bool = os.getenv("REPORT_CACHE", "true").lower() == "true"
+
+    # Table scrape dedup (per run, optionally across runs via Redis)
+    SCRAPE_CROSS_RUN_CACHE: bool = os.getenv("SCRAPE_CROSS_RUN_CACHE", "false").lower() == "true"
+    SCRAPE_CACHE_TTL: int = int(os.getenv("SCRAPE_CACHE_TTL", str(6 * 60 * 60)))
+
+    # Table evidence token budgets (per prompt)
+    EVIDENCE_SECTION_TOKEN_BUDGET: int = int(os.getenv("EVIDENCE_SECTION_TOKEN_BUDGET", "6000"))
+    EVIDENCE_APP_TOKEN_BUDGET: int = int(os.getenv("EVIDENCE_APP_TOKEN_BUDGET", "24000"))
+    EVIDENCE_UPDATE_TOKEN_BUDGET: int = int(os.getenv("EVIDENCE_UPDATE_TOKEN_BUDGET", "8000"))
+    EVIDENCE_MAX_TABLE_TOKENS: int = int(os.getenv("EVIDENCE_MAX_TABLE_TOKENS", "1500"))
+    # Sections pick top-k evidence from a per-run index across all branches
+    EVIDENCE_INDEX: bool = os.getenv("EVIDENCE_INDEX", "true").lower() == "true"
+    EVIDENCE_INDEX_TOP_K: int = int(os.getenv("EVIDENCE_INDEX_TOP_K", "8"))
+
+    # Lab apps: tables embedded as typed JSON datasets instead of pasted into the prompt
+    LAB_DATA_PAYLOAD: bool = os.getenv("LAB_DATA_PAYLOAD", "true").lower() == "true"
+    LAB_DATA_MAX_ROWS: int = int(os.getenv("LAB_DATA_MAX_ROWS", "500"))
+    # Lab app updates as edit operations instead of re-emitting the document
+    APP_PATCH_UPDATES: bool = os.getenv("APP_PATCH_UPDATES", "true").lower() == "true"
+
+    # Hierarchical synthesis token bounds (per prompt / per branch summary)
+    SYNTHESIS_BRANCH_INPUT_TOKENS: int = int(os.getenv("SYNTHESIS_BRANCH_INPUT_TOKENS", "16000"))
+    SYNTHESIS_BRANCH_SUMMARY_TOKENS: int = int(os.getenv("SYNTHESIS_BRANCH_SUMMARY_TOKENS", "1500"))
+    SYNTHESIS_FINAL_INPUT_TOKENS: int = int(os.getenv("SYNTHESIS_FINAL_INPUT_TOKENS", "8000"))
+
 config = Config()
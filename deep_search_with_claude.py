@@ -1,10 +1,25 @@
 import anthropic
 import json
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable
 from fastapi import UploadFile
 import asyncio
 from datetime import datetime
 from tables_scraper import scrape_tables_parallel, BrowserPool
+from research_executor import ResearchExecutor, EventSlot
+from research_planner import generate_research_plan
+from research_cache import PlanCache, ReportCache, ReportRecorder, cached_report_notice, plan_from_queries
+from research_jobs import ResearchJob
+from scrape_registry import ScrapeRegistry
+from research_depth import DepthController
+from report_sections import (
+    split_sections, join_sections, section_outline, replace_section_content, new_section, changed_section_ids
+)
+from evidence_selector import select_tables, truncate_to_tokens, estimate_tokens
+from evidence_index import EvidenceIndex
+from model_policy import ModelPolicy
+from followup_router import route_locally
+from research_summary import render_methodology, render_update_summary, polish_summary
+from config import config
 
 # ✅ Global browser pool (shared across requests)
 _global_browser_pool: Optional[BrowserPool] = None
@@ -85,9 +100,16 @@ async def classify_followup_message(
 ) -> Dict[str, any]:
     """
     Full classifier for follow-up messages
+    Obvious cases are routed locally (ROUTER_LOCAL_FAST_PATH) without the LLM call
     Returns: {"route": "conversation|create_report|update_report", "use_web_search": bool}
     """
     
+    if config.ROUTER_LOCAL_FAST_PATH:
+        local = route_locally(user_message, has_existing_md, artifact="report")
+        if local and local["confidence"] >= config.ROUTER_LOCAL_MIN_CONFIDENCE:
+            print(f"🔀 Local router: {local['route']}, Web search: {local['use_web_search']} ({local['rule']}, {local['confidence']:.2f})")
+            return {"route": local["route"], "use_web_search": local["use_web_search"]}
+    
     current_date = datetime.now().strftime("%A, %B %d, %Y")
     
     # ✅ Format conversation history safely
@@ -211,24 +233,39 @@ class MarkdownResearch:
     Markdown-based research system with multi-stage deep research and smart routing
     """
     
-    def __init__(self, conversation):
+    def __init__(self, conversation, user_tier: str = "user"):
         """
         Args:
             conversation: ClaudeConversation instance
+            user_tier: "anonymous" | "user" | "premium", input to the model policy
         """
         self.conversation = conversation
         self.client = conversation.client
-        self.model = conversation.model  # Sonnet for queries/routing
-        self.report_model = "claude-opus-4-20250514"  # Opus for markdown generation
+        self.model = conversation.model
+        self.policy = ModelPolicy(user_tier=user_tier)  # Model per stage (MODEL_POLICY)
         self.browser_pool = None
         self.query_tables = {}
+        self.search_infos = {}
         self.last_research_data = None
+        self.plan_cache = PlanCache("markdown")
+        self.report_cache = ReportCache("markdown")
+        self.job = ResearchJob()
+        self.scrape_registry = ScrapeRegistry()
+        self.evidence = EvidenceIndex()
+        self.speculative_plan: Optional[asyncio.Task] = None
+        self.prefetched_searches: Dict[str, asyncio.Task] = {}
+        self.depth = DepthController()
+        self.skipped_queries = set()
     
     async def research(
         self, 
         query: str, 
         files: Optional[List[UploadFile]] = None,
-        existing_markdown: Optional[str] = None
+        existing_markdown: Optional[str] = None,
+        job_id: Optional[str] = None,
+        max_queries: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        refresh: bool = False
     ):
         """
         Main entry point with intelligent routing
@@ -237,57 +274,102 @@ class MarkdownResearch:
             query: User's message/question
             files: Optional uploaded files
             existing_markdown: Optional existing markdown report to update
+            job_id: Optional research job ID; finished work is checkpointed under it
+                    and re-running the same job resumes instead of starting over
+            max_queries: Optional web-search query budget (default RESEARCH_MAX_QUERIES)
+            max_seconds: Optional research time budget (default RESEARCH_MAX_SECONDS)
+            refresh: Run new research even if a cached report exists (REPORT_CACHE);
+                     on a follow-up, skip routing and build a new report
         
         Yields: {"type": "search_query"/"sources"/"tables"/"reasoning"/"content"/"markdown_report"/"research_summary"}
         """
         
-        # ✅ Detect if this is a follow-up
-        follow_up = len(self.conversation.messages) > 0
+        self.job = ResearchJob(job_id)
+        self.depth = DepthController(max_queries=max_queries, max_seconds=max_seconds)
+        if await self.job.load():
+            yield {"type": "reasoning", "text": "♻️ Resuming research job: replaying completed steps..."}
         
-        if not follow_up:
-            # ✅ FIRST MESSAGE - Classify action
-            yield {"type": "reasoning", "text": "🔍 Analyzing your request..."}
+        try:
+            # ✅ Detect if this is a follow-up
+            follow_up = len(self.conversation.messages) > 0
             
-            decision = await self._classify_first_message(query)
+            if not follow_up and self.job.get("decision") is None:
+                # Same research requested recently: replay it (skips classification
+                # too, so only web-search reports qualify; no-search ones are
+                # checked once the classifier asks for no search)
+                cached = await self._get_cached_report(query, files, refresh)
+                if cached:
+                    async for chunk in self._replay_cached_report(cached):
+                        yield chunk
+                    return
+            
+            if not follow_up:
+                # ✅ FIRST MESSAGE - Classify action
+                yield {"type": "reasoning", "text": "🔍 Analyzing your request..."}
+            
+                decision = self.job.get("decision")
+                if decision is None:
+                    # Plan while classifying; discarded unless a report is created
+                    self._start_speculation(query)
+                    decision = await self._classify_first_message(query)
+                    await self.job.save("decision", decision)
+            
+                if decision["action"] == "conversation":
+                    self._cancel_speculation()
+                    # Just greeting/casual conversation
+                    yield {"type": "reasoning", "text": "💬 Hello! How can I help you today?"}
+                    async for chunk in self.conversation.send_message(query, files, simple_search=False, mode="deep_search", decision=decision):
+                        yield chunk
+                else:
+                    # Create report (cache already checked above)
+                    async for chunk in self._cached_report_flow(query, files, decision["use_web_search"], check_cache=not refresh and not decision["use_web_search"]):
+                        yield chunk
             
-            if decision["action"] == "conversation":
-                # Just greeting/casual conversation
-                yield {"type": "reasoning", "text": "💬 Hello! How can I help you today?"}
-                async for chunk in self.conversation.send_message(query, files, simple_search=False):
-                    yield chunk
             else:
-                # Create report
-                async for chunk in self._create_report_flow(query, files, decision["use_web_search"]):
-                    yield chunk
-        
-        else:
-            # ✅ FOLLOW-UP MESSAGE - Classify route + web search
-            decision = await classify_followup_message(
-                self.conversation.messages,
-                query,
-                self.client,
-                self.model,
-                has_existing_md=existing_markdown is not None
-            )
+                # ✅ FOLLOW-UP MESSAGE - Classify route + web search
+                decision = self.job.get("decision")
+                if decision is None and refresh:
+                    # Refresh of a replayed report: the same question re-sent for new data
+                    self._start_speculation(query)
+                    decision = {"route": "create_report", "use_web_search": True}
+                    await self.job.save("decision", decision)
+                elif decision is None:
+                    # Without an existing report the likely routes are conversation or
+                    # create_report, so planning speculatively is usually worth it
+                    if existing_markdown is None:
+                        self._start_speculation(query)
+                    decision = await classify_followup_message(
+                        self.conversation.messages,
+                        query,
+                        self.client,
+                        self.policy.select("routing"),
+                        has_existing_md=existing_markdown is not None
+                    )
+                    await self.job.save("decision", decision)
             
-            route = decision["route"]
-            use_web_search = decision["use_web_search"]
+                route = decision["route"]
+                use_web_search = decision["use_web_search"]
             
-            if route == "conversation":
-                # Just answer, no report
-                yield {"type": "reasoning", "text": "💬 Answering your question..."}
-                async for chunk in self.conversation.send_message(query, files, simple_search=False):
-                    yield chunk
+                if route != "create_report":
+                    self._cancel_speculation()
             
-            elif route == "create_report":
-                # New topic - create new report
-                async for chunk in self._create_report_flow(query, files, use_web_search):
-                    yield chunk
+                if route == "conversation":
+                    # Just answer, no report
+                    yield {"type": "reasoning", "text": "💬 Answering your question..."}
+                    async for chunk in self.conversation.send_message(query, files, simple_search=False, mode="deep_search", decision=decision):
+                        yield chunk
             
-            elif route == "update_report":
-                # Update existing report
-                async for chunk in self._update_report_flow(query, files, existing_markdown, use_web_search):
-                    yield chunk
+                elif route == "create_report":
+                    # New topic - create new report
+                    async for chunk in self._cached_report_flow(query, files, use_web_search, check_cache=not refresh):
+                        yield chunk
+            
+                elif route == "update_report":
+                    # Update existing report
+                    async for chunk in self._update_report_flow(query, files, existing_markdown, use_web_search):
+                        yield chunk
+        finally:
+            self._cancel_speculation()
     
     async def _classify_first_message(self, query: str) -> dict:
         """
@@ -330,7 +412,7 @@ Return ONLY valid JSON:
 
         try:
             response = await self.client.messages.create(
-                model=self.model,
+                model=self.policy.select("routing"),
                 max_tokens=100,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -353,6 +435,51 @@ Return ONLY valid JSON:
             print(f"⚠️ Classifier error: {e}, defaulting to conversation")
             return {"action": "conversation", "use_web_search": False}
     
+    async def _get_cached_report(
+        self,
+        query: str,
+        files: Optional[List[UploadFile]],
+        refresh: bool,
+        use_web_search: bool = True
+    ) -> Optional[Dict]:
+        """Cached report for this query, unless disabled, refreshed or file-specific"""
+        if not config.REPORT_CACHE or refresh or files:
+            return None
+        return await self.report_cache.get(query, use_web_search)
+    
+    async def _replay_cached_report(self, cached: Dict):
+        """Replay a cached report's events through the normal stream protocol"""
+        # "cached" lets the client offer a refresh (re-send with refresh=true)
+        yield {"type": "reasoning", "text": cached_report_notice(cached), "cached": True}
+        for event in cached["events"]:
+            yield event
+    
+    async def _cached_report_flow(
+        self,
+        query: str,
+        files: Optional[List[UploadFile]],
+        use_web_search: bool,
+        check_cache: bool = True
+    ):
+        """
+        _create_report_flow behind the report cache
+        Replays a recent report for the same query, otherwise stores the new one
+        """
+        if check_cache:
+            cached = await self._get_cached_report(query, files, refresh=False, use_web_search=use_web_search)
+            if cached:
+                async for chunk in self._replay_cached_report(cached):
+                    yield chunk
+                return
+        
+        recorder = ReportRecorder()
+        async for chunk in self._create_report_flow(query, files, use_web_search):
+            recorder.record(chunk)
+            yield chunk
+        
+        if config.REPORT_CACHE and not files and any(e["type"] == "markdown_report" for e in recorder.events):
+            await self.report_cache.set(query, recorder.events, use_web_search)
+    
     async def _create_report_flow(self, query: str, files: Optional[List[UploadFile]], use_web_search: bool):
         """
         Create new markdown report with multi-stage deep research
@@ -362,60 +489,107 @@ Return ONLY valid JSON:
         yield {"type": "reasoning", "text": "🔍 Starting deep research process..."}
         
         self.browser_pool = await get_browser_pool()
+        self.scrape_registry = ScrapeRegistry(self.browser_pool)
         self.query_tables = {}
+        self.search_infos = {}
+        self.skipped_queries = set()
         
         # Phase 1: Generate Level 1 queries
         yield {"type": "reasoning", "text": "📊 Analyzing research question and generating main branches..."}
-        level1_queries = await self._generate_level1_queries(query)
-        yield {"type": "reasoning", "text": f"✅ Generated {len(level1_queries)} research branches"}
         
-        if use_web_search:
-            yield {"type": "reasoning", "text": "🔎 Beginning web searches for Level 1 queries..."}
+        checkpoint = self.job.get("plan")
+        
+        if checkpoint:
+            yield {"type": "reasoning", "text": "♻️ Research plan restored from checkpoint"}
+            plan = checkpoint["plan"]
+            level1_queries = checkpoint["level1_queries"]
+        else:
+            if self.speculative_plan:
+                # Started while the request was being classified
+                planned = await self.speculative_plan
+                self.speculative_plan = None
+            else:
+                planned = await self._plan_research(query)
             
-            for i, q in enumerate(level1_queries, 1):
-                search_info = await self.conversation._generate_search_query(q)
-                if search_info["search_needed"] and search_info["query"]:
-                    yield {"type": "search_query", "text": search_info["query"]}
-                    
-                    search_results = await self.conversation.google_search(search_info["query"])
-                    yield {"type": "sources", "content": search_results}
-                    
-                    yield {"type": "reasoning", "text": f"📄 Extracting tables from Branch {i} sources..."}
-                    
-                    urls = [result["url"] for result in search_results[:5]]
-                    if urls:
-                        tables = await self._extract_tables_from_urls(urls)
-                        if tables:
-                            self.query_tables[q] = tables
-                            yield {"type": "tables", "content": tables}
-                            yield {"type": "reasoning", "text": f"✅ Extracted {len(tables)} tables from Branch {i}"}
+            plan = planned["plan"]
+            level1_queries = planned["level1_queries"]
+            
+            if planned["cache_hit"]:
+                yield {"type": "reasoning", "text": "♻️ Plan cache hit: reusing research plan"}
+            else:
+                yield {"type": "reasoning", "text": "🗺️ Plan cache miss: research tree planned"}
+                if plan:
+                    await self.plan_cache.set(query, plan)
+            
+            await self.job.save("plan", {"plan": plan, "level1_queries": level1_queries})
         
-        yield {"type": "reasoning", "text": "🌳 Expanding branches into detailed sub-queries..."}
+        planned_branches = {branch["question"]: branch for branch in plan["branches"]} if plan else {}
         
-        # Phase 2: Generate Level 2 queries
+        yield {"type": "reasoning", "text": f"✅ Generated {len(level1_queries)} research branches"}
+
+        # Phase 2: Run L1 searches and L2 expansions/searches concurrently.
+        # Events are buffered per node and replayed in tree order.
+        # Report sections read L2 tables; L1 tables are only scraped when
+        # they are routed down to the branch's sub-queries.
+        consumed_outputs = {"l2_tables"}
+        if config.RESEARCH_L1_TABLES == "children":
+            consumed_outputs.add("l1_tables")
+        executor = ResearchExecutor(consumed_outputs=consumed_outputs)
         level2_queries = {}
+
+        if use_web_search:
+            executor.events.emit({"type": "reasoning", "text": "🔎 Beginning web searches for Level 1 queries..."})
+
+            for i, q in enumerate(level1_queries, 1):
+                if self.depth.admit() is not None:
+                    executor.events.emit({"type": "reasoning", "text": f"⏱️ Research budget reached, skipping Branch {i} search"})
+                    continue
+                slot = executor.events.child()
+                search_info = planned_branches[q]["search"] if q in planned_branches else None
+                executor.spawn(
+                    self._search_node(
+                        executor, q, slot, branch_label=f"Branch {i}", search_info=search_info,
+                        branch=q, tables_output="l1_tables"
+                    ),
+                    slot
+                )
+
+        executor.events.emit({"type": "reasoning", "text": "🌳 Expanding branches into detailed sub-queries..."})
+
         for i, l1_query in enumerate(level1_queries, 1):
-            l2_queries = await self._generate_level2_queries(l1_query, query)
-            level2_queries[l1_query] = l2_queries
-            
-            yield {"type": "reasoning", "text": f"✅ Branch {i} expanded into {len(l2_queries)} sub-queries"}
-            
-            if use_web_search:
-                for j, q in enumerate(l2_queries, 1):
-                    search_info = await self.conversation._generate_search_query(q)
-                    if search_info["search_needed"] and search_info["query"]:
-                        yield {"type": "search_query", "text": search_info["query"]}
-                        
-                        search_results = await self.conversation.google_search(search_info["query"])
-                        yield {"type": "sources", "content": search_results}
-                        
-                        urls = [result["url"] for result in search_results[:5]]
-                        if urls:
-                            tables = await self._extract_tables_from_urls(urls)
-                            if tables:
-                                self.query_tables[q] = tables
-                                yield {"type": "tables", "content": tables}
-        
+            slot = executor.events.child()
+            planned_sub_queries = planned_branches[l1_query]["sub_queries"] if l1_query in planned_branches else None
+            executor.spawn(
+                self._expand_branch_node(
+                    executor, i, l1_query, query, level2_queries, slot, use_web_search,
+                    planned_sub_queries=planned_sub_queries
+                ),
+                slot
+            )
+
+        executor.events.close()
+
+        try:
+            async for event in executor.stream():
+                yield event
+        finally:
+            self.scrape_registry.close()
+            # Prefetched searches nobody used (e.g. report without web search)
+            self._cancel_speculation()
+
+        # Keep branch order stable regardless of completion order
+        level2_queries = {l1_query: level2_queries.get(l1_query, []) for l1_query in level1_queries}
+        
+        if not plan:
+            await self.plan_cache.set(query, plan_from_queries(level1_queries, level2_queries, self.search_infos))
+        
+        # Sub-queries skipped (saturated branch or research budget) are left out
+        # of the report; the cached plan above keeps the full tree
+        level2_queries = {
+            l1_query: [q for q in queries if q not in self.skipped_queries]
+            for l1_query, queries in level2_queries.items()
+        }
+
         total_queries = sum(len(queries) for queries in level2_queries.values())
         yield {"type": "reasoning", "text": f"✅ Data collection complete: {total_queries} queries executed"}
         
@@ -436,7 +610,10 @@ Return ONLY valid JSON:
             
             l2_queries = level2_queries.get(l1_query, [])
             for j, l2_query in enumerate(l2_queries, 1):
+                # Branch-level tables (RESEARCH_L1_TABLES=children) are shared by its
+                # sub-queries; select_tables picks what is relevant per section
                 tables = self.query_tables.get(l2_query, [])
+                tables = tables + [t for t in self.query_tables.get(l1_query, []) if t not in tables]
                 
                 sub_query_data = {
                     "question": l2_query,
@@ -454,19 +631,21 @@ Return ONLY valid JSON:
         # Phase 4: Generate markdown report
         yield {"type": "reasoning", "text": "📝 Generating markdown research report..."}
         
-        markdown_report = await self._create_markdown_report(research_data)
-        
-        yield {"type": "markdown_report", "content": markdown_report}
+        async for chunk in self._create_markdown_report(research_data):
+            yield chunk
         
         # Phase 5: ALWAYS Generate Research Summary & Methodology
         yield {"type": "reasoning", "text": "📋 Generating research methodology documentation..."}
         
-        methodology_content = await self._generate_methodology(
-            query=query,
-            level1_queries=level1_queries,
-            level2_queries=level2_queries,
-            use_web_search=use_web_search
-        )
+        methodology_content = self.job.get("methodology")
+        if methodology_content is None:
+            methodology_content = await self._generate_methodology(
+                query=query,
+                level1_queries=level1_queries,
+                level2_queries=level2_queries,
+                use_web_search=use_web_search
+            )
+            await self.job.save("methodology", methodology_content)
         
         yield {"type": "research_summary", "content": methodology_content}
         
@@ -500,10 +679,10 @@ Return ONLY valid JSON:
                 searched_queries.append(search_info["query"])
                 
                 search_results = await self.conversation.google_search(search_info["query"])
-                yield {"type": "sources", "content": search_results}
+                yield {"type": "sources", "content": search_results, "query": search_info["query"]}
                 
                 browser_pool = await get_browser_pool()
-                urls = [result["url"] for result in search_results[:5]]
+                urls = [result["url"] for result in search_results[:config.RESEARCH_SCRAPE_TOP_RESULTS]]
                 
                 if urls:
                     yield {"type": "reasoning", "text": "📊 Extracting tables..."}
@@ -531,6 +710,9 @@ Return ONLY valid JSON:
         # Update markdown (with or without new data)
         updated_markdown = await self._update_markdown_report(existing_markdown, query, new_data)
         
+        changed = changed_section_ids(existing_markdown, updated_markdown)
+        yield {"type": "reasoning", "text": f"✏️ Updated {len(changed)} section(s): {', '.join(changed) or 'none'}"}
+        
         yield {"type": "markdown_report", "content": updated_markdown}
         
         # ALWAYS Generate Update Summary
@@ -542,87 +724,188 @@ Return ONLY valid JSON:
             searched_queries=searched_queries,
             tables_added=tables_added,
             existing_markdown=existing_markdown,
-            updated_markdown=updated_markdown
+            updated_markdown=updated_markdown,
+            changed_sections=changed
         )
         
         yield {"type": "research_summary", "content": update_summary}
         
         yield {"type": "reasoning", "text": "✅ Report updated!"}
     
-    async def _create_markdown_report(self, research_data: Dict) -> str:
+    async def _create_markdown_report(self, research_data: Dict):
         """
         Create comprehensive markdown report from research data
-        Generates report for each query + final synthesis
+        Generates report for each query (in parallel) + final synthesis
+
+        Yields the incremental report protocol:
+            {"type": "report_start", "title", "total"}
+            {"type": "report_section_start", "index", "heading"}
+            {"type": "report_section_delta", "index", "text"}
+            {"type": "report_section_end", "index", "heading", "content"}
+        then {"type": "markdown_report"} with the assembled document.
+        Section deltas may interleave; clients place them by index.
+        The final synthesis is streamed as the last section (index == total - 1).
+
+        Synthesis is a two-level reduce when there are several branches: each
+        branch is summarized as soon as its sections finish (in parallel with
+        other branches), and the final synthesis reads only those summaries.
+        Every synthesis prompt is clipped to a fixed token bound.
         """
         
         current_date = datetime.now().strftime("%A, %B %d, %Y")
         
-        # Generate individual query reports
-        all_query_reports = []
-        
-        for i, branch in enumerate(research_data["branches"], 1):
-            for j, sub_query in enumerate(branch["sub_queries"], 1):
-                tables_context = ""
-                if sub_query.get('tables'):
-                    tables_context = "\n\nAvailable data:\n" + "\n\n".join([
-                        f"Table from {t['url']}:\n{t['table']}" 
-                        for t in sub_query['tables']
-                    ])
-                
-                query_prompt = f"""The current date is {current_date}.
-
-Query: "{sub_query['question']}"
-{tables_context}
-
-Write a focused report section for this query. Use the data provided.
-
-Return only markdown."""
-
-                # Generate report for this query
-                query_report = ""
-                async with self.client.messages.stream(
-                    model=self.report_model,  # Use Opus for quality
-                    max_tokens=4000,
-                    messages=[{"role": "user", "content": query_prompt}]
-                ) as stream:
-                    async for chunk in stream:
-                        if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
-                            if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'text'):
-                                query_report += chunk.delta.text
-                
-                all_query_reports.append({
-                    'branch': branch['title'],
-                    'query': sub_query['question'],
-                    'report': query_report
-                })
+        sections = [
+            (branch, sub_query)
+            for branch in research_data["branches"]
+            for sub_query in branch["sub_queries"]
+        ]
+        section_branch = [
+            branch_index
+            for branch_index, branch in enumerate(research_data["branches"])
+            for _ in branch["sub_queries"]
+        ]
+        synthesis_index = len(sections)
+        
+        # Sections draw their evidence from the run's index (already holds what
+        # the searches found; this covers research data from other sources)
+        for _, sub_query in sections:
+            self.evidence.add_tables(sub_query['question'], sub_query.get('tables') or [])
+        
+        # Map step runs only for multi-branch trees whose synthesis isn't checkpointed
+        map_reduce = len(research_data["branches"]) > 1 and self.job.get_section(synthesis_index) is None
+        branch_pending = {b: section_branch.count(b) for b in set(section_branch)}
+        branch_tasks: Dict[int, asyncio.Task] = {}
+        
+        yield {"type": "report_start", "title": research_data["query"], "total": len(sections) + 1}
+        
+        # Generate individual query reports, bounded by REPORT_SECTION_CONCURRENCY.
+        # Section tasks push their events onto a queue that this generator drains.
+        semaphore = asyncio.Semaphore(config.REPORT_SECTION_CONCURRENCY)
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def generate(index: int, branch: Dict, sub_query: Dict):
+            checkpoint = self.job.get_section(index)
+            if checkpoint:
+                # Finished in an earlier run: replay without regenerating
+                events.put_nowait({"type": "report_section_start", "index": index, "heading": sub_query['question']})
+                return index, checkpoint
+            
+            async with semaphore:
+                events.put_nowait({"type": "report_section_start", "index": index, "heading": sub_query['question']})
+                query_report = await self._generate_section_report(
+                    sub_query,
+                    current_date,
+                    branch_title=branch['title'],
+                    on_delta=lambda text: events.put_nowait({"type": "report_section_delta", "index": index, "text": text})
+                )
+            await self.job.save_section(index, {
+                'branch': branch['title'],
+                'query': sub_query['question'],
+                'report': query_report
+            })
+            return index, {
+                'branch': branch['title'],
+                'query': sub_query['question'],
+                'report': query_report
+            }
+        
+        tasks = [
+            asyncio.create_task(generate(index, branch, sub_query))
+            for index, (branch, sub_query) in enumerate(sections)
+        ]
+        
+        all_query_reports = [None] * len(tasks)
+        try:
+            remaining = set(tasks)
+            while remaining or not events.empty():
+                if events.empty():
+                    getter = asyncio.ensure_future(events.get())
+                    done, _ = await asyncio.wait(remaining | {getter}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter in done:
+                        yield getter.result()
+                    else:
+                        getter.cancel()
+                    
+                    for task in done - {getter}:
+                        remaining.discard(task)
+                        index, query_report = task.result()
+                        all_query_reports[index] = query_report
+                        
+                        branch_index = section_branch[index]
+                        branch_pending[branch_index] -= 1
+                        if map_reduce and branch_pending[branch_index] == 0:
+                            # Branch complete: summarize it while other branches are still writing
+                            branch_tasks[branch_index] = asyncio.create_task(self._synthesize_branch(
+                                research_data['query'],
+                                research_data['branches'][branch_index]['title'],
+                                [r for i, r in enumerate(all_query_reports) if section_branch[i] == branch_index],
+                                current_date
+                            ))
+                        # Queue the end event behind this section's deltas
+                        events.put_nowait({
+                            "type": "report_section_end",
+                            "index": index,
+                            "heading": query_report['query'],
+                            "content": query_report['report']
+                        })
+                else:
+                    yield events.get_nowait()
+            
+            branch_summaries = [
+                (research_data['branches'][branch_index]['title'], await branch_tasks[branch_index])
+                for branch_index in sorted(branch_tasks)
+            ]
+        finally:
+            for task in tasks + list(branch_tasks.values()):
+                if not task.done():
+                    task.cancel()
+        
+        # Generate final synthesis over branch summaries (or the section reports
+        # for a single branch), each clipped to its share of the input bound
+        if map_reduce:
+            parts = [(title, summary) for title, summary in branch_summaries]
+            context_label = "Branch syntheses"
+        else:
+            parts = [(r['query'], r['report']) for r in all_query_reports]
+            context_label = "Individual query reports"
         
-        # Generate final synthesis
+        share = config.SYNTHESIS_FINAL_INPUT_TOKENS // max(len(parts), 1)
         synthesis_context = "\n\n".join([
-            f"## {r['query']}\n{r['report']}" 
-            for r in all_query_reports
+            f"## {title}\n{truncate_to_tokens(text, share)}"
+            for title, text in parts
         ])
         
         synthesis_prompt = f"""The current date is {current_date}.
 
 Research question: "{research_data['query']}"
 
-Individual query reports:
+{context_label}:
 {synthesis_context}
 
 Create a final synthesis that summarizes key findings and provides conclusions. Use the reports provided.
 
 Return only markdown."""
 
-        final_synthesis = ""
-        async with self.client.messages.stream(
-            model=self.report_model,
-            max_tokens=8000,
-            messages=[{"role": "user", "content": synthesis_prompt}]
-        ) as stream:
-            async for chunk in stream:
-                if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
-                    if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'text'):
-                        final_synthesis += chunk.delta.text
+        yield {"type": "report_section_start", "index": synthesis_index, "heading": "Final Synthesis"}
+        
+        checkpoint = self.job.get_section(synthesis_index)
+        if checkpoint:
+            final_synthesis = checkpoint['report']
+        else:
+            final_synthesis = ""
+            async with self.client.messages.stream(
+                model=self.policy.select("synthesis", prompt_tokens=estimate_tokens(synthesis_prompt)),
+                max_tokens=8000,
+                messages=[{"role": "user", "content": synthesis_prompt}]
+            ) as stream:
+                async for chunk in stream:
+                    if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
+                        if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'text'):
+                            final_synthesis += chunk.delta.text
+                            yield {"type": "report_section_delta", "index": synthesis_index, "text": chunk.delta.text}
+            await self.job.save_section(synthesis_index, {'query': 'Final Synthesis', 'report': final_synthesis})
+        
+        yield {"type": "report_section_end", "index": synthesis_index, "heading": "Final Synthesis", "content": final_synthesis}
         
         # Assemble complete markdown report
         markdown_report = f"""# {research_data['query']}
@@ -649,7 +932,110 @@ Return only markdown."""
 {final_synthesis}
 """
         
-        return markdown_report
+        yield {"type": "markdown_report", "content": markdown_report}
+    
+    async def _synthesize_branch(self, query: str, branch_title: str, reports: List[Dict], current_date: str) -> str:
+        """
+        Map step of the hierarchical synthesis: summarize one branch's sections
+
+        Input is clipped to SYNTHESIS_BRANCH_INPUT_TOKENS and output to
+        SYNTHESIS_BRANCH_SUMMARY_TOKENS, so the final synthesis stays flat.
+        """
+        
+        node_id = f"branch_synthesis:{branch_title}"
+        checkpoint = self.job.get_node(node_id)
+        if checkpoint:
+            return checkpoint["summary"]
+        
+        share = config.SYNTHESIS_BRANCH_INPUT_TOKENS // max(len(reports), 1)
+        context = "\n\n".join([
+            f"## {r['query']}\n{truncate_to_tokens(r['report'], share)}"
+            for r in reports
+        ])
+        
+        prompt = f"""The current date is {current_date}.
+
+Research question: "{query}"
+Research branch: "{branch_title}"
+
+Section reports for this branch:
+{context}
+
+Summarize this branch's key findings, figures and open questions for a final synthesis.
+Keep concrete numbers and comparisons; drop repetition.
+
+Return only markdown."""
+
+        try:
+            response = await self.client.messages.create(
+                model=self.policy.select("branch_synthesis", prompt_tokens=estimate_tokens(prompt)),
+                max_tokens=config.SYNTHESIS_BRANCH_SUMMARY_TOKENS,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            summary = response.content[0].text.strip()
+        except Exception as e:
+            print(f"⚠️ Branch synthesis error: {e}, using clipped section reports")
+            return truncate_to_tokens(context, config.SYNTHESIS_BRANCH_SUMMARY_TOKENS)
+        
+        await self.job.save_node(node_id, {"summary": summary})
+        return summary
+    
+    async def _generate_section_report(
+        self,
+        sub_query: Dict,
+        current_date: str,
+        branch_title: Optional[str] = None,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Generate the report section for one sub-query (model per the "section" stage, streamed through on_delta)"""
+        
+        # Most relevant evidence within the section's token budget: top-k from the
+        # whole run's index (EVIDENCE_INDEX), or only the sub-query's own tables
+        snippets = []
+        if config.EVIDENCE_INDEX and len(self.evidence):
+            tables, snippets = self.evidence.select(
+                sub_query['question'],
+                config.EVIDENCE_SECTION_TOKEN_BUDGET,
+                boost_queries=[sub_query['question'], branch_title]
+            )
+        else:
+            tables = select_tables(sub_query['question'], sub_query.get('tables') or [], config.EVIDENCE_SECTION_TOKEN_BUDGET)
+        
+        tables_context = ""
+        if tables:
+            tables_context = "\n\nAvailable data:\n" + "\n\n".join([
+                f"Table from {t['url']}:\n{t['table']}" 
+                for t in tables
+            ])
+        if snippets:
+            tables_context += "\n\nSearch result snippets:\n" + "\n".join([
+                f"- {s['title']}: {s['snippet']} ({s['url']})"
+                for s in snippets
+            ])
+        
+        query_prompt = f"""The current date is {current_date}.
+
+Query: "{sub_query['question']}"
+{tables_context}
+
+Write a focused report section for this query. Use the data provided.
+
+Return only markdown."""
+
+        query_report = ""
+        async with self.client.messages.stream(
+            model=self.policy.select("section", prompt_tokens=estimate_tokens(query_prompt), table_count=len(tables)),
+            max_tokens=4000,
+            messages=[{"role": "user", "content": query_prompt}]
+        ) as stream:
+            async for chunk in stream:
+                if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
+                    if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'text'):
+                        query_report += chunk.delta.text
+                        if on_delta:
+                            on_delta(chunk.delta.text)
+        
+        return query_report
     
     async def _update_markdown_report(
         self,
@@ -659,17 +1045,180 @@ Return only markdown."""
     ) -> str:
         """
         Update EXISTING markdown report with modifications
-        Uses Opus for precise updates
+        Regenerates only the sections the request touches and splices them back in;
+        falls back to a full Opus rewrite for document-wide changes
         """
         
-        current_date = datetime.now().strftime("%A, %B %d, %Y")
-        
         new_data_context = ""
         if new_data and "tables" in new_data:
             new_data_context = "\n\nNew data available:\n"
-            for idx, table in enumerate(new_data["tables"][:10], 1):
+            tables = select_tables(modification_request, new_data["tables"], config.EVIDENCE_UPDATE_TOKEN_BUDGET)
+            for idx, table in enumerate(tables, 1):
                 new_data_context += f"\nTable {idx} from {table['url']}:\n{table['table']}\n"
         
+        if config.REPORT_PARTIAL_UPDATES:
+            sections = split_sections(existing_markdown)
+            edit_plan = await self._plan_section_edits(sections, modification_request, new_data_context)
+            
+            if edit_plan is not None:
+                try:
+                    return await self._apply_section_edits(sections, edit_plan, modification_request, new_data_context)
+                except Exception as e:
+                    print(f"⚠️ Partial update failed: {e}, falling back to full rewrite")
+        
+        return await self._rewrite_markdown_report(existing_markdown, modification_request, new_data_context)
+    
+    async def _plan_section_edits(
+        self,
+        sections: List[Dict],
+        modification_request: str,
+        new_data_context: str
+    ) -> Optional[Dict]:
+        """
+        Decide which sections an update touches
+        Returns: {"replace": [{"id", "instruction"}], "insert": [{"after", "instruction"}], "delete": [id]}
+        or None if the whole document must be rewritten
+        """
+        
+        current_date = datetime.now().strftime("%A, %B %d, %Y")
+        
+        prompt = f"""The current date is {current_date}.
+
+A markdown report is split into these sections:
+{section_outline(sections)}
+
+User's update request: "{modification_request}"
+{"New data is available for the update (tables from a web search)." if new_data_context else ""}
+
+Decide the smallest set of section edits that fulfils the request:
+- "replace": sections whose content must change, with a short instruction for each
+- "insert": new sections to add, with the id of the section they go after (null for the end)
+- "delete": ids of sections to remove
+
+Use "full" mode ONLY if the change affects the whole document (e.g. translate, change tone everywhere, restructure).
+
+Return ONLY valid JSON:
+{{"mode": "sections|full", "replace": [{{"id": "...", "instruction": "..."}}], "insert": [{{"after": "...", "instruction": "..."}}], "delete": ["..."]}}"""
+
+        try:
+            response = await self.client.messages.create(
+                model=self.policy.select("planning"),
+                max_tokens=1000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            
+            response_text = response.content[0].text.strip()
+            
+            if "```json" in response_text:
+                response_text = response_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in response_text:
+                response_text = response_text.split("```")[1].split("```")[0].strip()
+            
+            result = json.loads(response_text)
+            
+            if result.get("mode") != "sections":
+                print(f"✏️ Edit planner chose full rewrite")
+                return None
+            
+            section_ids = {section["id"] for section in sections}
+            replace = [e for e in result.get("replace", []) if isinstance(e, dict) and e.get("id") in section_ids]
+            insert = [e for e in result.get("insert", []) if isinstance(e, dict) and e.get("instruction")]
+            delete = [section_id for section_id in result.get("delete", []) if section_id in section_ids]
+            
+            if not (replace or insert or delete):
+                print(f"⚠️ Edit planner returned no usable edits, falling back to full rewrite")
+                return None
+            
+            print(f"✏️ Edit plan: replace {[e['id'] for e in replace]}, insert {len(insert)}, delete {delete}")
+            return {"replace": replace, "insert": insert, "delete": delete}
+        
+        except Exception as e:
+            print(f"⚠️ Edit planner error: {e}, falling back to full rewrite")
+            return None
+    
+    async def _apply_section_edits(
+        self,
+        sections: List[Dict],
+        edit_plan: Dict,
+        modification_request: str,
+        new_data_context: str
+    ) -> str:
+        """Regenerate/insert the planned sections in parallel and splice them into the report"""
+        
+        current_date = datetime.now().strftime("%A, %B %d, %Y")
+        sections_by_id = {section["id"]: section for section in sections}
+        semaphore = asyncio.Semaphore(config.REPORT_SECTION_CONCURRENCY)
+        
+        async def regenerate(edit: Dict) -> Dict:
+            section = sections_by_id[edit["id"]]
+            prompt = f"""The current date is {current_date}.
+
+User's update request: "{modification_request}"
+Instruction for this section: "{edit.get('instruction', modification_request)}"
+{new_data_context}
+
+Current section of the report:
+```markdown
+{section['content'].strip()}
+```
+
+Rewrite ONLY this section. Make only the changes requested. Use the data provided if applicable. Preserve everything else, including the heading.
+
+Return only the updated section markdown."""
+            async with semaphore:
+                updated = await self._stream_report_text(prompt, max_tokens=4000)
+            return replace_section_content(section, updated)
+        
+        async def create(k: int, edit: Dict) -> Dict:
+            prompt = f"""The current date is {current_date}.
+
+User's update request: "{modification_request}"
+Instruction for the new section: "{edit['instruction']}"
+{new_data_context}
+
+Existing report outline:
+{section_outline(sections, preview_chars=80)}
+
+Write ONLY the new report section, starting with a "## " heading. Use the data provided if applicable.
+
+Return only markdown."""
+            async with semaphore:
+                created = await self._stream_report_text(prompt, max_tokens=4000)
+            return new_section(f"new-section-{k}", created)
+        
+        replaced, inserted = await asyncio.gather(
+            asyncio.gather(*[regenerate(edit) for edit in edit_plan["replace"]]),
+            asyncio.gather(*[create(k, edit) for k, edit in enumerate(edit_plan["insert"], 1)])
+        )
+        
+        replaced_by_id = {section["id"]: section for section in replaced}
+        inserts_after: Dict[Optional[str], List[Dict]] = {}
+        for edit, section in zip(edit_plan["insert"], inserted):
+            anchor = edit.get("after") if edit.get("after") in sections_by_id else None
+            inserts_after.setdefault(anchor, []).append(section)
+        
+        spliced = []
+        for section in sections:
+            if section["id"] not in edit_plan["delete"]:
+                spliced.append(replaced_by_id.get(section["id"], section))
+            spliced.extend(inserts_after.get(section["id"], []))
+        spliced.extend(inserts_after.get(None, []))
+        
+        return join_sections(spliced)
+    
+    async def _rewrite_markdown_report(
+        self,
+        existing_markdown: str,
+        modification_request: str,
+        new_data_context: str
+    ) -> str:
+        """
+        Rewrite the whole markdown report with modifications
+        Uses Opus for precise updates
+        """
+        
+        current_date = datetime.now().strftime("%A, %B %d, %Y")
+        
         update_prompt = f"""The current date is {current_date}.
 
 User's update request: "{modification_request}"
@@ -684,12 +1233,17 @@ Make only the changes requested. Use the data provided if applicable. Preserve e
 
 Return only the complete updated markdown."""
 
-        # ✅ Use STREAMING for Opus
+        return await self._stream_report_text(update_prompt, max_tokens=16000)
+    
+    async def _stream_report_text(self, prompt: str, max_tokens: int) -> str:
+        """Stream an update completion (model per the "update" stage) and unwrap markdown code fences"""
+        
+        # ✅ Use STREAMING for long outputs
         markdown_content = ""
         async with self.client.messages.stream(
-            model=self.report_model,
-            max_tokens=16000,
-            messages=[{"role": "user", "content": update_prompt}]
+            model=self.policy.select("update", prompt_tokens=estimate_tokens(prompt)),
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
         ) as stream:
             async for chunk in stream:
                 if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
@@ -699,7 +1253,7 @@ Return only the complete updated markdown."""
         # Extract markdown if wrapped in code blocks
         if "```markdown" in markdown_content:
             markdown_content = markdown_content.split("```markdown")[1].split("```")[0].strip()
-        elif "```" in markdown_content:
+        elif markdown_content.strip().startswith("```"):
             markdown_content = markdown_content.split("```")[1].split("```")[0].strip()
         
         return markdown_content
@@ -709,125 +1263,29 @@ Return only the complete updated markdown."""
         query: str,
         level1_queries: List[str],
         level2_queries: Dict[str, List[str]],
-        use_web_search: bool
+        use_web_search: bool,
+        search_infos: Optional[Dict[str, Dict]] = None
     ) -> str:
         """
         Generate research methodology summary
         ALWAYS called for create_report flow
-        """
-        
-        from simple_search_claude_streaming_with_web_search import ClaudeConversation
-        methodology_conversation = ClaudeConversation()
-        
-        if use_web_search:
-            # Methodology for web search research
-            total_searches = sum(len(queries) for queries in level2_queries.values()) + len(level1_queries)
-            total_tables = sum(len(tables) for tables in self.query_tables.values())
-            
-            query_breakdown = ""
-            for i, l1_query in enumerate(level1_queries, 1):
-                query_breakdown += f"\n**Branch {i}:** {l1_query}\n"
-                l2_queries = level2_queries.get(l1_query, [])
-                for j, l2_query in enumerate(l2_queries, 1):
-                    tables_count = len(self.query_tables.get(l2_query, []))
-                    query_breakdown += f"  - Sub-query {i}.{j}: {l2_query} ({tables_count} tables)\n"
-            
-            methodology_prompt = f"""Research question: "{query}"
-
-Research structure:
-- Branches: {len(level1_queries)}
-- Total queries: {total_searches}
-- Tables analyzed: {total_tables}
-
-Query breakdown:
-{query_breakdown}
-
-Create a detailed research methodology summary with:
-
-1. **Methodology Overview Table**
-   - Research approach
-   - Data sources (web search)
-   - Queries executed
-   - Tables extracted
-
-2. **Research Process Breakdown Table**
-   - Each branch and sub-queries
-   - Sources consulted per query
-   - Data quality assessment
-
-3. **Data Collection Summary**
-   - Web scraping methodology
-   - Search strategy
-   - Table extraction process
-
-4. **Quality Assessment**
-   - Source reliability
-   - Data completeness
-   - Limitations encountered
-
-5. **Step-by-step Process**
-   - Query decomposition
-   - Systematic search execution
-   - Data extraction and organization
-
-6. **Transparency & Limitations**
-   - What worked well
-   - Data gaps identified
-   - Recommendations for follow-up
 
-Be detailed and academic."""
+        Rendered from the research data; RESEARCH_SUMMARY_LLM_POLISH adds a short wording pass
+        """
         
-        else:
-            # Methodology for LLM knowledge-based research
-            query_breakdown = ""
-            for i, l1_query in enumerate(level1_queries, 1):
-                query_breakdown += f"\n**Branch {i}:** {l1_query}\n"
-                l2_queries = level2_queries.get(l1_query, [])
-                for j, l2_query in enumerate(l2_queries, 1):
-                    query_breakdown += f"  - Sub-query {i}.{j}: {l2_query}\n"
-            
-            methodology_prompt = f"""Research question: "{query}"
-
-Research structure:
-- Branches: {len(level1_queries)}
-- Data source: LLM training knowledge (no web search)
-
-Query breakdown:
-{query_breakdown}
-
-Create a methodology summary explaining:
-
-1. **Methodology Overview Table**
-   - Research approach (multi-branch analysis)
-   - Data source (LLM training data, knowledge cutoff)
-   - Branches explored
-
-2. **Research Process**
-   - How the topic was broken down into branches
-   - Sub-queries developed for each branch
-   - Content generated from training knowledge
-
-3. **Knowledge Base & Limitations**
-   - Training data cutoff date
-   - Scope of available knowledge
-   - What types of information were included
-
-4. **Quality Considerations**
-   - Strengths of LLM knowledge approach
-   - Limitations (no real-time data, no specific sources)
-   - When web search would be beneficial
-
-5. **Transparency**
-   - This analysis is based on training data, not live sources
-   - No tables or current statistics included
-   - Conceptual and educational focus
-
-Be clear about the methodology used."""
+        methodology_content = render_methodology(
+            query=query,
+            level1_queries=level1_queries,
+            level2_queries=level2_queries,
+            query_tables=self.query_tables,
+            use_web_search=use_web_search,
+            search_infos=search_infos if search_infos is not None else self.search_infos,
+            artifact="report",
+            pages_per_search=config.RESEARCH_SCRAPE_TOP_RESULTS
+        )
         
-        methodology_content = ""
-        async for chunk in methodology_conversation.send_message(methodology_prompt, simple_search=False):
-            if chunk["type"] == "content":
-                methodology_content += chunk["text"]
+        if config.RESEARCH_SUMMARY_LLM_POLISH:
+            methodology_content = await polish_summary(methodology_content, self.client, self.model)
         
         return methodology_content
     
@@ -838,103 +1296,224 @@ Be clear about the methodology used."""
         searched_queries: List[str],
         tables_added: List[Dict],
         existing_markdown: str,
-        updated_markdown: str
+        updated_markdown: str,
+        changed_sections: Optional[List[str]] = None
     ) -> str:
         """
         Generate update summary explaining what was changed
         ALWAYS called for update_report flow
+
+        Rendered from the update data; RESEARCH_SUMMARY_LLM_POLISH adds a short wording pass
         """
         
-        from simple_search_claude_streaming_with_web_search import ClaudeConversation
-        summary_conversation = ClaudeConversation()
+        summary_content = render_update_summary(
+            modification_request=modification_request,
+            use_web_search=use_web_search,
+            searched_queries=searched_queries,
+            tables_added=tables_added,
+            size_before=len(existing_markdown),
+            size_after=len(updated_markdown),
+            artifact="report",
+            changed_sections=changed_sections
+        )
+        
+        if config.RESEARCH_SUMMARY_LLM_POLISH:
+            summary_content = await polish_summary(summary_content, self.client, self.model)
         
-        # Build context about changes
-        web_search_context = ""
-        if use_web_search and searched_queries:
-            web_search_context = f"""
-**Web Search Performed:**
-- Queries executed: {len(searched_queries)}
-- Tables added: {len(tables_added)}
+        return summary_content
 
-Search queries:
-{chr(10).join(f"- {q}" for q in searched_queries)}
+    async def _plan_research(self, query: str) -> Dict:
+        """
+        Phase 1: research plan and L1 queries
 
-Tables added:
-{chr(10).join(f"- Table from {t['url']}" for t in tables_added[:5])}
-"""
-        else:
-            web_search_context = "**No web search performed** - Changes based on content modifications only"
+        Reuses a cached plan for repeated research, otherwise the single-call
+        planner returns the whole L1/L2 tree with search strings; falls back
+        to per-branch generation if it is disabled or fails.
+
+        Returns: {"plan", "level1_queries", "cache_hit"}
+        """
+        plan = await self.plan_cache.get(query)
+        cache_hit = plan is not None
         
-        # Calculate size change
-        size_before = len(existing_markdown)
-        size_after = len(updated_markdown)
-        size_change = size_after - size_before
+        if not cache_hit and config.RESEARCH_STRUCTURED_PLANNER:
+            plan = await generate_research_plan(query, self.client, self.policy.select("planning"))
         
-        summary_prompt = f"""A markdown report was just updated based on user request.
-
-**User's modification request:** "{modification_request}"
-
-{web_search_context}
+        if plan:
+            level1_queries = [branch["question"] for branch in plan["branches"]]
+        else:
+            level1_queries = await self._generate_level1_queries(query)
+        
+        return {"plan": plan, "level1_queries": level1_queries, "cache_hit": cache_hit}
 
-**Technical details:**
-- Markdown size before: {size_before} characters
-- Markdown size after: {size_after} characters
-- Size change: {'+' if size_change > 0 else ''}{size_change} characters
+    def _start_speculation(self, query: str):
+        """
+        Start planning (and the planned L1 searches) while the request is classified
 
-Create a comprehensive update summary with:
+        Picked up by _create_report_flow; cancelled if the route is not a new report
+        """
+        if not config.RESEARCH_SPECULATIVE_PLANNING or self.job.get("plan") is not None:
+            return
+        self.speculative_plan = asyncio.create_task(self._speculate(query))
+
+    async def _speculate(self, query: str) -> Dict:
+        planned = await self._plan_research(query)
+        
+        for branch in (planned["plan"] or {}).get("branches", []):
+            search_info = branch["search"]
+            if search_info and search_info["search_needed"] and search_info["query"] not in self.prefetched_searches:
+                self.prefetched_searches[search_info["query"]] = asyncio.create_task(
+                    self.conversation.google_search(search_info["query"])
+                )
+        
+        return planned
+
+    def _cancel_speculation(self):
+        """Discard speculative work that was not consumed"""
+        if self.speculative_plan:
+            self.speculative_plan.cancel()
+            self.speculative_plan = None
+        for task in self.prefetched_searches.values():
+            task.cancel()
+        self.prefetched_searches = {}
+
+    async def _search_node(
+        self,
+        executor: ResearchExecutor,
+        q: str,
+        slot: EventSlot,
+        branch_label: Optional[str] = None,
+        search_info: Optional[Dict] = None,
+        branch: Optional[str] = None,
+        tables_output: str = "l2_tables",
+        gate: Optional[str] = None
+    ):
+        """
+        Research node: search query → web search → table extraction for one query
+        Emits search_query/sources/tables events into its slot
 
-1. **Update Summary Table**
-   | Aspect | Details |
-   |--------|---------|
-   | Modification Type | [Content Addition/Data Update/Restructure/etc] |
-   | Web Search Used | {use_web_search} |
-   | New Data Added | {len(tables_added)} tables |
-   | Content Size Change | {size_change} chars |
+        search_info: precomputed {"search_needed", "query"} from the planner (skips the LLM call)
+        branch: L1 query whose evidence novelty this search counts towards
+        tables_output: Output name of the node's tables; not scraped unless the executor needs it
+        gate: Ask the depth controller right before searching: "budget" checks the
+            query/time budget, "depth" also skips the search once its branch is saturated
 
-2. **What Was Changed**
-   - Detailed list of modifications made
-   - If content: what sections were added/modified
-   - If data: what information was added
-   - If structure: what organizational changes
+        Each finished step is checkpointed on the research job, so a resumed
+        job replays the node's events and only runs the steps that are missing.
+        """
 
-3. **Data Added** (if applicable)
-   - List of new tables/information incorporated
-   - Sources of new data
-   - How it was integrated into the report
+        node_id = f"search:{q}"
+        node = dict(self.job.get_node(node_id) or {})
+
+        if "search_info" not in node:
+            if search_info is None:
+                search_info = await executor.run_stage("search_query", self.conversation._generate_search_query, q)
+            node["search_info"] = search_info
+            await self.job.save_node(node_id, node)
+
+        search_info = node["search_info"]
+        self.search_infos[q] = search_info
+        if not (search_info["search_needed"] and search_info["query"]):
+            return
+
+        if gate and "search_results" not in node:
+            # Admitted when the search is about to start, so it sees every
+            # search of the branch that finished in the meantime
+            reason = self.depth.admit(branch if gate == "depth" else None)
+            if reason:
+                self.skipped_queries.add(q)
+                if reason == "saturated":
+                    slot.emit({"type": "reasoning", "text": f"🧭 Branch saturated, skipping sub-query with no new evidence: {q}"})
+                else:
+                    slot.emit({"type": "reasoning", "text": f"⏱️ Research {reason} reached, sub-query not searched: {q}"})
+                return
+
+        slot.emit({"type": "search_query", "text": search_info["query"]})
+
+        if "search_results" not in node:
+            prefetched = self.prefetched_searches.pop(search_info["query"], None)
+            if prefetched:
+                node["search_results"] = await prefetched
+            else:
+                node["search_results"] = await executor.run_stage("search", self.conversation.google_search, search_info["query"])
+            await self.job.save_node(node_id, node)
+
+        search_results = node["search_results"]
+        self.evidence.add_search_results(q, search_results)
+        slot.emit({"type": "sources", "content": search_results, "query": search_info["query"]})
+
+        if "tables" not in node and executor.needs(tables_output):
+            if branch_label:
+                slot.emit({"type": "reasoning", "text": f"📄 Extracting tables from {branch_label} sources..."})
+
+            urls = [result["url"] for result in search_results[:config.RESEARCH_SCRAPE_TOP_RESULTS]]
+            node["tables"] = await executor.run_stage("scrape", self._extract_tables_from_urls, urls) if urls else []
+            await self.job.save_node(node_id, node)
+
+        tables = node.get("tables", [])
+        if branch:
+            novelty = self.depth.record(branch, search_results, tables)
+            print(f"🧭 Novelty {novelty:.0%} for '{q}'")
+        if "tables" in node:
+            # Keyed even when empty: the methodology counts scraped queries
+            self.query_tables[q] = tables
+        if tables:
+            self.evidence.add_tables(q, tables)
+            slot.emit({"type": "tables", "content": tables})
+            if branch_label:
+                slot.emit({"type": "reasoning", "text": f"✅ Extracted {len(tables)} tables from {branch_label}"})
+
+    async def _expand_branch_node(
+        self,
+        executor: ResearchExecutor,
+        i: int,
+        l1_query: str,
+        original_query: str,
+        level2_queries: Dict[str, List[str]],
+        slot: EventSlot,
+        use_web_search: bool,
+        planned_sub_queries: Optional[List[Dict]] = None
+    ):
+        """
+        Research node: expand one L1 branch into L2 queries, then fan out L2 searches
 
-4. **Technical Details**
-   - Content modifications made
-   - New sections added
-   - Structural changes
-   - Data formatting updates
+        planned_sub_queries: sub-queries from the structured planner (skips the LLM call)
+        """
 
-5. **Impact Assessment**
-   - How this improves the report
-   - Content completeness improvements
-   - Research depth enhancements
+        if planned_sub_queries is not None:
+            l2_queries = [sub_query["question"] for sub_query in planned_sub_queries]
+            search_infos = {sub_query["question"]: sub_query["search"] for sub_query in planned_sub_queries}
+        else:
+            node_id = f"expand:{l1_query}"
+            checkpoint = self.job.get_node(node_id)
+            if checkpoint:
+                l2_queries = checkpoint["queries"]
+            else:
+                l2_queries = await executor.run_stage("plan", self._generate_level2_queries, l1_query, original_query)
+                await self.job.save_node(node_id, {"queries": l2_queries})
+            search_infos = {}
+        level2_queries[l1_query] = l2_queries
 
-6. **Quality & Verification**
-   - Were changes successfully applied
-   - Data accuracy considerations
-   - Potential follow-up improvements
+        slot.emit({"type": "reasoning", "text": f"✅ Branch {i} expanded into {len(l2_queries)} sub-queries"})
 
-Be detailed about what changed and why."""
+        if use_web_search:
+            # Sub-queries run concurrently; each is admitted right before its
+            # search, so only searches that haven't started yet are skipped.
+            # The first sub-query is never skipped for saturation.
+            for k, q in enumerate(l2_queries):
+                child = slot.child()
+                executor.spawn(
+                    self._search_node(
+                        executor, q, child, search_info=search_infos.get(q), branch=l1_query,
+                        gate="depth" if k > 0 else "budget"
+                    ),
+                    child
+                )
 
-        summary_content = ""
-        async for chunk in summary_conversation.send_message(summary_prompt, simple_search=False):
-            if chunk["type"] == "content":
-                summary_content += chunk["text"]
-        
-        return summary_content
-    
     async def _extract_tables_from_urls(self, urls: List[str]) -> List[Dict[str, any]]:
-        """Extract tables from URLs using the scraper"""
+        """Extract tables from URLs using the run's shared scrape registry"""
         try:
-            scrape_results = await scrape_tables_parallel(
-                urls,
-                browser_pool=self.browser_pool,
-                timeout=60000
-            )
+            # Pages already scraped (or in flight) for another branch are reused
+            scrape_results = await self.scrape_registry.scrape(urls)
             
             all_tables = []
             for url, tables in scrape_results.items():
@@ -974,7 +1553,7 @@ Format your response ONLY as a JSON array of strings:
 ["question 1", "question 2"]"""
 
         response = await self.client.messages.create(
-            model=self.model,
+            model=self.policy.select("planning"),
             max_tokens=1000,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -1017,7 +1596,7 @@ Format your response ONLY as a JSON array of strings:
 ["specific query 1", "specific query 2"]"""
 
         response = await self.client.messages.create(
-            model=self.model,
+            model=self.policy.select("planning"),
             max_tokens=500,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -1209,7 +1788,7 @@ Format your response ONLY as a JSON array of strings:
                     
 #                     # Extract tables
 #                     browser_pool = await get_browser_pool()
-#                     urls = [result["url"] for result in search_results[:5]]
+#                     urls = [result["url"] for result in search_results[:config.RESEARCH_SCRAPE_TOP_RESULTS]]
                     
 #                     if urls:
 #                         yield {"type": "reasoning", "text": "📊 Extracting tables from sources..."}
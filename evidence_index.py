@@ -0,0 +1,177 @@
+"""
+Per-research evidence index
+
+Collects everything a research run gathered (scraped tables and search
+result snippets, across all branches) into one in-memory inverted index.
+Report sections query it for the top-k evidence for their question instead
+of receiving only what was scraped for their own query, so evidence found
+under one branch is reused by the others without another scrape.
+
+Scoring is BM25 over the postings of the query terms, vectorized with numpy.
+"""
+
+import hashlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+from evidence_selector import BM25_B, BM25_K1, estimate_tokens, pack_tables, tokenize
+
+# Score multiplier for evidence gathered by the asking query or its branch
+OWN_EVIDENCE_BOOST = 1.5
+
+# Documents scoring below this share of the best match are dropped
+MIN_RELATIVE_SCORE = 0.3
+
+# Share of a prompt's evidence budget that search snippets may use
+SNIPPET_BUDGET_SHARE = 0.2
+
+
+class EvidenceIndex:
+    """
+    Inverted index over one run's tables (by cell text) and search snippets
+
+    Documents are deduplicated by content, so the same table scraped for
+    several queries is indexed once and remembers every query that found it.
+    """
+
+    def __init__(self):
+        self.documents: List[Dict] = []
+        self._doc_ids: Dict[str, int] = {}
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._lengths: List[int] = []
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _add(self, kind: str, url: str, text: str, query: str, extra: Optional[Dict] = None):
+        key = hashlib.sha1(f"{kind}\0{' '.join(text.split())}".encode("utf-8")).hexdigest()
+        doc_id = self._doc_ids.get(key)
+        if doc_id is not None:
+            self.documents[doc_id]["queries"].add(query)
+            return
+
+        doc_id = len(self.documents)
+        self._doc_ids[key] = doc_id
+        self.documents.append({"kind": kind, "url": url, "text": text, "queries": {query}, **(extra or {})})
+
+        # URL words help too (e.g. ".../iphone-vs-pixel-specs")
+        tokens = tokenize(f"{url} {text}")
+        self._lengths.append(len(tokens))
+        for term, count in Counter(tokens).items():
+            doc_ids, counts = self._postings.setdefault(term, ([], []))
+            doc_ids.append(doc_id)
+            counts.append(count)
+        self._arrays.clear()
+
+    def add_tables(self, query: str, tables: Iterable[Dict]):
+        """Index [{"url", "table"}] found for a query"""
+        for t in tables:
+            self._add("table", t["url"], t["table"], query)
+
+    def add_search_results(self, query: str, search_results: Iterable[Dict]):
+        """Index the snippets of [{"title", "url", "snippet"}] search results"""
+        for result in search_results:
+            snippet = (result.get("snippet") or "").strip()
+            if snippet:
+                self._add("snippet", result["url"], snippet, query, {"title": result.get("title", "")})
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            arrays = (np.array(postings[0]), np.array(postings[1], dtype=float))
+            self._arrays[term] = arrays
+        return arrays
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        kind: Optional[str] = None,
+        boost_queries: Iterable[str] = ()
+    ) -> List[Dict]:
+        """
+        Top-k documents for a query
+
+        Args:
+            query: Text to match (usually a section's sub-query)
+            k: Max documents returned
+            kind: Only "table" or "snippet" documents
+            boost_queries: Queries whose own evidence is preferred; if no
+                term matches at all, their documents are returned unranked
+
+        Returns: [{"kind", "url", "text", "queries", "score", ...}] best first
+        """
+        if not self.documents or k <= 0:
+            return []
+
+        lengths = np.array(self._lengths, dtype=float)
+        count = len(lengths)
+        average_length = lengths.mean() or 1.0
+        scores = np.zeros(count)
+
+        for term in dict.fromkeys(tokenize(query)):
+            arrays = self._term_arrays(term)
+            if arrays is None:
+                continue
+            doc_ids, frequencies = arrays
+            idf = np.log(1 + (count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_ids] / average_length)
+            scores[doc_ids] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+
+        boost_queries = set(boost_queries)
+        own = np.array([bool(doc["queries"] & boost_queries) for doc in self.documents])
+        scores[own] *= OWN_EVIDENCE_BOOST
+
+        if kind is not None:
+            of_kind = np.array([doc["kind"] == kind for doc in self.documents])
+            scores[~of_kind] = 0
+            own &= of_kind
+
+        best = scores.max()
+        candidates = scores >= MIN_RELATIVE_SCORE * best if best > 0 else own
+
+        candidate_ids = np.flatnonzero(candidates)
+        if len(candidate_ids) > k:
+            candidate_ids = candidate_ids[np.argpartition(-scores[candidate_ids], k - 1)[:k]]
+        ranked = candidate_ids[np.argsort(-scores[candidate_ids], kind="stable")]
+
+        return [{**self.documents[doc_id], "score": float(scores[doc_id])} for doc_id in ranked]
+
+    def select(
+        self,
+        query: str,
+        token_budget: int,
+        boost_queries: Iterable[str] = (),
+        k: Optional[int] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Evidence for one prompt within a token budget
+
+        Returns: (tables [{"url", "table"}], snippets [{"title", "url", "snippet"}])
+        """
+        k = k or config.EVIDENCE_INDEX_TOP_K
+        boost_queries = list(boost_queries)
+
+        snippets = []
+        snippet_budget = int(token_budget * SNIPPET_BUDGET_SHARE)
+        for doc in self.search(query, k, kind="snippet", boost_queries=boost_queries):
+            cost = estimate_tokens(doc["text"]) + 20
+            if cost > snippet_budget:
+                break
+            snippets.append({"title": doc.get("title", ""), "url": doc["url"], "snippet": doc["text"]})
+            snippet_budget -= cost
+
+        used = sum(estimate_tokens(s["snippet"]) + 20 for s in snippets)
+        ranked_tables = [
+            {"url": doc["url"], "table": doc["text"]}
+            for doc in self.search(query, k, kind="table", boost_queries=boost_queries)
+        ]
+        tables = pack_tables(query, ranked_tables, token_budget - used, max_tables=k)
+        return tables, snippets
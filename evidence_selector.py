@@ -0,0 +1,193 @@
+"""
+Relevance-ranked table evidence selection with token budgeting
+
+Scores scraped markdown tables against a query with BM25 over their cells,
+estimates each table's token cost, and packs the most relevant tables into
+a per-prompt budget. Tables too large for the budget are reduced to their
+header plus the most relevant rows.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import config
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Rough chars-per-token ratio for English text and markdown tables
+CHARS_PER_TOKEN = 4
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "vs", "was", "what", "when", "which", "with"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer round trip)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Clip text to roughly max_tokens, preferring a paragraph boundary"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+
+    clipped = text[:max_chars]
+    cut = clipped.rfind("\n\n")
+    if cut > max_chars // 2:
+        clipped = clipped[:cut]
+    return clipped.rstrip() + "\n\n*[…truncated]*"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word/number tokens without stopwords"""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def bm25_scores(query: str, documents: List[str]) -> np.ndarray:
+    """
+    BM25 score of every document against the query
+
+    Builds a (documents × query terms) frequency matrix and scores it in one
+    vectorized pass.
+    """
+    query_terms = list(dict.fromkeys(tokenize(query)))
+    if not documents or not query_terms:
+        return np.zeros(len(documents))
+
+    term_index = {term: i for i, term in enumerate(query_terms)}
+    frequencies = np.zeros((len(documents), len(query_terms)))
+    lengths = np.zeros(len(documents))
+
+    for row, document in enumerate(documents):
+        tokens = tokenize(document)
+        lengths[row] = len(tokens)
+        for term, count in Counter(tokens).items():
+            column = term_index.get(term)
+            if column is not None:
+                frequencies[row, column] = count
+
+    document_frequency = (frequencies > 0).sum(axis=0)
+    idf = np.log(1 + (len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    average_length = lengths.mean() or 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+    weighted = frequencies * (BM25_K1 + 1) / (frequencies + norm[:, None])
+
+    return weighted @ idf
+
+
+def summarize_table(table: str, query: str, max_tokens: int) -> str:
+    """
+    Shrink an oversized markdown table to fit max_tokens
+
+    Keeps the title and header, then the rows most relevant to the query
+    (in their original order), and notes how many rows were omitted.
+    """
+    lines = table.split("\n")
+    separator_index = next((i for i, line in enumerate(lines) if re.match(r"^\|\s*-{3}", line)), None)
+    if separator_index is None:
+        return table[:max_tokens * CHARS_PER_TOKEN]
+
+    head = lines[:separator_index + 1]
+    rows = [line for line in lines[separator_index + 1:] if line.strip()]
+
+    budget = max_tokens - estimate_tokens("\n".join(head)) - 20
+    if budget <= 0 or not rows:
+        return "\n".join(head)
+
+    # Most relevant rows first; ties keep the original (often chronological) order
+    scores = bm25_scores(query, rows)
+    ranked = np.argsort(-scores, kind="stable")
+
+    kept = []
+    used = 0
+    for index in ranked:
+        cost = estimate_tokens(rows[index])
+        if used + cost > budget:
+            break
+        kept.append(index)
+        used += cost
+
+    kept.sort()
+    omitted = len(rows) - len(kept)
+    summary = head + [rows[index] for index in kept]
+    if omitted:
+        summary.append(f"\n*({omitted} of {len(rows)} rows omitted as less relevant)*")
+    return "\n".join(summary)
+
+
+def select_tables(
+    query: str,
+    tables: List[Dict],
+    token_budget: int,
+    max_tables: int = 10,
+    max_table_tokens: Optional[int] = None
+) -> List[Dict]:
+    """
+    Pick the most relevant tables for a prompt within a token budget
+
+    Args:
+        query: Text the tables should support (sub-query, update request...)
+        tables: [{"url", "table"}] as produced by _extract_tables_from_urls
+        token_budget: Total tokens available for tables in this prompt
+        max_tables: Upper bound on the number of tables
+        max_table_tokens: Tables above this size are summarized
+
+    Returns: [{"url", "table"}] in relevance order; oversized tables are summarized
+    """
+    if not tables or token_budget <= 0:
+        return []
+
+    # Score on cell text plus source URL words (e.g. ".../iphone-vs-pixel-specs")
+    documents = [f"{t['url']} {t['table']}" for t in tables]
+    scores = bm25_scores(query, documents)
+    ranked = np.argsort(-scores, kind="stable")
+
+    return pack_tables(query, [tables[index] for index in ranked], token_budget, max_tables, max_table_tokens)
+
+
+def pack_tables(
+    query: str,
+    ranked_tables: List[Dict],
+    token_budget: int,
+    max_tables: int = 10,
+    max_table_tokens: Optional[int] = None
+) -> List[Dict]:
+    """
+    Pack already-ranked tables into a token budget
+
+    Takes tables in the given order, summarizing the ones above
+    max_table_tokens or the remaining budget, and skips what can't fit.
+    """
+    max_table_tokens = max_table_tokens or config.EVIDENCE_MAX_TABLE_TOKENS
+
+    selected = []
+    used = 0
+    for item in ranked_tables:
+        if len(selected) >= max_tables:
+            break
+
+        table = item["table"]
+        remaining = token_budget - used
+        limit = min(max_table_tokens, remaining)
+
+        if estimate_tokens(table) > limit:
+            if limit < 150:
+                continue
+            table = summarize_table(table, query, limit)
+            if estimate_tokens(table) > remaining:
+                continue
+
+        selected.append({**item, "table": table})
+        used += estimate_tokens(table)
+
+    return selected
@@ -0,0 +1,125 @@
+"""
+Local fast path for follow-up routing
+
+Answers the obvious follow-up cases without an LLM call: greetings and
+acknowledgements, short presentation-only edits (colour/font/layout) on an
+existing report or app, explicit "search for ..." phrasing, and questions
+about the existing content. Each rule carries a confidence; classify_followup_message only uses
+the local answer at or above ROUTER_LOCAL_MIN_CONFIDENCE and otherwise
+falls back to the LLM router.
+
+Benchmark against the labeled replay set with benchmark_followup_router.py.
+"""
+
+import re
+from typing import Dict, Optional
+
+_ACK_WORDS = {
+    "hi", "hello", "hey", "there", "thanks", "thank", "you", "thx", "ty", "ok", "okay", "great", "cool",
+    "nice", "perfect", "awesome", "amazing", "wow", "good", "job", "work", "bye", "goodbye", "got", "it",
+    "sounds", "so", "much", "a", "lot", "morning", "evening", "love", "this", "that", "looks", "very",
+}
+
+# Presentation-only phrasing (colour/font/layout/CSS): safe to route as a local edit
+_STYLE_PATTERN = re.compile(
+    r"\b(colou?rs?|red|blue|green|black|white|gr[ae]y|orange|purple|yellow|pink|fonts?|font size|"
+    r"dark mode|light mode|background|layout|spacing|padding|margins?|bold|italic|bigger|smaller|larger|"
+    r"css|styling|animations?|responsive|align|center|centre|rounded|shadows?|borders?|"
+    r"formatting|typos?|bullet points?)\b"
+)
+# Content edits ("remove", "move", "rename", "tone"...) also read as new requests
+# ("move on to Tesla"), so they only get a sub-threshold hint for the LLM router
+_EDIT_PATTERN = re.compile(
+    r"\b(shorten|shorter|longer|rephrase|reword|rename|reorder|move|remove|delete|title|tone|theme|"
+    r"header|footer|sidebar|buttons?|icons?|mobile|headings?|format)\b"
+)
+_SEARCH_PATTERN = re.compile(
+    r"\b(search (for|the web|online)|look up|lookup|google (it|for|search|the)|web search|browse|"
+    r"find (me )?(the )?(latest|current|recent|newest)|fetch (the )?(latest|current))\b"
+)
+_DATA_PATTERN = re.compile(
+    r"\b(latest|current|currently|today|recent|news|statistics|stats|prices?|numbers|figures|data|"
+    r"revenue|sales|market share|(19|20)\d{2})\b"
+)
+_NEW_TOPIC_PATTERN = re.compile(r"\b(research|analy[sz]e|investigate|report on|deep dive|new topic)\b")
+_ADD_PATTERN = re.compile(r"\b(add|include|update|append|extend|incorporate|expand|insert)\b")
+_QUESTION_PATTERN = re.compile(r"^(what|why|how|who|which|where|when|is|are|does|do|can you explain|could you explain|explain)\b")
+_ARTIFACT_REFERENCE = re.compile(r"\b(this|the) (report|app|dashboard|chart|table|section|analysis)\b|\b(above|you wrote|you said)\b")
+
+
+def _normalize(message: str) -> str:
+    return " ".join(re.sub(r"[^\w\s?']", " ", message.lower()).split())
+
+
+def _names_entity(message: str) -> bool:
+    """Capitalized words after the first (Tesla, BYD): the message brings in new content"""
+    for word in message.split()[1:]:
+        word = word.strip(".,;:!?\"'()")
+        if word[:1].isupper() and word != "I" and not _STYLE_PATTERN.search(word.lower()):
+            return True
+    return False
+
+
+def route_locally(message: str, has_existing: bool, artifact: str = "report") -> Optional[Dict]:
+    """
+    Route a follow-up message with local rules
+
+    Args:
+        message: Latest user message
+        has_existing: Whether there is an existing report/app to update
+        artifact: "report" or "app" (route names are create_<artifact>/update_<artifact>)
+
+    Returns: {"route", "use_web_search", "confidence", "rule"} or None when no rule applies
+    """
+    text = _normalize(message)
+    words = text.replace("?", " ").split()
+    if not words:
+        return None
+
+    create, update = f"create_{artifact}", f"update_{artifact}"
+    wants_search = bool(_SEARCH_PATTERN.search(text))
+
+    # "thanks!", "hi there", "looks great"
+    if len(words) <= 6 and all(word in _ACK_WORDS for word in words):
+        return {"route": "conversation", "use_web_search": False, "confidence": 0.97, "rule": "acknowledgement"}
+
+    # "search for the latest EU heat pump sales"
+    if wants_search:
+        if not has_existing:
+            return {"route": create, "use_web_search": True, "confidence": 0.9, "rule": "explicit_search"}
+        if _ADD_PATTERN.search(text):
+            return {"route": update, "use_web_search": True, "confidence": 0.88, "rule": "explicit_search_update"}
+        # New topic or data for the existing one: the LLM decides
+        return {"route": update, "use_web_search": True, "confidence": 0.6, "rule": "explicit_search_ambiguous"}
+
+    if not has_existing:
+        return None
+
+    is_question = text.endswith("?") or bool(_QUESTION_PATTERN.search(text))
+    plain_edit = (
+        len(words) <= 20
+        and not is_question
+        and not _ADD_PATTERN.search(text)
+        and not _DATA_PATTERN.search(text)
+        and not _NEW_TOPIC_PATTERN.search(text)
+        and not _names_entity(message)
+    )
+
+    # "make the header dark blue", "use a bigger font"
+    if plain_edit and _STYLE_PATTERN.search(text):
+        return {"route": update, "use_web_search": False, "confidence": 0.9, "rule": "styling_edit"}
+
+    # "shorten the intro", "remove the pricing section": likely edits, the LLM confirms
+    if plain_edit and _EDIT_PATTERN.search(text):
+        return {"route": update, "use_web_search": False, "confidence": 0.7, "rule": "content_edit"}
+
+    # "why is the growth in this table so high?"
+    if (
+        text.endswith("?")
+        and _QUESTION_PATTERN.search(text)
+        and _ARTIFACT_REFERENCE.search(text)
+        and not _ADD_PATTERN.search(text)
+    ):
+        return {"route": "conversation", "use_web_search": False, "confidence": 0.86, "rule": "question_about_content"}
+
+    return None
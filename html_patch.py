@@ -0,0 +1,210 @@
+"""
+Patch-based HTML app updates
+
+Instead of re-emitting a whole app, the model returns a short list of edit
+operations that are applied here:
+
+    {"op": "replace", "selector": css, "html": markup}          outer HTML of matches
+    {"op": "set_inner", "selector": css, "html": markup}        inner HTML of matches
+    {"op": "insert", "selector": css, "position": "before|after|prepend|append", "html": markup}
+    {"op": "remove", "selector": css}
+    {"op": "set_attribute", "selector": css, "name": attr, "value": text}
+    {"op": "remove_attribute", "selector": css, "name": attr}
+    {"op": "set_text", "selector": css, "text": text}
+    {"op": "replace_text", "find": exact source text, "replace": text}
+
+replace_text is a search/replace hunk on the HTML source (for CSS rules and
+script code); it must match exactly once. Element operations use CSS
+selectors via lxml and must match at least one element. Any failure raises
+HtmlPatchError so the caller can fall back to full regeneration.
+"""
+
+from typing import Dict, List
+
+import lxml.html
+from cssselect import SelectorError
+from lxml import etree
+
+MAX_OPERATIONS = 40
+
+# A patched app smaller than this share of the original is rejected
+MIN_SIZE_RATIO = 0.2
+
+_REQUIRED_FIELDS = {
+    "replace": ("selector", "html"),
+    "set_inner": ("selector", "html"),
+    "insert": ("selector", "position", "html"),
+    "remove": ("selector",),
+    "set_attribute": ("selector", "name", "value"),
+    "remove_attribute": ("selector", "name"),
+    "set_text": ("selector", "text"),
+    "replace_text": ("find", "replace"),
+}
+_POSITIONS = {"before", "after", "prepend", "append"}
+
+
+class HtmlPatchError(ValueError):
+    """A patch could not be applied or produced an invalid document"""
+
+
+def validate_operations(operations) -> List[Dict]:
+    """Check the shape of model-proposed operations; raises HtmlPatchError"""
+    if not isinstance(operations, list) or not operations:
+        raise HtmlPatchError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise HtmlPatchError(f"too many operations ({len(operations)} > {MAX_OPERATIONS})")
+
+    for i, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get("op") not in _REQUIRED_FIELDS:
+            raise HtmlPatchError(f"operation {i}: unknown op {operation!r:.80}")
+        missing = [field for field in _REQUIRED_FIELDS[operation["op"]] if not isinstance(operation.get(field), str)]
+        if missing:
+            raise HtmlPatchError(f"operation {i} ({operation['op']}): missing {', '.join(missing)}")
+        if operation["op"] == "insert" and operation["position"] not in _POSITIONS:
+            raise HtmlPatchError(f"operation {i}: bad position {operation['position']!r}")
+    return operations
+
+
+def _fragment(markup: str):
+    """Markup parsed into a <div> container (leading text in .text)"""
+    return lxml.html.fragment_fromstring(markup, create_parent="div")
+
+
+def _append_text(el, text: str):
+    """Append text at the end of el's content"""
+    if not text:
+        return
+    if len(el):
+        el[-1].tail = (el[-1].tail or "") + text
+    else:
+        el.text = (el.text or "") + text
+
+
+def _add_text_before(el, text: str):
+    """Put text directly before el in its parent"""
+    if not text:
+        return
+    previous = el.getprevious()
+    if previous is not None:
+        previous.tail = (previous.tail or "") + text
+    else:
+        parent = el.getparent()
+        parent.text = (parent.text or "") + text
+
+
+def _insert(el, position: str, markup: str):
+    container = _fragment(markup)
+    children = list(container)
+
+    if position == "append":
+        _append_text(el, container.text)
+        el.extend(children)
+    elif position == "prepend":
+        old_text = el.text
+        el.text = container.text
+        for index, child in enumerate(children):
+            el.insert(index, child)
+        if children:
+            children[-1].tail = (children[-1].tail or "") + (old_text or "")
+        else:
+            el.text = (el.text or "") + (old_text or "")
+    elif position == "before":
+        if el.getparent() is None:
+            raise HtmlPatchError("cannot insert before the document root")
+        _add_text_before(el, container.text)
+        for child in children:
+            el.addprevious(child)
+    else:  # after
+        if el.getparent() is None:
+            raise HtmlPatchError("cannot insert after the document root")
+        el.tail = (el.tail or "") + (container.text or "")
+        anchor = el
+        for child in children:
+            anchor.addnext(child)
+            anchor = child
+
+
+def _clear(el):
+    for child in list(el):
+        el.remove(child)
+    el.text = None
+
+
+def _apply_element_operation(doc, operation: Dict):
+    try:
+        matches = doc.cssselect(operation["selector"])
+    except (SelectorError, etree.XPathError) as e:
+        raise HtmlPatchError(f"bad selector {operation['selector']!r}: {e}")
+    if not matches:
+        raise HtmlPatchError(f"selector {operation['selector']!r} matched nothing")
+
+    op = operation["op"]
+    for el in matches:
+        if op in ("replace", "remove") and el.getparent() is None:
+            raise HtmlPatchError(f"cannot {op} the document root")
+
+        if op == "replace":
+            _insert(el, "before", operation["html"])
+            el.drop_tree()
+        elif op == "remove":
+            el.drop_tree()
+        elif op == "set_inner":
+            _clear(el)
+            _insert(el, "append", operation["html"])
+        elif op == "insert":
+            _insert(el, operation["position"], operation["html"])
+        elif op == "set_attribute":
+            el.set(operation["name"], operation["value"])
+        elif op == "remove_attribute":
+            el.attrib.pop(operation["name"], None)
+        elif op == "set_text":
+            _clear(el)
+            el.text = operation["text"]
+
+
+def apply_html_patch(html: str, operations: List[Dict]) -> str:
+    """
+    Apply edit operations to an HTML document
+
+    Text hunks run on the source first; element operations then run on the
+    lxml tree (the document is only re-serialized if there are any).
+    Raises HtmlPatchError if an operation fails or the result looks broken.
+    """
+    validate_operations(operations)
+    original = html
+
+    for i, operation in enumerate(op for op in operations if op["op"] == "replace_text"):
+        count = html.count(operation["find"])
+        if count != 1:
+            raise HtmlPatchError(f"replace_text hunk {i} matched {count} times (needs exactly 1)")
+        html = html.replace(operation["find"], operation["replace"])
+
+    element_operations = [op for op in operations if op["op"] != "replace_text"]
+    patched = html
+    if element_operations:
+        try:
+            doc = lxml.html.document_fromstring(html)
+        except (etree.ParserError, ValueError) as e:
+            raise HtmlPatchError(f"document does not parse: {e}")
+
+        for operation in element_operations:
+            _apply_element_operation(doc, operation)
+
+        doctype = doc.getroottree().docinfo.doctype
+        patched = lxml.html.tostring(doc, encoding="unicode", doctype=doctype or None)
+
+    validate_patched_html(original, patched)
+    return patched
+
+
+def validate_patched_html(original: str, patched: str):
+    """Reject patches that leave an empty or drastically truncated document"""
+    if len(patched) < MIN_SIZE_RATIO * len(original):
+        raise HtmlPatchError(f"patched document shrank from {len(original)} to {len(patched)} chars")
+    try:
+        doc = lxml.html.document_fromstring(patched)
+    except (etree.ParserError, ValueError) as e:
+        raise HtmlPatchError(f"patched document does not parse: {e}")
+    body = doc.find("body")
+    if body is None or (len(body) == 0 and not (body.text or "").strip()):
+        raise HtmlPatchError("patched document has an empty body")
@@ -5,6 +5,16 @@ from fastapi import UploadFile
 import asyncio
 from datetime import datetime
 from tables_scraper import scrape_tables_parallel, BrowserPool
+from scrape_registry import ScrapeRegistry
+from research_depth import DepthController
+from research_cache import PlanCache, ReportCache, ReportRecorder, cached_report_notice, plan_from_queries
+from evidence_selector import select_tables, estimate_tokens
+from html_patch import apply_html_patch, validate_operations, HtmlPatchError
+from table_data import build_app_datasets, describe_datasets, inject_payload, extract_payload, PAYLOAD_ELEMENT_ID
+from model_policy import ModelPolicy
+from followup_router import route_locally
+from research_summary import render_methodology, render_update_summary, polish_summary
+from config import config
 
 # ✅ Global browser pool (shared across requests)
 _global_browser_pool: Optional[BrowserPool] = None
@@ -79,9 +89,16 @@ async def classify_followup_message(
 ) -> Dict[str, any]:
     """
     Full classifier for follow-up messages
+    Obvious cases are routed locally (ROUTER_LOCAL_FAST_PATH) without the LLM call
     Returns: {"route": "conversation|create_app|update_app", "use_web_search": bool}
     """
     
+    if config.ROUTER_LOCAL_FAST_PATH:
+        local = route_locally(user_message, has_existing_html, artifact="app")
+        if local and local["confidence"] >= config.ROUTER_LOCAL_MIN_CONFIDENCE:
+            print(f"🔀 Local router: {local['route']}, Web search: {local['use_web_search']} ({local['rule']}, {local['confidence']:.2f})")
+            return {"route": local["route"], "use_web_search": local["use_web_search"]}
+    
     current_date = datetime.now().strftime("%A, %B %d, %Y")
     
     # Format conversation history
@@ -189,25 +206,34 @@ class DeepResearch:
     Intelligent research system with multi-stage deep research and smart routing
     """
     
-    def __init__(self, conversation):
+    def __init__(self, conversation, user_tier: str = "user"):
         """
         Args:
             conversation: ClaudeConversation instance
+            user_tier: "anonymous" | "user" | "premium", input to the model policy
         """
         self.conversation = conversation
         self.client = conversation.client
         self.model = conversation.model
-        self.model = "claude-opus-4-20250514"
-        self.html_model = "claude-opus-4-20250514"
+        self.policy = ModelPolicy(user_tier=user_tier)  # Model per stage (MODEL_POLICY)
         self.browser_pool = None
         self.query_tables = {}
         self.last_research_data = None
+        self.plan_cache = PlanCache("lab")
+        self.report_cache = ReportCache("html")
+        self.scrape_registry = ScrapeRegistry()
+        self.speculative_plan: Optional[asyncio.Task] = None
+        self.prefetched_searches: Dict[str, asyncio.Task] = {}
+        self.depth = DepthController()
     
     async def research(
     self, 
     query: str, 
     files: Optional[List[UploadFile]] = None,
-    existing_html: Optional[str] = None
+    existing_html: Optional[str] = None,
+    max_queries: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    refresh: bool = False
 ):
         """
         Main entry point with intelligent routing
@@ -216,57 +242,90 @@ class DeepResearch:
             query: User's message/question
             files: Optional uploaded files
             existing_html: Optional existing HTML app to update
+            max_queries: Optional web-search query budget (default RESEARCH_MAX_QUERIES)
+            max_seconds: Optional research time budget (default RESEARCH_MAX_SECONDS)
+            refresh: Run new research even if a cached app exists (REPORT_CACHE);
+                     on a follow-up, skip routing and build a new app
         
         Yields: {"type": "search_query"/"sources"/"tables"/"reasoning"/"content"/"html_app"/"research_summary"}
         """
         
-        # ✅ Detect if this is a follow-up
-        follow_up = len(self.conversation.messages) > 0
+        self.depth = DepthController(max_queries=max_queries, max_seconds=max_seconds)
         
-        if not follow_up:
-            # ✅ FIRST MESSAGE - Classify action
-            yield {"type": "reasoning", "text": "🔍 Analyzing your request..."}
+        try:
+            # ✅ Detect if this is a follow-up
+            follow_up = len(self.conversation.messages) > 0
             
-            decision = await self._classify_first_message(query)
+            if not follow_up:
+                # Same research requested recently: replay it (skips classification
+                # too, so only web-search reports qualify; no-search ones are
+                # checked once the classifier asks for no search)
+                cached = await self._get_cached_app(query, files, refresh)
+                if cached:
+                    async for chunk in self._replay_cached_app(cached):
+                        yield chunk
+                    return
+                
+                # ✅ FIRST MESSAGE - Classify action
+                yield {"type": "reasoning", "text": "🔍 Analyzing your request..."}
+                
+                # Plan while classifying; discarded unless an app is created
+                self._start_speculation(query)
+                decision = await self._classify_first_message(query)
+                
+                if decision["action"] == "conversation":
+                    self._cancel_speculation()
+                    # Just greeting/casual conversation
+                    yield {"type": "reasoning", "text": "💬 Hello! How can I help you today?"}
+                    async for chunk in self.conversation.send_message(query, files, simple_search=False, mode="lab", decision=decision):
+                        yield chunk
+                else:
+                    # Create app (cache already checked above)
+                    async for chunk in self._cached_app_flow(query, files, decision["use_web_search"], check_cache=not refresh and not decision["use_web_search"]):
+                        yield chunk
             
-            if decision["action"] == "conversation":
-                # Just greeting/casual conversation
-                yield {"type": "reasoning", "text": "💬 Hello! How can I help you today?"}
-                async for chunk in self.conversation.send_message(query, files, simple_search=False):
-                    yield chunk
             else:
-                # Create app
-                async for chunk in self._create_app_flow(query, files, decision["use_web_search"]):
-                    yield chunk
-        
-        else:
-            # ✅ FOLLOW-UP MESSAGE - Classify route + web search
-            decision = await classify_followup_message(
-                self.conversation.messages,
-                query,
-                self.client,
-                self.model,
-                has_existing_html=existing_html is not None
-            )
-            
-            route = decision["route"]
-            use_web_search = decision["use_web_search"]
-            
-            if route == "conversation":
-                # Just answer, no app
-                yield {"type": "reasoning", "text": "💬 Answering your question..."}
-                async for chunk in self.conversation.send_message(query, files, simple_search=False):
-                    yield chunk
-            
-            elif route == "create_app":
-                # New topic - create new app
-                async for chunk in self._create_app_flow(query, files, use_web_search):
-                    yield chunk
-            
-            elif route == "update_app":
-                # Update existing app
-                async for chunk in self._update_app_flow(query, files, existing_html, use_web_search):
-                    yield chunk
+                # ✅ FOLLOW-UP MESSAGE - Classify route + web search
+                if refresh:
+                    # Refresh of a replayed app: the same question re-sent for new data
+                    self._start_speculation(query)
+                    decision = {"route": "create_app", "use_web_search": True}
+                else:
+                    # Without an existing app the likely routes are conversation or
+                    # create_app, so planning speculatively is usually worth it
+                    if existing_html is None:
+                        self._start_speculation(query)
+                    decision = await classify_followup_message(
+                        self.conversation.messages,
+                        query,
+                        self.client,
+                        self.policy.select("routing"),
+                        has_existing_html=existing_html is not None
+                    )
+                
+                route = decision["route"]
+                use_web_search = decision["use_web_search"]
+                
+                if route != "create_app":
+                    self._cancel_speculation()
+                
+                if route == "conversation":
+                    # Just answer, no app
+                    yield {"type": "reasoning", "text": "💬 Answering your question..."}
+                    async for chunk in self.conversation.send_message(query, files, simple_search=False, mode="lab", decision=decision):
+                        yield chunk
+                
+                elif route == "create_app":
+                    # New topic - create new app
+                    async for chunk in self._cached_app_flow(query, files, use_web_search, check_cache=not refresh):
+                        yield chunk
+                
+                elif route == "update_app":
+                    # Update existing app
+                    async for chunk in self._update_app_flow(query, files, existing_html, use_web_search):
+                        yield chunk
+        finally:
+            self._cancel_speculation()
 
 
     async def _classify_first_message(self, query: str) -> dict:
@@ -310,7 +369,7 @@ class DeepResearch:
 
         try:
             response = await self.client.messages.create(
-                model=self.model,
+                model=self.policy.select("routing"),
                 max_tokens=100,
                 messages=[{"role": "user", "content": prompt}]
             )
@@ -333,6 +392,51 @@ class DeepResearch:
             print(f"⚠️ Classifier error: {e}, defaulting to conversation")
             return {"action": "conversation", "use_web_search": False}
         
+    async def _get_cached_app(
+        self,
+        query: str,
+        files: Optional[List[UploadFile]],
+        refresh: bool,
+        use_web_search: bool = True
+    ) -> Optional[Dict]:
+        """Cached app for this query, unless disabled, refreshed or file-specific"""
+        if not config.REPORT_CACHE or refresh or files:
+            return None
+        return await self.report_cache.get(query, use_web_search)
+    
+    async def _replay_cached_app(self, cached: Dict):
+        """Replay a cached app's events through the normal stream protocol"""
+        # "cached" lets the client offer a refresh (re-send with refresh=true)
+        yield {"type": "reasoning", "text": cached_report_notice(cached), "cached": True}
+        for event in cached["events"]:
+            yield event
+    
+    async def _cached_app_flow(
+        self,
+        query: str,
+        files: Optional[List[UploadFile]],
+        use_web_search: bool,
+        check_cache: bool = True
+    ):
+        """
+        _create_app_flow behind the report cache
+        Replays a recent app for the same query, otherwise stores the new one
+        """
+        if check_cache:
+            cached = await self._get_cached_app(query, files, refresh=False, use_web_search=use_web_search)
+            if cached:
+                async for chunk in self._replay_cached_app(cached):
+                    yield chunk
+                return
+        
+        recorder = ReportRecorder()
+        async for chunk in self._create_app_flow(query, files, use_web_search):
+            recorder.record(chunk)
+            yield chunk
+        
+        if config.REPORT_CACHE and not files and any(e["type"] == "html_app" for e in recorder.events):
+            await self.report_cache.set(query, recorder.events, use_web_search)
+    
     async def _create_app_flow(self, query: str, files: Optional[List[UploadFile]], use_web_search: bool):
         """
         Create new app with multi-stage deep research
@@ -342,60 +446,129 @@ class DeepResearch:
         yield {"type": "reasoning", "text": "🔍 Starting deep research process..."}
         
         self.browser_pool = await get_browser_pool()
+        self.scrape_registry = ScrapeRegistry(self.browser_pool)
         self.query_tables = {}
         
-        # Phase 1: Generate Level 1 queries
-        yield {"type": "reasoning", "text": "📊 Analyzing research question and generating main branches..."}
-        level1_queries = await self._generate_level1_queries(query)
-        yield {"type": "reasoning", "text": f"✅ Generated {len(level1_queries)} research branches"}
+        try:
+            # Phase 1: Generate Level 1 queries
+            yield {"type": "reasoning", "text": "📊 Analyzing research question and generating main branches..."}
         
-        if use_web_search:
-            yield {"type": "reasoning", "text": "🔎 Beginning web searches for Level 1 queries..."}
+            if self.speculative_plan:
+                # Started while the request was being classified
+                planned = await self.speculative_plan
+                self.speculative_plan = None
+            else:
+                planned = await self._plan_research(query)
+        
+            plan = planned["plan"]
+            level1_queries = planned["level1_queries"]
+            planned_nodes = {}
+            search_infos = {}
+        
+            if plan:
+                yield {"type": "reasoning", "text": "♻️ Plan cache hit: reusing research plan"}
+                for branch in plan["branches"]:
+                    planned_nodes[branch["question"]] = branch
+                    for sub_query in branch["sub_queries"]:
+                        planned_nodes[sub_query["question"]] = sub_query
+            else:
+                yield {"type": "reasoning", "text": "🗺️ Plan cache miss: research branches generated"}
+        
+            yield {"type": "reasoning", "text": f"✅ Generated {len(level1_queries)} research branches"}
+        
+            if use_web_search:
+                yield {"type": "reasoning", "text": "🔎 Beginning web searches for Level 1 queries..."}
             
-            for i, q in enumerate(level1_queries, 1):
-                search_info = await self.conversation._generate_search_query(q)
-                if search_info["search_needed"] and search_info["query"]:
-                    yield {"type": "search_query", "text": search_info["query"]}
-                    
-                    search_results = await self.conversation.google_search(search_info["query"])
-                    yield {"type": "sources", "content": search_results}
+                for i, q in enumerate(level1_queries, 1):
+                    if self.depth.admit() is not None:
+                        yield {"type": "reasoning", "text": f"⏱️ Research budget reached, skipping Branch {i} search"}
+                        continue
+                
+                    search_info = await self._planned_search_info(planned_nodes, q)
+                    search_infos[q] = search_info
+                    if search_info["search_needed"] and search_info["query"]:
+                        yield {"type": "search_query", "text": search_info["query"]}
                     
-                    yield {"type": "reasoning", "text": f"📄 Extracting tables from Branch {i} sources..."}
+                        prefetched = self.prefetched_searches.pop(search_info["query"], None)
+                        if prefetched:
+                            search_results = await prefetched
+                        else:
+                            search_results = await self.conversation.google_search(search_info["query"])
+                        yield {"type": "sources", "content": search_results, "query": search_info["query"]}
                     
-                    urls = [result["url"] for result in search_results[:5]]
-                    if urls:
-                        tables = await self._extract_tables_from_urls(urls)
-                        if tables:
+                        # The app reads L2 tables; L1 pages are only scraped when
+                        # their tables are routed down to the branch's sub-queries
+                        tables = []
+                        if config.RESEARCH_L1_TABLES == "children":
+                            yield {"type": "reasoning", "text": f"📄 Extracting tables from Branch {i} sources..."}
+                        
+                            urls = [result["url"] for result in search_results[:config.RESEARCH_SCRAPE_TOP_RESULTS]]
+                            tables = await self._extract_tables_from_urls(urls) if urls else []
+                            # Keyed even when empty: the methodology counts scraped queries
                             self.query_tables[q] = tables
+                        self.depth.record(q, search_results, tables)
+                        if tables:
                             yield {"type": "tables", "content": tables}
                             yield {"type": "reasoning", "text": f"✅ Extracted {len(tables)} tables from Branch {i}"}
         
-        yield {"type": "reasoning", "text": "🌳 Expanding branches into detailed sub-queries..."}
+            yield {"type": "reasoning", "text": "🌳 Expanding branches into detailed sub-queries..."}
         
-        # Phase 2: Generate Level 2 queries
-        level2_queries = {}
-        for i, l1_query in enumerate(level1_queries, 1):
-            l2_queries = await self._generate_level2_queries(l1_query, query)
-            level2_queries[l1_query] = l2_queries
+            # Phase 2: Generate Level 2 queries
+            level2_queries = {}
+            skipped_queries = set()
+            for i, l1_query in enumerate(level1_queries, 1):
+                if l1_query in planned_nodes:
+                    l2_queries = [sub_query["question"] for sub_query in planned_nodes[l1_query]["sub_queries"]]
+                else:
+                    l2_queries = await self._generate_level2_queries(l1_query, query)
+                level2_queries[l1_query] = l2_queries
             
-            yield {"type": "reasoning", "text": f"✅ Branch {i} expanded into {len(l2_queries)} sub-queries"}
+                yield {"type": "reasoning", "text": f"✅ Branch {i} expanded into {len(l2_queries)} sub-queries"}
             
-            if use_web_search:
-                for j, q in enumerate(l2_queries, 1):
-                    search_info = await self.conversation._generate_search_query(q)
-                    if search_info["search_needed"] and search_info["query"]:
-                        yield {"type": "search_query", "text": search_info["query"]}
+                if use_web_search:
+                    for j, q in enumerate(l2_queries, 1):
+                        # Stop a branch once its searches stop adding new evidence
+                        reason = self.depth.admit(l1_query if j > 1 else None)
+                        if reason:
+                            skipped = l2_queries[j - 1:]
+                            skipped_queries.update(skipped)
+                            if reason == "saturated":
+                                yield {"type": "reasoning", "text": f"🧭 Branch {i} saturated: skipping {len(skipped)} sub-queries with no new evidence"}
+                            else:
+                                yield {"type": "reasoning", "text": f"⏱️ Research {reason} reached: {len(skipped)} sub-queries of Branch {i} not searched"}
+                            break
+                    
+                        search_info = await self._planned_search_info(planned_nodes, q)
+                        search_infos[q] = search_info
+                        if search_info["search_needed"] and search_info["query"]:
+                            yield {"type": "search_query", "text": search_info["query"]}
                         
-                        search_results = await self.conversation.google_search(search_info["query"])
-                        yield {"type": "sources", "content": search_results}
+                            search_results = await self.conversation.google_search(search_info["query"])
+                            yield {"type": "sources", "content": search_results, "query": search_info["query"]}
                         
-                        urls = [result["url"] for result in search_results[:5]]
-                        if urls:
-                            tables = await self._extract_tables_from_urls(urls)
+                            urls = [result["url"] for result in search_results[:config.RESEARCH_SCRAPE_TOP_RESULTS]]
+                            tables = await self._extract_tables_from_urls(urls) if urls else []
+                            self.depth.record(l1_query, search_results, tables)
+                            self.query_tables[q] = tables
                             if tables:
-                                self.query_tables[q] = tables
                                 yield {"type": "tables", "content": tables}
         
+        finally:
+            # Also on errors/cancellation: stop scrapes nobody will wait for
+            self.scrape_registry.close()
+            # Prefetched searches nobody used (e.g. app without web search)
+            self._cancel_speculation()
+        
+        if not plan:
+            await self.plan_cache.set(query, plan_from_queries(level1_queries, level2_queries, search_infos))
+        
+        # Sub-queries skipped (saturated branch or research budget) are left out
+        # of the app; the cached plan above keeps the full tree
+        level2_queries = {
+            l1_query: [q for q in queries if q not in skipped_queries]
+            for l1_query, queries in level2_queries.items()
+        }
+        
         total_queries = sum(len(queries) for queries in level2_queries.values())
         yield {"type": "reasoning", "text": f"✅ Data collection complete: {total_queries} queries executed"}
         
@@ -416,7 +589,9 @@ class DeepResearch:
             
             l2_queries = level2_queries.get(l1_query, [])
             for j, l2_query in enumerate(l2_queries, 1):
+                # Branch-level tables (RESEARCH_L1_TABLES=children) are shared by its sub-queries
                 tables = self.query_tables.get(l2_query, [])
+                tables = tables + [t for t in self.query_tables.get(l1_query, []) if t not in tables]
                 
                 sub_query_data = {
                     "question": l2_query,
@@ -445,7 +620,8 @@ class DeepResearch:
             query=query,
             level1_queries=level1_queries,
             level2_queries=level2_queries,
-            use_web_search=use_web_search
+            use_web_search=use_web_search,
+            search_infos=search_infos
         )
         
         yield {"type": "research_summary", "content": methodology_content}
@@ -480,10 +656,10 @@ class DeepResearch:
                 searched_queries.append(search_info["query"])
                 
                 search_results = await self.conversation.google_search(search_info["query"])
-                yield {"type": "sources", "content": search_results}
+                yield {"type": "sources", "content": search_results, "query": search_info["query"]}
                 
                 browser_pool = await get_browser_pool()
-                urls = [result["url"] for result in search_results[:5]]
+                urls = [result["url"] for result in search_results[:config.RESEARCH_SCRAPE_TOP_RESULTS]]
                 
                 if urls:
                     yield {"type": "reasoning", "text": "📊 Extracting tables..."}
@@ -537,16 +713,34 @@ class DeepResearch:
         
         current_date = datetime.now().strftime("%A, %B %d, %Y")
         
-        # Build research data context
+        # Tables become typed datasets embedded in the page (LAB_DATA_PAYLOAD);
+        # the prompt only carries their schema and a few sample rows
+        datasets = build_app_datasets(research_data, max_rows=config.LAB_DATA_MAX_ROWS) if config.LAB_DATA_PAYLOAD else []
+        if datasets:
+            html_prompt = self._html_prompt_with_datasets(research_data, datasets, current_date)
+            html_content = await self._stream_html(
+                html_prompt,
+                self.policy.select("html", prompt_tokens=estimate_tokens(html_prompt), table_count=len(datasets))
+            )
+            print(f"📦 Embedded {len(datasets)} datasets in the app")
+            return inject_payload(html_content, datasets)
+        
+        # Build research data context; the app's table budget is split across sub-queries
+        sub_query_count = sum(len(branch["sub_queries"]) for branch in research_data["branches"]) or 1
+        per_query_budget = config.EVIDENCE_APP_TOKEN_BUDGET // sub_query_count
+        
         content_by_branch = []
+        table_count = 0
         for i, branch in enumerate(research_data["branches"], 1):
             branch_info = f"Branch {i}: {branch['title']}\n"
             for j, sub_query in enumerate(branch["sub_queries"], 1):
                 branch_info += f"\n  Sub-query {i}.{j}: {sub_query['question']}\n"
                 
-                if sub_query["tables"]:
-                    branch_info += f"  Tables: {sub_query['tables_count']}\n"
-                    for idx, table in enumerate(sub_query["tables"][:10], 1):
+                tables = select_tables(sub_query["question"], sub_query["tables"], per_query_budget)
+                table_count += len(tables)
+                if tables:
+                    branch_info += f"  Tables: {len(tables)} of {sub_query['tables_count']}\n"
+                    for idx, table in enumerate(tables, 1):
                         branch_info += f"\n  Table {i}.{j}.{idx} from {table['url']}:\n"
                         branch_info += f"  {table['table']}\n"
             
@@ -575,12 +769,61 @@ class DeepResearch:
 
     Return only the HTML code."""
 
-        # ✅ Use STREAMING for Opus (required for long operations)
+        return await self._stream_html(
+            html_prompt,
+            self.policy.select("html", prompt_tokens=estimate_tokens(html_prompt), table_count=table_count)
+        )
+
+    def _html_prompt_with_datasets(self, research_data: Dict, datasets: List[Dict], current_date: str) -> str:
+        """App prompt that references the embedded datasets instead of pasting tables"""
+        
+        outline = ""
+        for i, branch in enumerate(research_data["branches"], 1):
+            outline += f"Branch {i}: {branch['title']}\n"
+            for j, sub_query in enumerate(branch["sub_queries"], 1):
+                outline += f"  Sub-query {i}.{j}: {sub_query['question']}\n"
+        
+        return f"""The current date is {current_date}.
+
+    Create an HTML website for: "{research_data["query"]}"
+
+    Research structure:
+    {outline}
+    Datasets (embedded in the page for you):
+    {describe_datasets(datasets)}
+
+    DATA RULES:
+    - The page will contain <script type="application/json" id="{PAYLOAD_ELEMENT_ID}"> holding
+      {{"datasets": [{{"id", "title", "columns": [{{"name", "type", "unit"}}], "data": {{column name: [values]}}, "rows", "sources"}}]}}
+    - Read it with JSON.parse(document.getElementById("{PAYLOAD_ELEMENT_ID}").textContent) and find datasets by id
+    - Build every table, chart (Chart.js) and figure from that payload in JS; never copy numbers from the samples above into the HTML or JS
+    - Numbers are plain values (units are in "unit"; magnitudes like "billion" are already applied); dates are YYYY-MM-DD strings; missing values are null
+    - Do not write the payload element yourself; it is inserted automatically
+    - Cite sources from each dataset's "sources"
+
+    IMPORTANT: 
+    - Do EXACTLY what the user asked for, nothing more
+    - If they asked for "blank with red bg", just give red background
+    - If they asked for research, present the data clearly
+    - Don't add unnecessary features unless requested
+    - Keep it focused on their actual request
+
+    Technical requirements:
+    - Self-contained HTML file (inline CSS/JS)
+    - Use CDN only if needed (Tailwind, Chart.js)
+    - Responsive design
+
+    Return only the HTML code."""
+
+    async def _stream_html(self, prompt: str, model: str) -> str:
+        """Stream an HTML generation and strip code fences"""
+        
+        # ✅ Use STREAMING (required for long operations)
         html_content = ""
         async with self.client.messages.stream(
-            model=self.html_model,
+            model=model,
             max_tokens=16000,
-            messages=[{"role": "user", "content": html_prompt}]
+            messages=[{"role": "user", "content": prompt}]
         ) as stream:
             async for chunk in stream:
                 if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
@@ -603,17 +846,139 @@ class DeepResearch:
     ) -> str:
         """
         Update EXISTING HTML app with modifications
-        Uses Opus for precise updates
+        Applies targeted edit operations when possible (APP_PATCH_UPDATES);
+        falls back to regenerating the whole document (model per the "update" stage)
         """
         
-        current_date = datetime.now().strftime("%A, %B %d, %Y")
+        # Apps with an embedded data payload are edited without it; new tables
+        # are appended as datasets and the payload is re-inserted afterwards
+        existing_html, datasets = extract_payload(existing_html)
         
         new_data_context = ""
-        if new_data and "tables" in new_data:
+        text_tables = False
+        if new_data and "tables" in new_data and datasets is not None:
+            new_datasets = build_app_datasets(
+                {"branches": [{"sub_queries": [{"question": modification_request, "tables": new_data["tables"]}]}]},
+                max_rows=config.LAB_DATA_MAX_ROWS,
+                first_id=len(datasets) + 1
+            )
+            datasets += new_datasets
+            if new_datasets:
+                new_data_context = "\n\nNew datasets, appended to the embedded payload:\n" + describe_datasets(new_datasets)
+        
+        if new_data and "tables" in new_data and not new_data_context:
+            # No payload, or none of the new tables parsed into datasets:
+            # pass them as text so the freshly scraped data isn't dropped
+            text_tables = True
             new_data_context = "\n\nNew data available:\n"
-            for idx, table in enumerate(new_data["tables"][:10], 1):
+            tables = select_tables(modification_request, new_data["tables"], config.EVIDENCE_UPDATE_TOKEN_BUDGET)
+            for idx, table in enumerate(tables, 1):
                 new_data_context += f"\nTable {idx} from {table['url']}:\n{table['table']}\n"
         
+        payload_note = ""
+        if datasets is not None:
+            payload_note = f"""
+    - The <script type="application/json" id="{PAYLOAD_ELEMENT_ID}"> element is shown empty; its datasets are re-inserted automatically.
+      Keep the element and keep reading data from it; never copy numbers into the HTML or JS"""
+            if text_tables:
+                payload_note += """
+    - The "New data available" tables could not be added to the payload; use them directly in the HTML/JS where needed"""
+        
+        html_content = None
+        if config.APP_PATCH_UPDATES:
+            operations = await self._plan_html_patch(existing_html, modification_request, new_data_context, payload_note)
+            if operations is not None:
+                try:
+                    html_content = apply_html_patch(existing_html, operations)
+                    print(f"🩹 Patched app with {len(operations)} operation(s)")
+                except HtmlPatchError as e:
+                    print(f"⚠️ HTML patch failed: {e}, falling back to full regeneration")
+        
+        if html_content is None:
+            html_content = await self._rewrite_html_app(existing_html, modification_request, new_data_context, payload_note)
+        
+        if datasets is not None:
+            html_content = inject_payload(html_content, datasets)
+        
+        return html_content
+
+    async def _plan_html_patch(
+        self,
+        existing_html: str,
+        modification_request: str,
+        new_data_context: str,
+        payload_note: str
+    ) -> Optional[List[Dict]]:
+        """
+        Ask for the update as edit operations (see html_patch)
+        Returns the operations, or None if the app must be regenerated
+        """
+        
+        current_date = datetime.now().strftime("%A, %B %d, %Y")
+        
+        prompt = f"""The current date is {current_date}.
+
+    User's update request: "{modification_request}"
+    {new_data_context}
+
+    Current HTML:
+    ```html
+    {existing_html}
+    ```
+
+    Express the update as the SMALLEST list of edit operations on this document:
+    - {{"op": "replace_text", "find": "<exact unique source text>", "replace": "..."}} for CSS rules, script code or any exact text
+    - {{"op": "replace" | "set_inner", "selector": "<css>", "html": "..."}}
+    - {{"op": "insert", "selector": "<css>", "position": "before|after|prepend|append", "html": "..."}}
+    - {{"op": "remove", "selector": "<css>"}}
+    - {{"op": "set_attribute", "selector": "<css>", "name": "...", "value": "..."}} / {{"op": "remove_attribute", "selector": "<css>", "name": "..."}}
+    - {{"op": "set_text", "selector": "<css>", "text": "..."}}
+
+    Rules:
+    - "find" must appear EXACTLY ONCE in the current HTML; selectors must match the intended elements only
+    - Make ONLY the changes the user specifically requested; keep everything else as is{payload_note}
+    - Use "rewrite" mode ONLY if the request changes most of the page (full redesign, different app)
+
+    Return ONLY valid JSON:
+    {{"mode": "patch|rewrite", "operations": [...]}}"""
+
+        try:
+            response = await self.client.messages.create(
+                model=self.policy.select("update", prompt_tokens=estimate_tokens(prompt)),
+                max_tokens=4000,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            
+            response_text = response.content[0].text.strip()
+            
+            if "```json" in response_text:
+                response_text = response_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in response_text:
+                response_text = response_text.split("```")[1].split("```")[0].strip()
+            
+            result = json.loads(response_text)
+            
+            if result.get("mode") != "patch":
+                print(f"🩹 Patch planner chose full regeneration")
+                return None
+            
+            return validate_operations(result.get("operations"))
+        
+        except Exception as e:
+            print(f"⚠️ Patch planner error: {e}, falling back to full regeneration")
+            return None
+
+    async def _rewrite_html_app(
+        self,
+        existing_html: str,
+        modification_request: str,
+        new_data_context: str,
+        payload_note: str
+    ) -> str:
+        """Regenerate the whole app with the requested changes"""
+        
+        current_date = datetime.now().strftime("%A, %B %d, %Y")
+        
         update_prompt = f"""The current date is {current_date}.
 
     User's update request: "{modification_request}"
@@ -630,154 +995,43 @@ class DeepResearch:
     - If they said "add data about X", ONLY add that data
     - Don't redesign or modify things they didn't mention
     - Keep all existing functionality unless asked to change it
-    - Preserve the structure and style unless specifically requested to change
+    - Preserve the structure and style unless specifically requested to change{payload_note}
 
     Return only the complete updated HTML code."""
 
-        # ✅ Use STREAMING for Opus
-        html_content = ""
-        async with self.client.messages.stream(
-            model=self.html_model,
-            max_tokens=16000,
-            messages=[{"role": "user", "content": update_prompt}]
-        ) as stream:
-            async for chunk in stream:
-                if hasattr(chunk, 'type') and chunk.type == 'content_block_delta':
-                    if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'text'):
-                        html_content += chunk.delta.text
-        
-        # Extract HTML if wrapped in code blocks
-        if "```html" in html_content:
-            html_content = html_content.split("```html")[1].split("```")[0].strip()
-        elif "```" in html_content:
-            html_content = html_content.split("```")[1].split("```")[0].strip()
-        
-        return html_content
+        return await self._stream_html(
+            update_prompt,
+            self.policy.select("update", prompt_tokens=estimate_tokens(update_prompt))
+        )
 
     async def _generate_methodology(
         self,
         query: str,
         level1_queries: List[str],
         level2_queries: Dict[str, List[str]],
-        use_web_search: bool
+        use_web_search: bool,
+        search_infos: Optional[Dict[str, Dict]] = None
     ) -> str:
         """
         Generate research methodology summary
         ALWAYS called for create_app flow
-        """
-        
-        from simple_search_claude_streaming_with_web_search import ClaudeConversation
-        methodology_conversation = ClaudeConversation()
-        
-        if use_web_search:
-            # Methodology for web search research
-            total_searches = sum(len(queries) for queries in level2_queries.values()) + len(level1_queries)
-            total_tables = sum(len(tables) for tables in self.query_tables.values())
-            
-            query_breakdown = ""
-            for i, l1_query in enumerate(level1_queries, 1):
-                query_breakdown += f"\n**Branch {i}:** {l1_query}\n"
-                l2_queries = level2_queries.get(l1_query, [])
-                for j, l2_query in enumerate(l2_queries, 1):
-                    tables_count = len(self.query_tables.get(l2_query, []))
-                    query_breakdown += f"  - Sub-query {i}.{j}: {l2_query} ({tables_count} tables)\n"
-            
-            methodology_prompt = f"""Research question: "{query}"
-
-Research structure:
-- Branches: {len(level1_queries)}
-- Total queries: {total_searches}
-- Tables analyzed: {total_tables}
 
-Query breakdown:
-{query_breakdown}
-
-Create a detailed research methodology summary with:
-
-1. **Methodology Overview Table**
-   - Research approach
-   - Data sources (web search)
-   - Queries executed
-   - Tables extracted
-
-2. **Research Process Breakdown Table**
-   - Each branch and sub-queries
-   - Sources consulted per query
-   - Data quality assessment
-
-3. **Data Collection Summary**
-   - Web scraping methodology
-   - Search strategy
-   - Table extraction process
-
-4. **Quality Assessment**
-   - Source reliability
-   - Data completeness
-   - Limitations encountered
-
-5. **Step-by-step Process**
-   - Query decomposition
-   - Systematic search execution
-   - Data extraction and organization
-
-6. **Transparency & Limitations**
-   - What worked well
-   - Data gaps identified
-   - Recommendations for follow-up
-
-Be detailed and academic."""
+        Rendered from the research data; RESEARCH_SUMMARY_LLM_POLISH adds a short wording pass
+        """
         
-        else:
-            # Methodology for LLM knowledge-based research
-            query_breakdown = ""
-            for i, l1_query in enumerate(level1_queries, 1):
-                query_breakdown += f"\n**Branch {i}:** {l1_query}\n"
-                l2_queries = level2_queries.get(l1_query, [])
-                for j, l2_query in enumerate(l2_queries, 1):
-                    query_breakdown += f"  - Sub-query {i}.{j}: {l2_query}\n"
-            
-            methodology_prompt = f"""Research question: "{query}"
-
-Research structure:
-- Branches: {len(level1_queries)}
-- Data source: LLM training knowledge (no web search)
-
-Query breakdown:
-{query_breakdown}
-
-Create a methodology summary explaining:
-
-1. **Methodology Overview Table**
-   - Research approach (multi-branch analysis)
-   - Data source (LLM training data, knowledge cutoff)
-   - Branches explored
-
-2. **Research Process**
-   - How the topic was broken down into branches
-   - Sub-queries developed for each branch
-   - Content generated from training knowledge
-
-3. **Knowledge Base & Limitations**
-   - Training data cutoff date
-   - Scope of available knowledge
-   - What types of information were included
-
-4. **Quality Considerations**
-   - Strengths of LLM knowledge approach
-   - Limitations (no real-time data, no specific sources)
-   - When web search would be beneficial
-
-5. **Transparency**
-   - This analysis is based on training data, not live sources
-   - No tables or current statistics included
-   - Conceptual and educational focus
-
-Be clear about the methodology used."""
+        methodology_content = render_methodology(
+            query=query,
+            level1_queries=level1_queries,
+            level2_queries=level2_queries,
+            query_tables=self.query_tables,
+            use_web_search=use_web_search,
+            search_infos=search_infos,
+            artifact="app",
+            pages_per_search=config.RESEARCH_SCRAPE_TOP_RESULTS
+        )
         
-        methodology_content = ""
-        async for chunk in methodology_conversation.send_message(methodology_prompt, simple_search=False):
-            if chunk["type"] == "content":
-                methodology_content += chunk["text"]
+        if config.RESEARCH_SUMMARY_LLM_POLISH:
+            methodology_content = await polish_summary(methodology_content, self.client, self.model)
         
         return methodology_content
     
@@ -793,98 +1047,81 @@ Be clear about the methodology used."""
         """
         Generate update summary explaining what was changed
         ALWAYS called for update_app flow
+
+        Rendered from the update data; RESEARCH_SUMMARY_LLM_POLISH adds a short wording pass
         """
         
-        from simple_search_claude_streaming_with_web_search import ClaudeConversation
-        summary_conversation = ClaudeConversation()
+        summary_content = render_update_summary(
+            modification_request=modification_request,
+            use_web_search=use_web_search,
+            searched_queries=searched_queries,
+            tables_added=tables_added,
+            size_before=len(existing_html),
+            size_after=len(updated_html),
+            artifact="app"
+        )
+        
+        if config.RESEARCH_SUMMARY_LLM_POLISH:
+            summary_content = await polish_summary(summary_content, self.client, self.model)
         
-        # Build context about changes
-        web_search_context = ""
-        if use_web_search and searched_queries:
-            web_search_context = f"""
-**Web Search Performed:**
-- Queries executed: {len(searched_queries)}
-- Tables added: {len(tables_added)}
-
-Search queries:
-{chr(10).join(f"- {q}" for q in searched_queries)}
+        return summary_content
+    
+    async def _plan_research(self, query: str) -> Dict:
+        """
+        Phase 1: L1 queries, or the whole cached L1/L2 tree for repeated research
 
-Tables added:
-{chr(10).join(f"- Table from {t['url']}" for t in tables_added[:5])}
-"""
+        Returns: {"plan", "level1_queries", "cache_hit"}
+        """
+        plan = await self.plan_cache.get(query)
+        if plan:
+            level1_queries = [branch["question"] for branch in plan["branches"]]
         else:
-            web_search_context = "**No web search performed** - Changes based on styling/UI modifications only"
+            level1_queries = await self._generate_level1_queries(query)
         
-        # Calculate size change
-        size_before = len(existing_html)
-        size_after = len(updated_html)
-        size_change = size_after - size_before
-        
-        summary_prompt = f"""An HTML app was just updated based on user request.
-
-**User's modification request:** "{modification_request}"
-
-{web_search_context}
-
-**Technical details:**
-- HTML size before: {size_before} characters
-- HTML size after: {size_after} characters
-- Size change: {'+' if size_change > 0 else ''}{size_change} characters
-
-Create a comprehensive update summary with:
-
-1. **Update Summary Table**
-   | Aspect | Details |
-   |--------|---------|
-   | Modification Type | [Styling/Data Addition/Layout/etc] |
-   | Web Search Used | {use_web_search} |
-   | New Data Added | {len(tables_added)} tables |
-   | Code Size Change | {size_change} chars |
-
-2. **What Was Changed**
-   - Detailed list of modifications made
-   - If styling: what visual changes
-   - If data: what information was added
-   - If layout: what structural changes
-
-3. **Data Added** (if applicable)
-   - List of new tables/information incorporated
-   - Sources of new data
-   - How it was integrated into the app
-
-4. **Technical Details**
-   - Code modifications made
-   - New libraries/components added (if any)
-   - DOM structure changes
-   - CSS/JavaScript updates
-
-5. **Impact Assessment**
-   - How this improves the app
-   - User experience enhancements
-   - Data completeness improvements
-
-6. **Quality & Verification**
-   - Were changes successfully applied
-   - Data accuracy considerations
-   - Potential follow-up improvements
-
-Be detailed about what changed and why."""
+        return {"plan": plan, "level1_queries": level1_queries, "cache_hit": plan is not None}
+    
+    def _start_speculation(self, query: str):
+        """
+        Start planning (and cached L1 searches) while the request is classified
 
-        summary_content = ""
-        async for chunk in summary_conversation.send_message(summary_prompt, simple_search=False):
-            if chunk["type"] == "content":
-                summary_content += chunk["text"]
+        Picked up by _create_app_flow; cancelled if the route is not a new app
+        """
+        if config.RESEARCH_SPECULATIVE_PLANNING:
+            self.speculative_plan = asyncio.create_task(self._speculate(query))
+    
+    async def _speculate(self, query: str) -> Dict:
+        planned = await self._plan_research(query)
         
-        return summary_content
+        for branch in (planned["plan"] or {}).get("branches", []):
+            search_info = branch.get("search")
+            if search_info and search_info["search_needed"] and search_info["query"] not in self.prefetched_searches:
+                self.prefetched_searches[search_info["query"]] = asyncio.create_task(
+                    self.conversation.google_search(search_info["query"])
+                )
+        
+        return planned
+    
+    def _cancel_speculation(self):
+        """Discard speculative work that was not consumed"""
+        if self.speculative_plan:
+            self.speculative_plan.cancel()
+            self.speculative_plan = None
+        for task in self.prefetched_searches.values():
+            task.cancel()
+        self.prefetched_searches = {}
+    
+    async def _planned_search_info(self, planned_nodes: Dict[str, Dict], q: str) -> Dict:
+        """Search info from the cached plan if it has one, otherwise ask the LLM"""
+        node = planned_nodes.get(q)
+        if node and node.get("search") is not None:
+            return node["search"]
+        return await self.conversation._generate_search_query(q)
     
     async def _extract_tables_from_urls(self, urls: List[str]) -> List[Dict[str, any]]:
-        """Extract tables from URLs using the scraper"""
+        """Extract tables from URLs using the run's shared scrape registry"""
         try:
-            scrape_results = await scrape_tables_parallel(
-                urls,
-                browser_pool=self.browser_pool,
-                timeout=60000
-            )
+            # Pages already scraped (or in flight) for another branch are reused
+            scrape_results = await self.scrape_registry.scrape(urls)
             
             all_tables = []
             for url, tables in scrape_results.items():
@@ -924,7 +1161,7 @@ Format your response ONLY as a JSON array of strings:
 ["question 1", "question 2"]"""
 
         response = await self.client.messages.create(
-            model=self.model,
+            model=self.policy.select("planning"),
             max_tokens=1000,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -967,7 +1204,7 @@ Format your response ONLY as a JSON array of strings:
 ["specific query 1", "specific query 2"]"""
 
         response = await self.client.messages.create(
-            model=self.model,
+            model=self.policy.select("planning"),
             max_tokens=500,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -0,0 +1,225 @@
+"""
+Process-wide Anthropic client registry
+
+Every ClaudeConversation used to build its own AsyncAnthropic, so each
+request paid for a fresh connection pool and TLS handshakes. Clients are
+now shared: one AsyncAnthropic per event loop (httpx async pools are bound
+to the loop that created them) and one sync client per process for Celery
+workers, both with tuned keep-alive pools.
+
+Async calls also go through a global semaphore (LLM_MAX_IN_FLIGHT) so a
+burst of research branches can't open an unbounded number of streams.
+llm_pool_stats() reports in-flight, queued and total calls for /health.
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+import anthropic
+import httpx
+
+from config import config
+
+# Shared across loops (plain ints/floats, only touched from loop threads)
+_stats: Dict[str, Any] = {
+    "clients_created": 0,
+    "calls": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "waiting": 0,
+    "wait_seconds": 0.0,
+}
+
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, GovernedAsyncAnthropic]" = weakref.WeakKeyDictionary()
+_sync_client: Optional[anthropic.Anthropic] = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+class _Slot:
+    """One in-flight LLM call under the global semaphore"""
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self.held = False
+
+    async def acquire(self):
+        started = time.perf_counter()
+        _stats["waiting"] += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            _stats["waiting"] -= 1
+        self.held = True
+        _stats["wait_seconds"] += time.perf_counter() - started
+        _stats["calls"] += 1
+        _stats["in_flight"] += 1
+        _stats["peak_in_flight"] = max(_stats["peak_in_flight"], _stats["in_flight"])
+
+    def release(self):
+        if self.held:
+            self.held = False
+            _stats["in_flight"] -= 1
+            self.semaphore.release()
+
+
+class _GovernedStreamManager:
+    """messages.stream(...) context manager that holds a slot while open"""
+
+    def __init__(self, manager, semaphore: asyncio.Semaphore):
+        self._manager = manager
+        self._slot = _Slot(semaphore)
+
+    async def __aenter__(self):
+        await self._slot.acquire()
+        try:
+            return await self._manager.__aenter__()
+        except BaseException:
+            self._slot.release()
+            raise
+
+    async def __aexit__(self, *exc_info):
+        try:
+            return await self._manager.__aexit__(*exc_info)
+        finally:
+            self._slot.release()
+
+
+def _release_abandoned(slot: _Slot):
+    if slot.held:
+        print("⚠️ LLM stream dropped without being consumed or closed, releasing its slot")
+        slot.release()
+
+
+class _GovernedStream:
+    """
+    messages.create(stream=True) result that holds a slot until consumed or closed
+
+    Usable as an async context manager. A stream that is dropped without
+    either (e.g. an exception before iteration) releases its slot when it is
+    garbage collected, so abandoned streams can't exhaust LLM_MAX_IN_FLIGHT.
+    """
+
+    def __init__(self, stream, slot: _Slot):
+        self._stream = stream
+        self._slot = slot
+        weakref.finalize(self, _release_abandoned, slot)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def __aiter__(self):
+        try:
+            async for event in self._stream:
+                yield event
+        finally:
+            self._slot.release()
+
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._slot.release()
+
+
+class _GovernedMessages:
+    def __init__(self, messages, semaphore: asyncio.Semaphore):
+        self._messages = messages
+        self._semaphore = semaphore
+
+    def __getattr__(self, name):
+        return getattr(self._messages, name)
+
+    async def create(self, **kwargs):
+        slot = _Slot(self._semaphore)
+        await slot.acquire()
+        try:
+            response = await self._messages.create(**kwargs)
+        except BaseException:
+            slot.release()
+            raise
+        if kwargs.get("stream"):
+            return _GovernedStream(response, slot)
+        slot.release()
+        return response
+
+    def stream(self, **kwargs):
+        return _GovernedStreamManager(self._messages.stream(**kwargs), self._semaphore)
+
+
+class GovernedAsyncAnthropic:
+    """
+    Shared AsyncAnthropic whose messages.create/stream calls share the
+    global in-flight limit; everything else passes through
+    """
+
+    def __init__(self, client: anthropic.AsyncAnthropic, semaphore: asyncio.Semaphore):
+        self._client = client
+        self.messages = _GovernedMessages(client.messages, semaphore)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def get_anthropic_client() -> GovernedAsyncAnthropic:
+    """The shared async client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = GovernedAsyncAnthropic(
+            anthropic.AsyncAnthropic(
+                api_key=os.getenv("ANTHROPIC_API_KEY", ""),
+                max_retries=config.LLM_MAX_RETRIES,
+                http_client=anthropic.DefaultAsyncHttpxClient(limits=_limits()),
+            ),
+            asyncio.Semaphore(config.LLM_MAX_IN_FLIGHT),
+        )
+        _async_clients[loop] = client
+        _stats["clients_created"] += 1
+    return client
+
+
+def get_sync_anthropic_client() -> anthropic.Anthropic:
+    """The shared sync client (Celery workers)"""
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = anthropic.Anthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            max_retries=config.LLM_MAX_RETRIES,
+            http_client=anthropic.DefaultHttpxClient(limits=_limits()),
+        )
+        _stats["clients_created"] += 1
+    return _sync_client
+
+
+def llm_pool_stats() -> Dict[str, Any]:
+    """In-flight/queued/total LLM calls and pool settings"""
+    return {
+        **_stats,
+        "wait_seconds": round(_stats["wait_seconds"], 3),
+        "max_in_flight": config.LLM_MAX_IN_FLIGHT,
+        "max_connections": config.LLM_MAX_CONNECTIONS,
+        "event_loops": len(_async_clients),
+    }
+
+
+async def close_anthropic_clients():
+    """Close the current loop's async client (app shutdown)"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
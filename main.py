@@ -32,6 +32,10 @@ async def lifespan(app: FastAPI):
     
     # logger.info("🛑 Shutting down...")
     await conversation_manager.disconnect_redis()
+    from search_client import get_search_client
+    from llm_clients import close_anthropic_clients
+    await get_search_client().close()
+    await close_anthropic_clients()
     # logger.info("✅ Shutdown complete")
 
 # Initialize FastAPI app
@@ -896,6 +900,11 @@ async def send_chat_message_stream(
     conversation_id: Optional[str] = Form(None),
     deep_search: Optional[bool] = Form(False),
     lab_mode: Optional[bool] = Form(False),
+    refresh: Optional[bool] = Form(False),
+    thinking_budget: Optional[int] = Form(None, ge=0),
+    max_queries: Optional[int] = Form(None, ge=0),
+    max_seconds: Optional[float] = Form(None, ge=0),
+    research_job_id: Optional[str] = Form(None),
     files: List[UploadFile] = File(default=[]),
     db: Session = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user)
@@ -904,7 +913,12 @@ async def send_chat_message_stream(
         content=content,
         conversation_id=conversation_id,
         deep_search=deep_search,
-        lab_mode=lab_mode
+        lab_mode=lab_mode,
+        refresh=refresh,
+        thinking_budget=thinking_budget,
+        max_queries=max_queries,
+        max_seconds=max_seconds,
+        research_job_id=research_job_id
     )
     
     client_ip = get_client_ip(request)
@@ -1265,6 +1279,8 @@ async def stream_response_direct(
         if is_deep_search or is_lab_mode:
             from simple_search_claude_streaming_with_web_search import ClaudeConversation
             claudeClient = ClaudeConversation(messages=messages_list)
+            # Used when the research flow just answers in conversation
+            claudeClient.thinking_budget_override = message.thinking_budget
             
             assistant_msgs =  [m for m in messages_list if m["role"] == "assistant"]
             
@@ -1275,11 +1291,31 @@ async def stream_response_direct(
             
             deep_research = None
             
+            # Input to the per-stage model policy (MODEL_POLICY)
+            if conv.is_anonymous:
+                user_tier = "anonymous"
+            elif conv.user is not None and conv.user.is_premium:
+                user_tier = "premium"
+            else:
+                user_tier = "user"
+            
         if is_deep_search:
                 from deep_search_with_claude import MarkdownResearch
-                deep_research = MarkdownResearch(claudeClient)
+                from research_jobs import research_job_id, claim_research_job
+                deep_research = MarkdownResearch(claudeClient, user_tier=user_tier)
+                
+                # The client re-POSTs the announced job ID after a dropped
+                # connection; without one, re-sending the same message (messages
+                # are saved only after a response completes) maps to the same job
+                job_id = message.research_job_id
+                if not (job_id and await claim_research_job(job_id, conversation_id)):
+                    if job_id:
+                        print(f"⚠️ Research job {job_id} not resumable here, starting a new job")
+                    job_id = research_job_id(conversation_id, len(db_messages), user_prompt)
+                    await claim_research_job(job_id, conversation_id)
+                yield json.dumps({"type": "research_job", "job_id": job_id}) + "\n"
               
-                async for chunk in deep_research.research(user_prompt,files=uploaded_files,existing_markdown=app_prev):
+                async for chunk in deep_research.research(user_prompt,files=uploaded_files,existing_markdown=app_prev,job_id=job_id,refresh=message.refresh,max_queries=message.max_queries,max_seconds=message.max_seconds):
                     if chunk["type"] == "thinking":
                         print(f"\n🧠 [THINKING]\n{chunk['text']}", end="", flush=True)
                     elif chunk["type"] == "content":
@@ -1297,11 +1333,20 @@ async def stream_response_direct(
                             "category": "Reasoning",
                             "timestamp": datetime.now(timezone.utc).isoformat()
                         }
+                        if chunk.get("cached"):
+                            # Replayed research: the client offers a refresh
+                            step["cached"] = True
                         yield json.dumps(step) + "\n" 
                         reasoning_steps.append(step)
-                    elif chunk["type"] == "search_query":
-                        query = chunk['text']
-                        data = await claudeClient.google_search(query)
+                    elif chunk["type"] in ("search_query", "sources"):
+                        # The research already searched: results ride on its sources event
+                        # (replayed reports carry them on search_query instead)
+                        if chunk["type"] == "sources":
+                            query, data = chunk.get("query", ""), chunk["content"]
+                        elif "results" in chunk:
+                            query, data = chunk["text"], chunk["results"]
+                        else:
+                            continue
 
                         urls = [item["url"] for item in data]
                             
@@ -1318,6 +1363,9 @@ async def stream_response_direct(
                         yield json.dumps(step) + "\n" 
                         reasoning_steps.append(step)
                         finalSources.append(urls)
+                    elif chunk["type"] in ("report_start", "report_section_start", "report_section_delta", "report_section_end"):
+                        # Progressive report: forward as-is, the assembled markdown_report is persisted below
+                        yield json.dumps(chunk) + "\n"
                     elif chunk["type"] == "markdown_report":
                         app = chunk["content"]
                         print(app)
@@ -1338,9 +1386,9 @@ async def stream_response_direct(
                     
         elif is_lab_mode:
             from lab_with_claude import DeepResearch
-            deep_research = DeepResearch(claudeClient)
+            deep_research = DeepResearch(claudeClient, user_tier=user_tier)
 
-            async for chunk in deep_research.research(user_prompt,files=uploaded_files,existing_html=app_prev):
+            async for chunk in deep_research.research(user_prompt,files=uploaded_files,existing_html=app_prev,refresh=message.refresh,max_queries=message.max_queries,max_seconds=message.max_seconds):
                 if chunk["type"] == "thinking":
                     print(f"\n🧠 [THINKING]\n{chunk['text']}", end="", flush=True)
                 elif chunk["type"] == "content":
@@ -1358,11 +1406,20 @@ async def stream_response_direct(
                         "category": "Reasoning",
                         "timestamp": datetime.now(timezone.utc).isoformat()
                     }
+                    if chunk.get("cached"):
+                        # Replayed research: the client offers a refresh
+                        step["cached"] = True
                     yield json.dumps(step) + "\n" 
                     reasoning_steps.append(step)
-                elif chunk["type"] == "search_query":
-                    query = chunk['text']
-                    data = await claudeClient.google_search(query)
+                elif chunk["type"] in ("search_query", "sources"):
+                    # The research already searched: results ride on its sources event
+                    # (replayed apps carry them on search_query instead)
+                    if chunk["type"] == "sources":
+                        query, data = chunk.get("query", ""), chunk["content"]
+                    elif "results" in chunk:
+                        query, data = chunk["text"], chunk["results"]
+                    else:
+                        continue
 
                     urls = [item["url"] for item in data]
                         
@@ -1402,7 +1459,7 @@ async def stream_response_direct(
             from simple_search_claude_streaming_with_web_search import ClaudeConversation
             claudeClient = ClaudeConversation(messages=messages_list)
             
-            async for chunk in claudeClient.send_message(user_prompt,files=uploaded_files):
+            async for chunk in claudeClient.send_message(user_prompt,files=uploaded_files,thinking_budget=message.thinking_budget):
                 if chunk["type"] == "thinking":
                     print(f"\n🧠 [THINKING]\n{chunk['text']}", end="", flush=True)
                 elif chunk["type"] == "content":
@@ -1411,6 +1468,7 @@ async def stream_response_direct(
                     yield json.dumps(chunk) + "\n"
                 elif chunk["type"] == "search_query":
                     query = chunk['text']
+                    # Started by send_message; memoized per request
                     data = await claudeClient.google_search(query)
                     urls = [item["url"] for item in data]
 
@@ -2275,6 +2333,7 @@ async def delete_conversation(
 
 @app.get("/health")
 async def health_check():
+    from llm_clients import llm_pool_stats
     return {
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -2284,7 +2343,8 @@ async def health_check():
             "streaming": True,
             "anonymous_mode": True,
             "web_search": bool(SERPAPI_KEY)
-        }
+        },
+        "llm_pool": llm_pool_stats()
     }
 
 @app.get("/messages/{message_id}/export/{format}")
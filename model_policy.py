@@ -0,0 +1,123 @@
+"""
+Per-stage model tiering for the research pipelines
+
+A policy maps each pipeline stage (planning, routing, section, synthesis,
+update, html...) to a model, optionally through rules on the call's inputs:
+prompt size, number of tables, and user tier. Rules are checked in order and
+the first match wins; otherwise the stage default is used.
+
+Select the policy with MODEL_POLICY and override single stages with
+MODEL_POLICY_OVERRIDES, e.g. '{"section": "claude-sonnet-4-20250514"}'.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from config import config
+
+OPUS = "claude-opus-4-20250514"
+SONNET = "claude-sonnet-4-20250514"
+HAIKU = "claude-3-5-haiku-20241022"
+
+STAGES = ("planning", "routing", "section", "branch_synthesis", "synthesis", "update", "html")
+
+# Stage spec: a model name, or {"rules": [{"when": {...}, "model": ...}], "default": model}
+# Rule conditions: min_prompt_tokens, max_prompt_tokens, min_tables, max_tables, tiers
+StageSpec = Union[str, Dict[str, Any]]
+
+POLICIES: Dict[str, Dict[str, StageSpec]] = {
+    # Opus for everything user-facing (previous hardcoded behaviour)
+    "quality": {
+        "planning": SONNET,
+        "routing": SONNET,
+        "section": OPUS,
+        "branch_synthesis": SONNET,
+        "synthesis": OPUS,
+        "update": OPUS,
+        "html": OPUS,
+    },
+    # Sonnet for ordinary sections; Opus only for data-heavy or large
+    # sections, premium users, the final synthesis and the HTML app
+    "balanced": {
+        "planning": SONNET,
+        "routing": SONNET,
+        "section": {
+            "rules": [
+                {"when": {"tiers": ["premium"]}, "model": OPUS},
+                {"when": {"min_tables": 4}, "model": OPUS},
+                {"when": {"min_prompt_tokens": 5000}, "model": OPUS},
+            ],
+            "default": SONNET,
+        },
+        "branch_synthesis": SONNET,
+        "synthesis": OPUS,
+        "update": {
+            "rules": [{"when": {"min_prompt_tokens": 12000}, "model": OPUS}],
+            "default": SONNET,
+        },
+        "html": OPUS,
+    },
+    # Lowest latency: Haiku routes, Sonnet writes
+    "fast": {
+        "planning": SONNET,
+        "routing": HAIKU,
+        "section": SONNET,
+        "branch_synthesis": HAIKU,
+        "synthesis": SONNET,
+        "update": SONNET,
+        "html": SONNET,
+    },
+}
+
+
+def _matches(when: Dict[str, Any], prompt_tokens: int, table_count: int, user_tier: str) -> bool:
+    if "min_prompt_tokens" in when and prompt_tokens < when["min_prompt_tokens"]:
+        return False
+    if "max_prompt_tokens" in when and prompt_tokens > when["max_prompt_tokens"]:
+        return False
+    if "min_tables" in when and table_count < when["min_tables"]:
+        return False
+    if "max_tables" in when and table_count > when["max_tables"]:
+        return False
+    if "tiers" in when and user_tier not in when["tiers"]:
+        return False
+    return True
+
+
+class ModelPolicy:
+    """
+    Picks the model for each pipeline stage
+
+    Args:
+        name: Policy name in POLICIES (default MODEL_POLICY)
+        user_tier: "anonymous" | "user" | "premium"
+        overrides: {stage: StageSpec} replacing the policy's stage specs
+    """
+
+    def __init__(self, name: Optional[str] = None, user_tier: str = "user", overrides: Optional[Dict[str, StageSpec]] = None):
+        self.name = name or config.MODEL_POLICY
+        if self.name not in POLICIES:
+            print(f"⚠️ Unknown model policy '{self.name}', using 'quality'")
+            self.name = "quality"
+
+        if overrides is None:
+            try:
+                overrides = json.loads(config.MODEL_POLICY_OVERRIDES or "{}")
+            except json.JSONDecodeError as e:
+                print(f"⚠️ Invalid MODEL_POLICY_OVERRIDES: {e}")
+                overrides = {}
+
+        self.stages: Dict[str, StageSpec] = {**POLICIES[self.name], **overrides}
+        self.user_tier = user_tier
+
+    def select(self, stage: str, prompt_tokens: int = 0, table_count: int = 0) -> str:
+        """Model for one call of a stage"""
+        spec = self.stages.get(stage, SONNET)
+        if isinstance(spec, str):
+            return spec
+
+        rules: List[Dict[str, Any]] = spec.get("rules", [])
+        for rule in rules:
+            if _matches(rule.get("when", {}), prompt_tokens, table_count, self.user_tier):
+                return rule["model"]
+        return spec.get("default", SONNET)
@@ -271,6 +271,11 @@ class MessageSend(BaseModel):
     conversation_id: Optional[str] = None
     deep_search: Optional[bool] = False    
     lab_mode: Optional[bool] = False  # NEW
+    refresh: Optional[bool] = False  # Bypass the research report cache (re-run research)
+    thinking_budget: Optional[int] = None  # Override the adaptive thinking budget (0 = off)
+    max_queries: Optional[int] = None  # Research web-search query budget (0 = unlimited)
+    max_seconds: Optional[float] = None  # Research time budget (0 = unlimited)
+    research_job_id: Optional[str] = None  # Resume this deep-research job (from the research_job event)
 
 class ReactionCreate(BaseModel):
     reaction_type: str
@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio as aioredis
 from config import config
 import json
 from typing import Dict, Any
@@ -9,6 +10,9 @@ redis_client = redis.from_url(config.REDIS_URL, decode_responses=True)
 # Separate Redis client for pub/sub (needs dedicated connection)
 redis_pubsub_client = redis.from_url(config.REDIS_URL, decode_responses=True)
 
+# Async Redis client for caches used inside the event loop (research/search caches)
+async_redis_client = aioredis.from_url(config.REDIS_URL, decode_responses=True)
+
 def publish_progress(job_id: str, message_type: str, content: Any, **kwargs):
     """
     Publish progress update for a job
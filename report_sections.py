@@ -0,0 +1,142 @@
+"""
+Section-addressable markdown reports
+
+Splits a markdown report into top-level sections (# and ## headings) with
+stable IDs and content hashes, and splices regenerated sections back in.
+Splitting is lossless: join_sections(split_sections(md)) == md.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional
+
+PREAMBLE_ID = "preamble"
+
+_HEADING_PATTERN = re.compile(r"^(#{1,2})\s+(.+?)\s*#*\s*$")
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+
+
+def content_hash(content: str) -> str:
+    """Short content hash used to detect changed sections"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+
+
+def slugify(text: str) -> str:
+    """Heading text → section ID"""
+    slug = re.sub(r"[^\w\s-]", "", text.lower())
+    slug = re.sub(r"[\s_-]+", "-", slug).strip("-")
+    return slug[:80] or "section"
+
+
+def _make_section(section_id: str, heading: Optional[str], level: int, content: str) -> Dict:
+    return {
+        "id": section_id,
+        "heading": heading,
+        "level": level,
+        "content": content,
+        "hash": content_hash(content)
+    }
+
+
+def split_sections(markdown: str) -> List[Dict]:
+    """
+    Split markdown into sections at level 1/2 headings (outside code fences)
+
+    Returns: [{"id", "heading", "level", "content", "hash"}]
+    Text before the first heading becomes the "preamble" section.
+    IDs are heading slugs, suffixed -2, -3... for repeated headings.
+    """
+    sections = []
+    seen_ids: Dict[str, int] = {}
+
+    current_lines: List[str] = []
+    current_id, current_heading, current_level = PREAMBLE_ID, None, 0
+    in_fence = False
+
+    for line in markdown.splitlines(keepends=True):
+        if _FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+
+        match = None if in_fence else _HEADING_PATTERN.match(line.rstrip("\n"))
+        if match:
+            if current_lines:
+                sections.append(_make_section(current_id, current_heading, current_level, "".join(current_lines)))
+
+            current_heading = match.group(2)
+            current_level = len(match.group(1))
+            base_id = slugify(current_heading)
+            seen_ids[base_id] = seen_ids.get(base_id, 0) + 1
+            current_id = base_id if seen_ids[base_id] == 1 else f"{base_id}-{seen_ids[base_id]}"
+            current_lines = [line]
+        else:
+            current_lines.append(line)
+
+    if current_lines:
+        sections.append(_make_section(current_id, current_heading, current_level, "".join(current_lines)))
+
+    return sections
+
+
+def join_sections(sections: List[Dict]) -> str:
+    """Reassemble sections into a markdown document"""
+    return "".join(section["content"] for section in sections)
+
+
+def section_outline(sections: List[Dict], preview_chars: int = 200) -> str:
+    """Compact outline (id, heading, size, preview) for edit planning prompts"""
+    lines = []
+    for section in sections:
+        preview = " ".join(section["content"].split())[:preview_chars]
+        lines.append(
+            f"- id: {section['id']} | heading: {section['heading'] or '(preamble)'} | "
+            f"{len(section['content'])} chars | {preview}"
+        )
+    return "\n".join(lines)
+
+
+def _section_trailer(content: str) -> str:
+    """Keep the horizontal-rule separator the report puts after each section"""
+    return "\n\n---\n\n" if content.rstrip().endswith("---") else "\n\n"
+
+
+def replace_section_content(section: Dict, new_markdown: str) -> Dict:
+    """
+    Build the replacement for a section from regenerated markdown
+
+    Re-adds the original heading if the model dropped it and preserves the
+    section's trailing separator.
+    """
+    body = new_markdown.strip()
+    if section["heading"] and not _HEADING_PATTERN.match(body.split("\n", 1)[0]):
+        body = f"{'#' * section['level']} {section['heading']}\n\n{body}"
+
+    # Drop a trailing rule the model may have copied, then restore ours
+    body = re.sub(r"\n+-{3,}\s*$", "", body)
+    content = body + _section_trailer(section["content"])
+
+    match = _HEADING_PATTERN.match(content.split("\n", 1)[0])
+    heading = match.group(2) if match else section["heading"]
+    return {**section, "heading": heading, "content": content, "hash": content_hash(content)}
+
+
+def new_section(section_id: str, markdown: str) -> Dict:
+    """Build a section for newly inserted content"""
+    body = markdown.strip()
+    match = _HEADING_PATTERN.match(body.split("\n", 1)[0])
+    content = body + "\n\n---\n\n"
+    return _make_section(
+        section_id,
+        match.group(2) if match else None,
+        len(match.group(1)) if match else 2,
+        content
+    )
+
+
+def changed_section_ids(old_markdown: str, new_markdown: str) -> List[str]:
+    """IDs of sections in new_markdown that are new or whose content hash changed"""
+    old_hashes = {section["id"]: section["hash"] for section in split_sections(old_markdown)}
+    return [
+        section["id"]
+        for section in split_sections(new_markdown)
+        if old_hashes.get(section["id"]) != section["hash"]
+    ]
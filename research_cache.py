@@ -0,0 +1,202 @@
+"""
+Redis-backed caches for deep research
+
+Keys combine the normalized query text with a date bucket whose size
+depends on how time-sensitive the query is, so "stock price today" expires
+within the hour while "history of Rome" is reused for a week.
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from redis_client import async_redis_client
+
+# Freshness classes: (date bucket format, TTL in seconds)
+FRESHNESS_CLASSES: Dict[str, Dict[str, Any]] = {
+    "live": {"bucket": "%Y-%m-%dT%H", "ttl": 60 * 60},
+    "recent": {"bucket": "%Y-%m-%d", "ttl": 24 * 60 * 60},
+    "evergreen": {"bucket": "%G-W%V", "ttl": 7 * 24 * 60 * 60},
+}
+
+_LIVE_PATTERN = re.compile(
+    r"\b(today|tonight|now|right now|live|breaking|latest|current|currently|this (hour|morning|evening)|"
+    r"price|prices|stock|stocks|score|scores|weather|exchange rate)\b"
+)
+_RECENT_PATTERN = re.compile(
+    r"\b(news|recent|recently|this (week|month|year)|upcoming|trend|trends|forecast|"
+    r"release|released|launch|vs|versus|compare|comparison|best|top \d+)\b"
+)
+_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    text = query.lower()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def classify_freshness(query: str) -> str:
+    """Infer how time-sensitive a query is: live | recent | evergreen"""
+    text = normalize_query(query)
+
+    if _LIVE_PATTERN.search(text):
+        return "live"
+
+    current_year = datetime.now().year
+    years = [int(match.group(0)) for match in _YEAR_PATTERN.finditer(text)]
+    if _RECENT_PATTERN.search(text) or any(year >= current_year - 1 for year in years):
+        return "recent"
+
+    return "evergreen"
+
+
+def cache_key(namespace: str, query: str, freshness: Optional[str] = None, *parts: str) -> str:
+    """Build a cache key from namespace, extra parts, date bucket and query hash"""
+    freshness = freshness or classify_freshness(query)
+    bucket = datetime.now().strftime(FRESHNESS_CLASSES[freshness]["bucket"])
+    digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()[:32]
+    return ":".join([namespace, *parts, freshness, bucket, digest])
+
+
+def plan_from_queries(
+    level1_queries: List[str],
+    level2_queries: Dict[str, List[str]],
+    search_infos: Optional[Dict[str, Dict]] = None
+) -> Dict[str, List[Dict]]:
+    """Build a plan (research_planner shape) from per-branch generated queries"""
+    search_infos = search_infos or {}
+    return {
+        "branches": [
+            {
+                "question": l1_query,
+                "search": search_infos.get(l1_query),
+                "sub_queries": [
+                    {"question": l2_query, "search": search_infos.get(l2_query)}
+                    for l2_query in level2_queries.get(l1_query, [])
+                ]
+            }
+            for l1_query in level1_queries
+        ]
+    }
+
+
+class PlanCache:
+    """
+    Cache of research plans (L1/L2 tree + per-node search info)
+
+    Args:
+        mode: "markdown" or "lab"; trees differ per mode so they are cached apart
+    """
+
+    def __init__(self, mode: str, redis=None):
+        self.mode = mode
+        self.redis = redis or async_redis_client
+
+    def _key(self, query: str, freshness: Optional[str] = None) -> str:
+        return cache_key("research_plan", query, freshness, self.mode)
+
+    async def get(self, query: str) -> Optional[Dict[str, List[Dict]]]:
+        """Return the cached plan, or None on miss or Redis error"""
+        try:
+            cached = await self.redis.get(self._key(query))
+            if cached:
+                return json.loads(cached)
+        except Exception as e:
+            print(f"⚠️ Plan cache read error: {e}")
+        return None
+
+    async def set(self, query: str, plan: Dict[str, List[Dict]]):
+        """Store a plan with a TTL that matches the query's freshness class"""
+        freshness = classify_freshness(query)
+        try:
+            await self.redis.setex(
+                self._key(query, freshness),
+                FRESHNESS_CLASSES[freshness]["ttl"],
+                json.dumps(plan)
+            )
+        except Exception as e:
+            print(f"⚠️ Plan cache write error: {e}")
+
+
+# Events left out of cached reports: token deltas (report_section_end carries
+# each section's text) and raw tables/sources (results ride on search_query)
+_UNCACHED_EVENTS = {"report_section_delta", "tables", "sources"}
+
+
+class ReportRecorder:
+    """Collects the events of a report flow for ReportCache"""
+
+    def __init__(self):
+        self.events: List[Dict] = []
+        self._pending_searches: Dict[str, Dict] = {}
+
+    def record(self, event: Dict):
+        # Results are attached to the search_query they answer (sources events
+        # name their query) for replay without searching
+        if event["type"] == "sources":
+            pending = self._pending_searches.pop(event.get("query"), None)
+            if pending is not None:
+                pending["results"] = event["content"]
+        if event["type"] in _UNCACHED_EVENTS:
+            return
+
+        event = dict(event)
+        if event["type"] == "search_query":
+            self._pending_searches[event["text"]] = event
+        self.events.append(event)
+
+
+class ReportCache:
+    """
+    Cache of finished research reports/apps with the events that produced them
+
+    A hit replays the stored reasoning steps, search steps and report events
+    through the normal stream protocol instead of re-running the research.
+
+    Args:
+        mode: "markdown" or "html"; the artifact the cached events produce
+
+    Reports built with and without web search are cached apart, so a
+    no-search report is never replayed for a request that wanted search.
+    """
+
+    def __init__(self, mode: str, redis=None):
+        self.mode = mode
+        self.redis = redis or async_redis_client
+
+    def _key(self, query: str, use_web_search: bool, freshness: Optional[str] = None) -> str:
+        return cache_key("research_report", query, freshness, self.mode, "web" if use_web_search else "noweb")
+
+    async def get(self, query: str, use_web_search: bool = True) -> Optional[Dict[str, Any]]:
+        """Return {"events", "freshness", "created_at"}, or None on miss or Redis error"""
+        try:
+            cached = await self.redis.get(self._key(query, use_web_search))
+            if cached:
+                return json.loads(cached)
+        except Exception as e:
+            print(f"⚠️ Report cache read error: {e}")
+        return None
+
+    async def set(self, query: str, events: List[Dict], use_web_search: bool = True):
+        """Store a finished flow's events with a TTL that matches the query's freshness class"""
+        freshness = classify_freshness(query)
+        try:
+            await self.redis.setex(
+                self._key(query, use_web_search, freshness),
+                FRESHNESS_CLASSES[freshness]["ttl"],
+                json.dumps({"events": events, "freshness": freshness, "created_at": datetime.now().isoformat()})
+            )
+        except Exception as e:
+            print(f"⚠️ Report cache write error: {e}")
+
+
+def cached_report_notice(cached: Dict[str, Any]) -> str:
+    """Reasoning step shown when a cached report is replayed"""
+    age = datetime.now() - datetime.fromisoformat(cached["created_at"])
+    minutes = int(age.total_seconds() // 60)
+    age_text = f"{minutes} min" if minutes < 120 else f"{minutes // 60} h"
+    return f"♻️ Reusing research from {age_text} ago ({cached['freshness']} topic); use Refresh for new data"
@@ -0,0 +1,115 @@
+"""
+Adaptive research depth
+
+Tracks how much new evidence each search adds to its branch (new URLs, new
+table contents, new numeric facts) and stops expanding a branch once its
+searches keep returning what the branch has already seen. History is kept
+per branch, so concurrently running branches never affect each other's
+saturation. Also enforces an optional
+per-request budget of web-search queries and wall-clock seconds.
+"""
+
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional, Set
+
+from config import config
+
+_NUMBER_PATTERN = re.compile(r"(?<![\w.])\d[\d,]*(?:\.\d+)?%?")
+
+
+def _table_hash(table: str) -> str:
+    normalized = " ".join(table.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _numeric_facts(text: str) -> Set[str]:
+    """Numbers worth tracking (skips single digits like list markers)"""
+    facts = set()
+    for match in _NUMBER_PATTERN.findall(text):
+        value = match.replace(",", "")
+        if len(value.rstrip("%").replace(".", "")) > 1:
+            facts.add(value)
+    return facts
+
+
+class DepthController:
+    """
+    Evidence-saturation and budget controller for one research run
+
+    Args:
+        max_queries: Max web-search queries for the run (0 = unlimited)
+        max_seconds: Stop admitting new queries after this many seconds (0 = unlimited)
+        saturation_threshold: A branch is saturated once a search's novelty falls below this
+    """
+
+    def __init__(
+        self,
+        max_queries: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        saturation_threshold: Optional[float] = None
+    ):
+        self.max_queries = config.RESEARCH_MAX_QUERIES if max_queries is None else max_queries
+        self.max_seconds = config.RESEARCH_MAX_SECONDS if max_seconds is None else max_seconds
+        self.saturation_threshold = (
+            config.RESEARCH_SATURATION_THRESHOLD if saturation_threshold is None else saturation_threshold
+        )
+
+        self.started_at = time.monotonic()
+        self.queries = 0
+        # {branch: {"urls", "tables", "facts"}} evidence seen by the branch's searches
+        self.branch_seen: Dict[str, Dict[str, Set[str]]] = {}
+        self.branch_novelty: Dict[str, List[float]] = {}
+
+    def record(self, branch: str, search_results: List[Dict], tables: List[Dict]) -> float:
+        """
+        Record one search's evidence and return its novelty (0-1)
+
+        Novelty is the average share of items the branch hasn't seen yet
+        across URLs, tables and numeric facts (categories without items are
+        ignored).
+        """
+        urls = {result["url"] for result in search_results[:5]}
+        table_hashes = {_table_hash(t["table"]) for t in tables}
+        facts = set()
+        for t in tables:
+            facts |= _numeric_facts(t["table"])
+        for result in search_results[:5]:
+            facts |= _numeric_facts(result.get("snippet", ""))
+
+        seen = self.branch_seen.setdefault(branch, {"urls": set(), "tables": set(), "facts": set()})
+        ratios = [
+            len(items - seen[kind]) / len(items)
+            for kind, items in (("urls", urls), ("tables", table_hashes), ("facts", facts))
+            if items
+        ]
+        novelty = sum(ratios) / len(ratios) if ratios else 0.0
+
+        seen["urls"] |= urls
+        seen["tables"] |= table_hashes
+        seen["facts"] |= facts
+        self.branch_novelty.setdefault(branch, []).append(novelty)
+        return novelty
+
+    def saturated(self, branch: str) -> bool:
+        """True once the branch's latest search added too little new evidence"""
+        history = self.branch_novelty.get(branch)
+        return bool(history) and history[-1] < self.saturation_threshold
+
+    def admit(self, branch: Optional[str] = None) -> Optional[str]:
+        """
+        Ask to run one more web-search query
+
+        Returns None if admitted (and counts it against the budget), otherwise
+        the reason: "saturated", "query budget" or "time budget".
+        """
+        if self.max_seconds and time.monotonic() - self.started_at >= self.max_seconds:
+            return "time budget"
+        if self.max_queries and self.queries >= self.max_queries:
+            return "query budget"
+        if branch is not None and config.RESEARCH_ADAPTIVE_DEPTH and self.saturated(branch):
+            return "saturated"
+
+        self.queries += 1
+        return None
@@ -0,0 +1,176 @@
+"""
+Concurrent executor for the deep-research tree
+
+Runs independent research nodes (query expansion, search query generation,
+web search, table scraping) as asyncio tasks with a global concurrency cap
+and per-stage limits, while replaying their stream events in a stable,
+tree-ordered sequence.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from config import config
+
+# Default per-stage concurrency limits
+DEFAULT_STAGE_LIMITS: Dict[str, int] = {
+    "plan": config.RESEARCH_PLAN_CONCURRENCY,
+    "search_query": config.RESEARCH_SEARCH_QUERY_CONCURRENCY,
+    "search": config.RESEARCH_SEARCH_CONCURRENCY,
+    "scrape": config.RESEARCH_SCRAPE_CONCURRENCY,
+}
+
+_CLOSED = object()
+
+
+class EventSlot:
+    """
+    Ordered event buffer for one research node
+
+    Items are either events (dicts) or child slots. Readers drain a slot
+    depth-first, so a child's events are replayed at the position where the
+    child was opened, no matter when its producer actually ran.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    def emit(self, event: Dict[str, Any]):
+        """Append an event to this slot"""
+        if not self.closed:
+            self._queue.put_nowait(event)
+
+    def child(self) -> "EventSlot":
+        """Open a child slot at the current position"""
+        slot = EventSlot()
+        if self.closed:
+            slot.close()
+        else:
+            self._queue.put_nowait(slot)
+        return slot
+
+    def close(self):
+        """Mark the slot as finished (idempotent)"""
+        if not self.closed:
+            self.closed = True
+            self._queue.put_nowait(_CLOSED)
+
+    async def drain(self):
+        """Yield every event in this slot and its children, in order"""
+        while True:
+            item = await self._queue.get()
+            if item is _CLOSED:
+                return
+            if isinstance(item, EventSlot):
+                async for event in item.drain():
+                    yield event
+            else:
+                yield item
+
+
+class ResearchExecutor:
+    """
+    DAG executor for research branches with bounded concurrency
+
+    Usage:
+        executor = ResearchExecutor()
+        slot = executor.events.child()
+        executor.spawn(node(slot), slot)
+        executor.events.close()
+        async for event in executor.stream():
+            yield event
+
+    consumed_outputs declares which node outputs later stages actually read
+    (e.g. {"l2_tables"}); nodes check needs() and skip fetches nobody
+    consumes. None means every output is consumed.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        stage_limits: Optional[Dict[str, int]] = None,
+        consumed_outputs: Optional[Iterable[str]] = None
+    ):
+        self.max_concurrency = max_concurrency or config.RESEARCH_MAX_CONCURRENCY
+        self.stage_limits = {**DEFAULT_STAGE_LIMITS, **(stage_limits or {})}
+        self.consumed_outputs = set(consumed_outputs) if consumed_outputs is not None else None
+
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._stage_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._errors: List[BaseException] = []
+
+        self.events = EventSlot()
+
+    def needs(self, output: str) -> bool:
+        """True if a downstream stage consumes this output"""
+        return self.consumed_outputs is None or output in self.consumed_outputs
+
+    def _stage_semaphore(self, stage: str) -> asyncio.Semaphore:
+        if stage not in self._stage_semaphores:
+            limit = self.stage_limits.get(stage, self.max_concurrency)
+            self._stage_semaphores[stage] = asyncio.Semaphore(limit)
+        return self._stage_semaphores[stage]
+
+    async def run_stage(self, stage: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run one unit of work under its stage limit and the global limit"""
+        # Stage first, then global: a stage at its cap never pins global slots
+        async with self._stage_semaphore(stage):
+            async with self._global_semaphore:
+                return await fn(*args, **kwargs)
+
+    def spawn(self, coro: Awaitable[Any], slot: Optional[EventSlot] = None) -> asyncio.Task:
+        """
+        Schedule a node coroutine
+
+        The node's slot (if given) is always closed when the node finishes,
+        so readers never block on a failed branch.
+        """
+
+        async def runner():
+            try:
+                return await coro
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Research node error: {e}")
+                self._errors.append(e)
+            finally:
+                if slot is not None:
+                    slot.close()
+
+        task = asyncio.create_task(runner())
+        self._tasks.append(task)
+        return task
+
+    async def join(self):
+        """Wait for every spawned node, including nodes spawned by other nodes"""
+        done = 0
+        while done < len(self._tasks):
+            pending = self._tasks[done:]
+            done = len(self._tasks)
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if self._errors:
+            raise self._errors[0]
+
+    def cancel(self):
+        """Cancel any node still running"""
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
+
+    async def stream(self):
+        """
+        Yield all events in tree order, then wait for the remaining work
+
+        Pending nodes are cancelled if the consumer stops early
+        (e.g. client disconnect).
+        """
+        try:
+            async for event in self.events.drain():
+                yield event
+            await self.join()
+        finally:
+            self.cancel()
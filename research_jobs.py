@@ -0,0 +1,142 @@
+"""
+Checkpointed, resumable deep-research jobs
+
+Every finished unit of work (routing decision, research plan, each search
+node, each report section, methodology) is written to Redis under the
+research job ID. Re-running a job restores those checkpoints, replays
+their events to the client without repeating the work, and only runs what
+had not finished yet.
+
+The job ID is announced to the client (research_job event), which re-POSTs
+it as research_job_id to resume after a dropped connection. Each job is
+claimed by its conversation, so an ID only resumes within that conversation.
+"""
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, Optional
+
+from config import config
+from redis_client import async_redis_client
+
+JOB_PREFIX = "research_job"
+
+
+def research_job_id(conversation_id: str, message_index: int, query: str, mode: str = "markdown") -> str:
+    """
+    Deterministic job ID for one research request
+
+    The conversation's messages are only persisted once a response completes,
+    so re-sending the same message after a disconnect or restart maps to the
+    same job and resumes it.
+    """
+    raw = f"{mode}:{conversation_id}:{message_index}:{query.strip()}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+_JOB_ID_PATTERN = re.compile(r"[0-9a-f]{24}")
+
+
+async def claim_research_job(job_id: str, conversation_id: str, redis=None) -> bool:
+    """
+    Bind a job ID to its conversation on first use
+
+    Returns True if the job is new or already belongs to conversation_id,
+    False for malformed IDs and jobs claimed by another conversation.
+    Without Redis (errors) only well-formed IDs are checked.
+    """
+    if not _JOB_ID_PATTERN.fullmatch(job_id or ""):
+        return False
+
+    redis = redis or async_redis_client
+    key = f"{JOB_PREFIX}:{job_id}:owner"
+    try:
+        if await redis.set(key, conversation_id, nx=True, ex=config.RESEARCH_JOB_TTL):
+            return True
+        return await redis.get(key) == conversation_id
+    except Exception as e:
+        print(f"⚠️ Research job claim error: {e}")
+        return True
+
+
+class ResearchJob:
+    """
+    Checkpoint store for one research job
+
+    Checkpoints live in three Redis hashes (phases, nodes, sections) that are
+    loaded once and then written through on every save. Without a job_id the
+    job is in-memory only. Redis errors never fail the research; the job just
+    stops being resumable.
+
+    Args:
+        job_id: Research job ID (see research_job_id), or None to disable persistence
+        redis: Async Redis client (defaults to redis_client.async_redis_client)
+        ttl: Checkpoint lifetime in seconds
+    """
+
+    def __init__(self, job_id: Optional[str] = None, redis=None, ttl: Optional[int] = None):
+        self.job_id = job_id
+        self.redis = redis or async_redis_client
+        self.ttl = ttl or config.RESEARCH_JOB_TTL
+        self.persistent = job_id is not None and config.RESEARCH_JOB_CHECKPOINTS
+        self.phases: Dict[str, Any] = {}
+        self.nodes: Dict[str, Any] = {}
+        self.sections: Dict[str, Any] = {}
+
+    def _key(self, kind: str) -> str:
+        return f"{JOB_PREFIX}:{self.job_id}:{kind}"
+
+    async def load(self) -> bool:
+        """Load existing checkpoints; returns True if the job was started before"""
+        if not self.persistent:
+            return False
+
+        try:
+            for kind in ("phases", "nodes", "sections"):
+                stored = await self.redis.hgetall(self._key(kind))
+                setattr(self, kind, {field: json.loads(value) for field, value in stored.items()})
+        except Exception as e:
+            print(f"⚠️ Research job load error: {e}")
+            self.phases, self.nodes, self.sections = {}, {}, {}
+
+        return bool(self.phases or self.nodes or self.sections)
+
+    async def _write(self, kind: str, field: str, data: Any):
+        if not self.persistent:
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(self._key(kind), field, json.dumps(data))
+                pipe.expire(self._key(kind), self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Research job checkpoint error ({kind}/{field}): {e}")
+
+    def get(self, phase: str) -> Optional[Any]:
+        """Checkpointed output of a phase, or None"""
+        return self.phases.get(phase)
+
+    async def save(self, phase: str, data: Any):
+        """Checkpoint a finished phase"""
+        self.phases[phase] = data
+        await self._write("phases", phase, data)
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        """Checkpointed state of a research node, or None"""
+        return self.nodes.get(node_id)
+
+    async def save_node(self, node_id: str, data: Dict):
+        """Checkpoint a research node (may be called again as the node progresses)"""
+        self.nodes[node_id] = data
+        await self._write("nodes", node_id, data)
+
+    def get_section(self, index: int) -> Optional[Dict]:
+        """Checkpointed report section, or None"""
+        return self.sections.get(str(index))
+
+    async def save_section(self, index: int, data: Dict):
+        """Checkpoint a finished report section"""
+        self.sections[str(index)] = data
+        await self._write("sections", str(index), data)
@@ -0,0 +1,127 @@
+"""
+Single-call structured research planner
+
+Produces the whole L1/L2 research tree, including the search decision and
+search string for every node, in one LLM round trip. Callers fall back to
+the per-branch query generation path when this returns None.
+"""
+
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+MAX_BRANCHES = 2
+MAX_SUB_QUERIES = 2
+
+
+def _validate_node(node: Any) -> Dict[str, Any]:
+    """Validate one plan node and normalize it to the _generate_search_query shape"""
+    if not isinstance(node, dict):
+        raise ValueError(f"plan node must be an object, got {type(node).__name__}")
+
+    question = node.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise ValueError("plan node is missing a question")
+
+    search_needed = node.get("search_needed", False)
+    if not isinstance(search_needed, bool):
+        raise ValueError(f"search_needed must be a boolean for '{question}'")
+
+    search_query = node.get("search_query")
+    if search_query is not None and not isinstance(search_query, str):
+        raise ValueError(f"search_query must be a string or null for '{question}'")
+    if search_query is not None and (not search_query.strip() or search_query.strip().upper() == "NONE"):
+        search_query = None
+
+    return {
+        "question": question.strip(),
+        "search": {
+            "search_needed": search_needed and search_query is not None,
+            "query": search_query.strip() if search_query else None
+        }
+    }
+
+
+def validate_research_plan(data: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Validate a raw planner response
+
+    Returns: {"branches": [{"question", "search", "sub_queries": [{"question", "search"}]}]}
+    Raises: ValueError if the structure is not usable
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("branches"), list):
+        raise ValueError("plan must be an object with a 'branches' array")
+
+    branches = []
+    for raw_branch in data["branches"][:MAX_BRANCHES]:
+        branch = _validate_node(raw_branch)
+
+        raw_sub_queries = raw_branch.get("sub_queries")
+        if not isinstance(raw_sub_queries, list) or not raw_sub_queries:
+            raise ValueError(f"branch '{branch['question']}' has no sub_queries")
+
+        branch["sub_queries"] = [_validate_node(sub) for sub in raw_sub_queries[:MAX_SUB_QUERIES]]
+        branches.append(branch)
+
+    if not branches:
+        raise ValueError("plan has no branches")
+
+    return {"branches": branches}
+
+
+async def generate_research_plan(query: str, client, model: str) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Generate the full research tree in one call
+
+    Returns the validated plan, or None if the response cannot be parsed
+    """
+
+    current_date = datetime.now().strftime("%A, %B %d, %Y")
+
+    prompt = f"""The current date is {current_date}.
+
+Research question: "{query}"
+
+Plan the research as a two-level tree:
+
+1. Break the question into 1-{MAX_BRANCHES} distinct, broad sub-questions (branches)
+   - Each branch should explore a different angle or dimension
+   - Cover: definitions, current state, applications, challenges, future directions, comparisons, etc.
+
+2. Expand each branch into 1-{MAX_SUB_QUERIES} specific sub-queries
+   - Each sub-query should dig deeper into its branch
+   - Make sub-queries independently understandable (include context)
+
+3. For EVERY branch and sub-query decide if a web search is needed
+   - true: current information, statistics, prices, news, real numbers
+   - false: general knowledge, explanations, creative tasks
+   - If true, write a grammatically correct Google search query with NO assumed context
+   - Include the current year if time-sensitive
+   - If false, search_query is null
+
+Return ONLY valid JSON:
+{{"branches": [{{"question": "...", "search_needed": true, "search_query": "...", "sub_queries": [{{"question": "...", "search_needed": true, "search_query": "..."}}]}}]}}"""
+
+    try:
+        response = await client.messages.create(
+            model=model,
+            max_tokens=2000,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+        response_text = response.content[0].text.strip()
+
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0].strip()
+
+        plan = validate_research_plan(json.loads(response_text))
+
+        total = sum(len(branch["sub_queries"]) for branch in plan["branches"])
+        print(f"🗺️ Research plan: {len(plan['branches'])} branches, {total} sub-queries")
+        return plan
+
+    except Exception as e:
+        print(f"⚠️ Planner error: {e}, falling back to per-branch query generation")
+        return None
@@ -0,0 +1,239 @@
+"""
+Template-based research methodology and update summaries
+
+Renders the methodology / update summary shown after every research request
+straight from the data we already hold (query tree, search infos, scraped
+tables), instead of asking a thinking-enabled model to describe it. An
+optional short LLM pass (RESEARCH_SUMMARY_LLM_POLISH) can smooth the prose.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+
+def _domain(url: str) -> str:
+    host = urlsplit(url).hostname or url
+    return host[4:] if host.startswith("www.") else host
+
+
+def _cell(text: str) -> str:
+    """Make text safe for a markdown table cell"""
+    return " ".join(str(text).split()).replace("|", "\\|")
+
+
+def _table_sources(tables: List[Dict]) -> str:
+    domains = list(dict.fromkeys(_domain(t["url"]) for t in tables))
+    return ", ".join(domains) if domains else "—"
+
+
+def render_methodology(
+    query: str,
+    level1_queries: List[str],
+    level2_queries: Dict[str, List[str]],
+    query_tables: Dict[str, List[Dict]],
+    use_web_search: bool,
+    search_infos: Optional[Dict[str, Dict]] = None,
+    artifact: str = "report",
+    pages_per_search: int = 5
+) -> str:
+    """
+    Render the research methodology summary as markdown
+
+    Args:
+        query: Original research question
+        level1_queries: Research branches
+        level2_queries: {branch: [sub-queries]}
+        query_tables: {query: [{"url", "table"}]} for every query whose result pages were scraped
+        use_web_search: Whether the research used web search
+        search_infos: {query: {"search_needed", "query"}} as executed
+        artifact: "report" or "app", used in the wording
+        pages_per_search: Result pages loaded per scraped search
+    """
+    search_infos = search_infos or {}
+    current_date = datetime.now().strftime("%B %d, %Y")
+    sub_query_count = sum(len(queries) for queries in level2_queries.values())
+
+    lines = [
+        "# Research Methodology",
+        "",
+        f"**Research question:** {query}",
+        "",
+        "## Methodology Overview",
+        "",
+        "| Aspect | Details |",
+        "|--------|---------|",
+        "| Research approach | Multi-branch decomposition (branches → sub-queries) |",
+        f"| Branches | {len(level1_queries)} |",
+        f"| Sub-queries | {sub_query_count} |",
+    ]
+
+    if not use_web_search:
+        lines += [
+            "| Data source | Model training knowledge (no web search) |",
+            f"| Generated | {current_date} |",
+            "",
+            "## Research Process",
+            "",
+        ]
+        for i, l1_query in enumerate(level1_queries, 1):
+            lines.append(f"**Branch {i}:** {l1_query}")
+            for j, l2_query in enumerate(level2_queries.get(l1_query, []), 1):
+                lines.append(f"  - Sub-query {i}.{j}: {l2_query}")
+            lines.append("")
+
+        lines += [
+            "## Knowledge Base & Limitations",
+            "",
+            f"- Every section of this {artifact} was written from the model's training data; no live sources were consulted.",
+            "- Information after the model's knowledge cutoff, current prices and recent statistics are not included.",
+            "- No tables or citations were extracted, so figures should be verified before being relied on.",
+            "- Re-run the request with web search for time-sensitive or data-heavy questions.",
+        ]
+        return "\n".join(lines) + "\n"
+
+    all_queries = list(level1_queries) + [q for l1 in level1_queries for q in level2_queries.get(l1, [])]
+    searched = [q for q in all_queries if (search_infos.get(q) or {}).get("search_needed")]
+    all_tables = [t for tables in query_tables.values() for t in tables]
+    # Coverage only counts queries whose pages were scraped (branch searches
+    # are used for sources only unless RESEARCH_L1_TABLES=children)
+    scraped = [q for q in all_queries if q in query_tables]
+    with_tables = [q for q in scraped if query_tables[q]]
+    sources_only = [q for q in searched if q not in query_tables]
+
+    lines += [
+        "| Data sources | Google web search + table extraction from result pages |",
+        f"| Web searches executed | {len(searched)} |",
+        f"| Tables extracted | {len(all_tables)} from {len({_domain(t['url']) for t in all_tables})} sites |",
+        f"| Generated | {current_date} |",
+        "",
+        "## Research Process Breakdown",
+        "",
+        "| # | Query | Search query | Tables | Table sources |",
+        "|---|-------|--------------|--------|---------------|",
+    ]
+
+    for i, l1_query in enumerate(level1_queries, 1):
+        rows = [(f"{i}", l1_query)] + [
+            (f"{i}.{j}", l2_query) for j, l2_query in enumerate(level2_queries.get(l1_query, []), 1)
+        ]
+        for number, q in rows:
+            info = search_infos.get(q) or {}
+            search_query = info.get("query") if info.get("search_needed") else None
+            tables = query_tables.get(q, [])
+            lines.append(
+                f"| {number} | {_cell(q)} | {_cell(search_query) if search_query else '—'} | "
+                f"{len(tables) if q in query_tables else '—'} | {_cell(_table_sources(tables))} |"
+            )
+
+    gaps = [q for q in scraped if q not in with_tables]
+    lines += [
+        "",
+        "## Data Collection",
+        "",
+        "- Branches and sub-queries that needed current data were turned into standalone Google search queries.",
+        f"- For {len(scraped)} of these searches the top {pages_per_search} results were loaded in a headless browser "
+        "and their HTML tables converted to markdown.",
+    ]
+    if sources_only:
+        lines.append(f"- {len(sources_only)} searches were used for sources only; their pages were not scraped.")
+    lines += [
+        "- Pages shared between queries were scraped once and reused.",
+        f"- Tables were ranked by relevance to each sub-query and packed into the {artifact} within a fixed token budget.",
+        "",
+        "## Quality Assessment",
+        "",
+        f"- **Coverage:** {len(with_tables)} of {len(scraped)} scraped queries returned tabular data."
+        if scraped else "- **Coverage:** no result pages were scraped.",
+    ]
+    if gaps:
+        lines.append("- **Data gaps:** no tables were found for:")
+        lines += [f"  - {q}" for q in gaps]
+    lines += [
+        "- **Source reliability:** tables come from public web pages and were not independently verified.",
+        "",
+        "## Limitations",
+        "",
+        "- Only tabular data was extracted; narrative page content relied on the model's knowledge.",
+        "- Pages that block automated browsers or render tables late may be missing.",
+        "- Search results reflect the date of the research and may change.",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_update_summary(
+    modification_request: str,
+    use_web_search: bool,
+    searched_queries: List[str],
+    tables_added: List[Dict],
+    size_before: int,
+    size_after: int,
+    artifact: str = "report",
+    changed_sections: Optional[List[str]] = None
+) -> str:
+    """
+    Render the summary of an update to an existing report/app as markdown
+
+    Args:
+        modification_request: The user's update request
+        use_web_search: Whether new data was searched for
+        searched_queries: Search queries executed
+        tables_added: [{"url", "table"}] added to the prompt
+        size_before / size_after: Document size in characters
+        artifact: "report" or "app", used in the wording
+        changed_sections: IDs of sections that changed (markdown reports)
+    """
+    size_change = size_after - size_before
+
+    lines = [
+        "# Update Summary",
+        "",
+        f"**Request:** {modification_request}",
+        "",
+        "| Aspect | Details |",
+        "|--------|---------|",
+        f"| Web search used | {'Yes' if use_web_search and searched_queries else 'No'} |",
+        f"| New tables added | {len(tables_added)} |",
+        f"| Size change | {'+' if size_change > 0 else ''}{size_change} chars ({size_before} → {size_after}) |",
+    ]
+    if changed_sections is not None:
+        lines.append(f"| Sections changed | {len(changed_sections)} |")
+
+    if changed_sections:
+        lines += ["", "## What Was Changed", ""]
+        lines += [f"- `{section_id}`" for section_id in changed_sections]
+
+    if use_web_search and searched_queries:
+        lines += ["", "## Data Added", ""]
+        lines += [f"- Search: {q}" for q in searched_queries]
+        if tables_added:
+            lines.append(f"- Tables from: {_table_sources(tables_added)}")
+    else:
+        lines += ["", f"No web search was performed; the {artifact} was modified using its existing content."]
+
+    return "\n".join(lines) + "\n"
+
+
+async def polish_summary(markdown: str, client, model: str) -> str:
+    """
+    Optional short LLM pass to smooth the rendered summary's wording
+
+    Keeps tables and numbers intact; returns the input unchanged on error.
+    """
+    prompt = f"""Improve the wording of this research summary so it reads naturally.
+Keep every table, number, query and source exactly as written. Do not add new facts.
+Return only markdown.
+
+{markdown}"""
+
+    try:
+        response = await client.messages.create(
+            model=model,
+            max_tokens=2000,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        polished = response.content[0].text.strip()
+        return polished or markdown
+    except Exception as e:
+        print(f"⚠️ Summary polish error: {e}, using rendered summary")
+        return markdown
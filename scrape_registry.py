@@ -0,0 +1,170 @@
+"""
+Shared table-scrape registry for one research run
+
+Different branches of the research tree often get the same pages in their
+top search results. The registry keys scrapes by canonical URL so each page
+is loaded in Chromium at most once per run: concurrent requesters share the
+same in-flight future and later requesters reuse the parsed tables.
+Optionally, parsed tables are also cached in Redis across runs.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import config
+from redis_client import async_redis_client
+from tables_scraper import scrape_tables_parallel, BrowserPool
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src", "igshid"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication
+
+    Lowercases scheme and host, drops "www.", default ports, fragments,
+    tracking parameters and trailing slashes, and sorts the query string.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in _TRACKING_PARAMS
+    ))
+
+    # http and https variants are the same page for our purposes
+    return urlunsplit(("https" if scheme == "http" else scheme, host, path, query, ""))
+
+
+class ScrapeRegistry:
+    """
+    Per-run registry of table scrapes keyed by canonical URL
+
+    Args:
+        browser_pool: Browser pool used for page loads
+        timeout: Page load timeout in milliseconds
+        redis: Async Redis client for the cross-run cache (SCRAPE_CROSS_RUN_CACHE)
+    """
+
+    def __init__(self, browser_pool: Optional[BrowserPool] = None, timeout: int = 60000, redis=None):
+        self.browser_pool = browser_pool
+        self.timeout = timeout
+        self.redis = redis or async_redis_client
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._tasks = set()
+        self.requests = 0
+        self.page_loads = 0
+
+    def _cache_key(self, canonical: str) -> str:
+        return "scrape_tables:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+    async def _read_cache(self, canonicals: List[str]) -> Dict[str, List[str]]:
+        if not config.SCRAPE_CROSS_RUN_CACHE or not canonicals:
+            return {}
+        try:
+            cached = await self.redis.mget([self._cache_key(canonical) for canonical in canonicals])
+            return {
+                canonical: json.loads(value)
+                for canonical, value in zip(canonicals, cached)
+                if value is not None
+            }
+        except Exception as e:
+            print(f"⚠️ Scrape cache read error: {e}")
+            return {}
+
+    async def _write_cache(self, results: Dict[str, List[str]]):
+        if not config.SCRAPE_CROSS_RUN_CACHE or not results:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for canonical, tables in results.items():
+                    pipe.setex(self._cache_key(canonical), config.SCRAPE_CACHE_TTL, json.dumps(tables))
+                await pipe.execute()
+        except Exception as e:
+            print(f"⚠️ Scrape cache write error: {e}")
+
+    async def _load(self, urls_by_canonical: Dict[str, str]):
+        """Resolve the futures for canonical URLs this run has not seen yet"""
+        canonicals = list(urls_by_canonical)
+        try:
+            results = await self._read_cache(canonicals)
+            missing = [canonical for canonical in canonicals if canonical not in results]
+
+            if missing:
+                self.page_loads += len(missing)
+                scraped = await scrape_tables_parallel(
+                    [urls_by_canonical[canonical] for canonical in missing],
+                    browser_pool=self.browser_pool,
+                    timeout=self.timeout
+                )
+                fresh = {canonical: scraped.get(urls_by_canonical[canonical]) or [] for canonical in missing}
+                results.update(fresh)
+                # Only cache pages that produced tables; failures are retried next run
+                await self._write_cache({canonical: tables for canonical, tables in fresh.items() if tables})
+
+            for canonical in canonicals:
+                future = self._futures[canonical]
+                if not future.done():
+                    future.set_result(results.get(canonical, []))
+
+        except BaseException as e:
+            # Forget failed URLs so a later requester can retry them
+            for canonical in canonicals:
+                future = self._futures.pop(canonical, None)
+                if future and not future.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+    async def scrape(self, urls: List[str]) -> Dict[str, List[str]]:
+        """
+        Scrape tables from URLs, sharing page loads across the run
+
+        Returns: {url: [markdown tables]} keyed by the URLs as given
+        """
+        self.requests += len(urls)
+
+        canonical_by_url = {url: canonicalize_url(url) for url in urls}
+        new = {}
+        for url, canonical in canonical_by_url.items():
+            if canonical not in self._futures:
+                self._futures[canonical] = asyncio.get_running_loop().create_future()
+                new[canonical] = url
+
+        if new:
+            # Runs as its own task so a cancelled requester doesn't cancel a
+            # scrape other branches are waiting on
+            task = asyncio.create_task(self._load(new))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        futures = {url: self._futures[canonical] for url, canonical in canonical_by_url.items()}
+        results = {}
+        for url, future in futures.items():
+            results[url] = await asyncio.shield(future)
+        return results
+
+    def close(self):
+        """Cancel scrapes nobody is waiting for anymore and log dedup stats"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self.requests:
+            print(f"♻️ Scrape registry: {self.page_loads} page loads for {self.requests} URL requests")
@@ -0,0 +1,149 @@
+"""
+Shared search-result cache
+
+Sits in front of the SerpAPI client for every google_search caller. Lookups
+go through two tiers: an in-process LRU (sub-millisecond, per worker) and
+Redis (shared across workers and users). Keys combine the query (lowercased
+and whitespace-collapsed, punctuation kept), the result offset and a
+freshness date bucket, and TTLs follow the query's freshness class
+(research_cache.FRESHNESS_CLASSES), so "bitcoin price today" expires within
+the hour while "history of Rome" is kept for a week.
+
+Concurrent identical lookups share one in-flight request (singleflight), so
+parallel research branches asking the same question only cost one search.
+Failed and empty searches are not cached.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from redis_client import async_redis_client
+from research_cache import FRESHNESS_CLASSES, classify_freshness
+from search_client import SearchClient, get_search_client
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    Lowercase and collapse whitespace only
+
+    Unlike research_cache.normalize_query this keeps punctuation, which
+    changes results for search engines: "C++" vs "C#", quoted phrases,
+    -exclusions and operators such as site:.
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    Two-tier (LRU + Redis) cache of search results with request coalescing
+
+    Args:
+        client: Search client used on misses
+        redis: Async Redis client for the shared tier
+        max_entries: Size of the in-process LRU tier
+    """
+
+    def __init__(self, client: Optional[SearchClient] = None, redis=None, max_entries: Optional[int] = None):
+        self.client = client or get_search_client()
+        self.redis = redis or async_redis_client
+        self.max_entries = max_entries if max_entries is not None else config.SEARCH_CACHE_LRU_SIZE
+        self._memory: "OrderedDict[str, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"memory_hits": 0, "redis_hits": 0, "coalesced": 0, "misses": 0}
+
+    def _key(self, query: str, start: int, freshness: str) -> str:
+        bucket = datetime.now().strftime(FRESHNESS_CLASSES[freshness]["bucket"])
+        digest = hashlib.sha256(normalize_search_query(query).encode("utf-8")).hexdigest()[:32]
+        return ":".join(["search_results", f"start{start}", freshness, bucket, digest])
+
+    def _memory_get(self, key: str) -> Optional[List[Dict]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return results
+
+    def _memory_set(self, key: str, results: List[Dict], ttl: int):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (time.monotonic() + ttl, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def _fetch(self, query: str, start: int, key: str, ttl: int) -> List[Dict]:
+        """Redis, then the search API; fills both tiers"""
+        try:
+            cached = await self.redis.get(key)
+            if cached:
+                results = json.loads(cached)
+                self.stats["redis_hits"] += 1
+                self._memory_set(key, results, ttl)
+                return results
+        except Exception as e:
+            print(f"⚠️ Search cache read error: {e}")
+
+        self.stats["misses"] += 1
+        results = await self.client.search(query, start=start)
+        if results:
+            self._memory_set(key, results, ttl)
+            try:
+                await self.redis.setex(key, ttl, json.dumps(results))
+            except Exception as e:
+                print(f"⚠️ Search cache write error: {e}")
+        return results
+
+    async def search(self, query: str, start: int = 0) -> List[Dict]:
+        """
+        Cached search; same schema and errors as SearchClient.search
+
+        Returns fresh copies of the result dicts, so callers may modify them.
+        """
+        freshness = classify_freshness(query)
+        key = self._key(query, start, freshness)
+
+        results = self._memory_get(key)
+        if results is not None:
+            self.stats["memory_hits"] += 1
+            return [dict(result) for result in results]
+
+        future = self._inflight.get(key)
+        if future is not None and future.get_loop() is asyncio.get_running_loop():
+            self.stats["coalesced"] += 1
+        else:
+            # Runs as its own task so a cancelled requester doesn't cancel a
+            # search other requesters are waiting on
+            future = asyncio.ensure_future(self._fetch(query, start, key, FRESHNESS_CLASSES[freshness]["ttl"]))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._inflight.pop(key, None) if self._inflight.get(key) is done else None)
+
+        results = await asyncio.shield(future)
+        return [dict(result) for result in results]
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Process-wide search cache (shares the LRU tier and in-flight requests)"""
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = SearchCache()
+    return _search_cache
+
+
+async def cached_search(query: str, start: int = 0) -> List[Dict]:
+    """Search through the shared cache, or directly when SEARCH_CACHE is off"""
+    if not config.SEARCH_CACHE:
+        return await get_search_client().search(query, start=start)
+    return await get_search_cache().search(query, start=start)
@@ -0,0 +1,126 @@
+"""
+Async SerpAPI client
+
+The serpapi package is synchronous, so every search used to hold the event
+loop (or a worker thread) for its full round trip. This calls the SerpAPI
+JSON endpoint directly over a pooled httpx.AsyncClient, with a per-call
+timeout and bounded retries (exponential backoff with full jitter) on
+timeouts, connection errors, 429 and 5xx responses.
+
+Results keep the existing schema: [{"url", "snippet", "title"}].
+SERPAPI_KEY must be set; searches fail with SearchError without it.
+"""
+
+import asyncio
+import random
+from typing import Dict, List, Optional
+
+import httpx
+
+from config import config
+
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class SearchError(Exception):
+    """A search failed after all retries (or with a non-retryable status)"""
+
+
+class SearchClient:
+    """
+    Pooled SerpAPI client
+
+    The underlying httpx.AsyncClient is bound to the event loop it was
+    created on, so it is (re)created lazily for the running loop.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None
+    ):
+        self.api_key = api_key or config.SERPAPI_KEY
+        self.timeout = timeout if timeout is not None else config.SEARCH_TIMEOUT_SECONDS
+        self.max_retries = max_retries if max_retries is not None else config.SEARCH_MAX_RETRIES
+        self.backoff = backoff if backoff is not None else config.SEARCH_RETRY_BACKOFF_SECONDS
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=config.SEARCH_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.SEARCH_MAX_CONNECTIONS
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    async def _get_json(self, params: Dict) -> Dict:
+        """GET the SerpAPI endpoint with retries; raises SearchError"""
+        attempts = self.max_retries + 1
+        for attempt in range(attempts):
+            try:
+                response = await self._http().get(SERPAPI_URL, params=params)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    if response.status_code >= 400:
+                        raise SearchError(f"SerpAPI returned {response.status_code}: {response.text[:200]}")
+                    return response.json()
+                error = f"SerpAPI returned {response.status_code}"
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt + 1 < attempts:
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                print(f"[DEBUG] Search attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+        raise SearchError(f"{error} after {attempts} attempts")
+
+    async def search(self, query: str, start: int = 0, num: int = 10) -> List[Dict]:
+        """Organic Google results as [{"url", "snippet", "title"}]; raises SearchError"""
+        if not self.api_key:
+            raise SearchError("SERPAPI_KEY is not set; web search is unavailable")
+        search_dict = await self._get_json({
+            "engine": "google",
+            "q": query,
+            "api_key": self.api_key,
+            "num": num,
+            "start": start,
+        })
+        if search_dict.get("error") and not search_dict.get("organic_results"):
+            # SerpAPI reports "no results" as an error message with a 200
+            print(f"[DEBUG] SerpAPI: {search_dict['error']}")
+
+        return [
+            {
+                "url": item["link"],
+                "snippet": item.get("snippet", ""),
+                "title": item.get("title", "")
+            }
+            for item in search_dict.get("organic_results") or []
+            if item.get("link")
+        ]
+
+    async def close(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_search_client: Optional[SearchClient] = None
+
+
+def get_search_client() -> SearchClient:
+    """Process-wide search client (shares one connection pool)"""
+    global _search_client
+    if _search_client is None:
+        _search_client = SearchClient()
+    return _search_client
@@ -3,7 +3,7 @@ import asyncio
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, AsyncGenerator, Optional
 from openai import AsyncOpenAI
-from serpapi import GoogleSearch
+from search_cache import cached_search
 
 # Import the query transformer from external file
 from query_transformer_return_statements import EnhancedQueryTransformer 
@@ -21,31 +21,14 @@ async def google_search(query, start=0):
     
     results = []    
     try:        
-        params = {
-            "engine": "google",
-            "q": query,
-            "api_key": "c65412e924d81ecb726a7c013ae0f04897bc8d069e8acadc5a085d9198e64d22",
-            "num": 10,
-            "start": start,
-        }
-        
-        search = GoogleSearch(params)
-        search_dict = search.get_dict()
-        items = search_dict.get("organic_results")
+        results = [
+            {"query": query, **result}
+            for result in await cached_search(query, start=start)
+        ]
         
-        if not items:
+        if not results:
             print(f"[DEBUG] No search results found")
             return results
-            
-        for item in items:
-            if item.get("link"):
-                res = {
-                    "query":query,
-                    "url": item["link"], 
-                    "snippet": item.get("snippet", ""),
-                    "title": item.get("title", "")
-                }
-                results.append(res)
         
         print(f"[DEBUG] Found {len(results)} search results")
   
@@ -181,9 +164,7 @@ If context does not have enough information OR query needs real-time data, reply
         if final_text:
             yield {"needs_web": False, "chunk": final_text, "done": True}
 
-from anthropic import AsyncAnthropic
-import os
-anthropic_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+from llm_clients import get_anthropic_client
 
 
 async def answer_from_snippets_streaming(
@@ -265,7 +246,7 @@ Question: {query}"""
     needs_more = False
     
     try:
-        stream = await anthropic_client.messages.create(
+        stream = await get_anthropic_client().messages.create(
             model="claude-sonnet-4-20250514",  # Latest Claude Sonnet
             max_tokens=4096,  # Claude can handle longer responses
             system=system_prompt,  # System prompt is separate in Anthropic
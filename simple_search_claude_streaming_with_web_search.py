@@ -1,44 +1,50 @@
-import anthropic
+import asyncio
 import os
 import json
 import base64
 from typing import List, Dict, Optional
 from fastapi import UploadFile
-from serpapi import GoogleSearch
+from search_cache import cached_search
+from llm_clients import get_anthropic_client
+from thinking_budget import select_thinking_budget
 
 from dotenv import load_dotenv
 load_dotenv()
 
 class ClaudeConversation:
     
-    async def google_search(self,query, start=0):
+    def _search_task(self, query, start=0) -> asyncio.Future:
+        """The memoized search task for a query (started on first use)"""
+        key = (query, start)
+        task = self._searches.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._google_search(query, start))
+            self._searches[key] = task
+        return task
+    
+    async def google_search(self, query, start=0):
+        """
+        Search once per conversation object (one per request)
+
+        Concurrent and repeated calls for the same query share the first
+        call's task; empty results are not memoized so a later call retries.
+        """
+        task = self._search_task(query, start)
+        results = await asyncio.shield(task)
+        if not results and self._searches.get((query, start)) is task:
+            del self._searches[(query, start)]
+        return list(results)
+    
+    async def _google_search(self,query, start=0):
         
         results = []    
-        try:        
-            params = {
-                "engine": "google",
-                "q": query,
-                "api_key": "c65412e924d81ecb726a7c013ae0f04897bc8d069e8acadc5a085d9198e64d22",
-                "num": 10,
-                "start": start,
-            }
+        try:
+            # Shared cache in front of the pooled async search client
+            results = await cached_search(query, start=start)
             
-            search = GoogleSearch(params)
-            search_dict = search.get_dict()
-            items = search_dict.get("organic_results")
-            
-            if not items:
+            if not results:
                 print(f"[DEBUG] No search results found")
                 return results
-                
-            for item in items:
-                if item.get("link"):
-                    res = {
-                        "url": item["link"], 
-                        "snippet": item.get("snippet", ""),
-                        "title": item.get("title", "")
-                    }
-                    results.append(res)
             
             print(f"[DEBUG] Found {len(results)} search results")
     
@@ -48,11 +54,16 @@ class ClaudeConversation:
         return results
 
     def __init__(self, api_key: Optional[str] = None, model: str = "claude-sonnet-4-20250514", messages: Optional[List[Dict]] = None):
-        self.client = anthropic.AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY",""))        
+        # Shared per event loop: pooled connections and a global in-flight limit
+        self.client = get_anthropic_client()
+        # Request-scoped search memo (see google_search)
+        self._searches: Dict[tuple, asyncio.Future] = {}
         
         self.model = model
         self.max_tokens = 16000
         self.thinking_budget = 10000
+        # Per-request thinking budget override (None = adaptive, 0 = off)
+        self.thinking_budget_override: Optional[int] = None
         
         if self.max_tokens <= self.thinking_budget:
             raise ValueError(
@@ -169,14 +180,39 @@ Generate the response:"""
         
         return {"search_needed": False, "query": None}
     
-    async def send_message(self, user_message: str, files: Optional[List[UploadFile]] = None, max_iterations: int = 5, simple_search = True):
+    async def send_message(
+        self,
+        user_message: str,
+        files: Optional[List[UploadFile]] = None,
+        max_iterations: int = 5,
+        simple_search = True,
+        mode: str = "normal",
+        decision: Optional[Dict] = None,
+        thinking_budget: Optional[int] = None
+    ):
         from datetime import datetime
         current_date = datetime.now().strftime("%B %d, %Y")
         
-        if simple_search:
+        # Thinking on/off, budget and max_tokens for this turn (see thinking_budget.py)
+        budget = select_thinking_budget(
+            user_message,
+            has_files=bool(files),
+            mode=mode,
+            decision=decision,
+            override=thinking_budget if thinking_budget is not None else self.thinking_budget_override,
+            max_tokens=self.max_tokens,
+            max_budget=self.thinking_budget
+        )
+        print(f"🧮 Thinking: {budget['tier']} (budget {budget['budget_tokens']}, max_tokens {budget['max_tokens']}) "
+              f"— {budget['reason']}, {len(user_message.split())} words, mode {mode}")
+        
+        # Acknowledgements never need a web search
+        if simple_search and not budget["skip_search"]:
             # First: Generate search query quickly using only user prompts
             search_info = await self._generate_search_query(user_message)
             if search_info["search_needed"] and search_info["query"]:
+                # Start the search now; the consumer's google_search call shares it
+                self._search_task(search_info["query"])
                 yield {"type": "search_query", "text": search_info["query"]}
                     
         # Process uploaded files
@@ -201,14 +237,18 @@ Generate the response:"""
             try:
                 assistant_content = []
                 
+                thinking = {}
+                if budget["thinking"]:
+                    thinking["thinking"] = {
+                        "type": "enabled",
+                        "budget_tokens": budget["budget_tokens"]
+                    }
+                
                 async with self.client.messages.stream(
                     model=self.model,
-                    max_tokens=self.max_tokens,
+                    max_tokens=budget["max_tokens"],
                     system=f"Today's date is {current_date}. Use this date when providing current information.",
-                    thinking={
-                        "type": "enabled",
-                        "budget_tokens": self.thinking_budget
-                    },
+                    **thinking,
                     tools=[
                         {
                             "type": "web_search_20250305",
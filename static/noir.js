@@ -3337,6 +3337,10 @@ async function loadAssetsFromDB(conversationId, messageDiv, responseContent) {
 
 // File upload state
 let attachedFiles = [];
+// Set by the Refresh button on a replayed (cached) research step
+let refreshNextMessage = false;
+// Deep-research job to resume with the next message (see resumeResearchJob)
+let resumeResearchJobId = null;
 const MAX_FILE_SIZE = 10 * 1024 * 1024; // 10MB
 // const ALLOWED_TYPES = {
 //     'application/pdf': { ext: '.pdf', icon: '📄' },
@@ -3824,6 +3828,8 @@ async function sendMessage() {
     let collectedAssets = null;
     let newConversationId = null;
     let conversationListUpdated = false;
+    let researchJob = null;
+    let streamFinished = false;
 
     console.log('');
     console.log('🚀🚀🚀 SEND MESSAGE STARTED 🚀🚀🚀');
@@ -3867,6 +3873,18 @@ async function sendMessage() {
         formData.append('deep_search', isDeepSearchEnabled.toString());
         formData.append('lab_mode', isLabModeEnabled.toString());
         
+        if (refreshNextMessage) {
+            // Re-run the research instead of replaying the cached result
+            formData.append('refresh', 'true');
+            refreshNextMessage = false;
+        }
+        
+        if (resumeResearchJobId) {
+            // Continue the interrupted research job from its checkpoints
+            formData.append('research_job_id', resumeResearchJobId);
+            resumeResearchJobId = null;
+        }
+        
         console.log('📤 Request settings:');
         console.log('   - Mode:', mode);
         console.log('   - Deep search:', isDeepSearchEnabled);
@@ -3903,6 +3921,9 @@ async function sendMessage() {
         const reader = response.body.getReader();
         const decoder = new TextDecoder();
         let accumulatedText = '';
+        let reportTitle = '';
+        let reportSections = [];
+        let reportDiv = null;
 
         while (true) {
             const { done, value } = await reader.read();
@@ -3951,6 +3972,13 @@ async function sendMessage() {
                     console.log('═══════════════════════════════════════');
                 }
                 
+                // Deep-research job ID: kept until the response completes so an
+                // interrupted stream can be resumed
+                else if (parsed.type === 'research_job') {
+                    researchJob = { job_id: parsed.job_id, conversation_id: currentConversationId, content: content };
+                    localStorage.setItem('pending_research_job', JSON.stringify(researchJob));
+                }
+                
                 // ═══════════════════════════════════════
                 // HANDLE REASONING - REFRESH LIST ON FIRST REASONING STEP
                 // ═══════════════════════════════════════
@@ -4139,6 +4167,21 @@ async function sendMessage() {
                     stepDiv.innerHTML = `
                         <div class="reasoning-step-content">${parsed.content || ''}</div>
                     `;
+                    if (parsed.cached) {
+                        // Replayed research: re-send the same message with refresh=true
+                        const refreshBtn = document.createElement('button');
+                        refreshBtn.className = 'reasoning-refresh-btn';
+                        refreshBtn.textContent = '🔄 Refresh';
+                        refreshBtn.addEventListener('click', (e) => {
+                            e.stopPropagation();
+                            if (hasIncompleteMessages()) return;
+                            refreshBtn.disabled = true;
+                            refreshNextMessage = true;
+                            document.getElementById('message-input').value = content;
+                            sendMessage();
+                        });
+                        stepDiv.appendChild(refreshBtn);
+                    }
                     reasoningContent.appendChild(stepDiv);
                     console.log('✅ Reasoning step added to UI');
                     console.log('   Content preview:', (parsed.content || '').substring(0, 80) + '...');
@@ -4153,10 +4196,39 @@ async function sendMessage() {
                     });
                 }
                 
+                // Handle progressive markdown report (deep search)
+                else if (parsed.type === 'report_start' || parsed.type === 'report_section_start' ||
+                         parsed.type === 'report_section_delta' || parsed.type === 'report_section_end') {
+                    if (!reportDiv) {
+                        reportDiv = document.createElement('div');
+                        reportDiv.className = 'report-stream';
+                        messageContentDiv.insertBefore(reportDiv, responseContent);
+                    }
+                    
+                    if (parsed.type === 'report_start') {
+                        reportTitle = parsed.title || '';
+                    } else if (parsed.type === 'report_section_start') {
+                        reportSections[parsed.index] = { heading: parsed.heading, text: '' };
+                    } else if (parsed.type === 'report_section_delta') {
+                        const section = reportSections[parsed.index] || (reportSections[parsed.index] = { heading: '', text: '' });
+                        section.text += parsed.text;
+                    } else {
+                        reportSections[parsed.index] = { heading: parsed.heading, text: parsed.content };
+                    }
+                    
+                    const reportMarkdown = (reportTitle ? `# ${reportTitle}\n\n` : '') + reportSections
+                        .filter(section => section)
+                        .map(section => `## ${section.heading}\n\n${section.text}`)
+                        .join('\n\n---\n\n');
+                    reportDiv.innerHTML = renderMarkdown(reportMarkdown);
+                }
+                
                 // Handle done
                 else if (parsed.type === 'done') {
                     console.log('');
                     console.log('🏁 DONE event received');
+                    streamFinished = true;
+                    if (researchJob) localStorage.removeItem('pending_research_job');
                     streamingDiv.classList.remove('streaming-message');
                     setStreamingToDone(streamingDiv);
                     loadConversations()
@@ -4215,6 +4287,8 @@ async function sendMessage() {
                 // Handle error
                     else if (parsed.type === 'error') {
                         console.error('❌ Error event received:', parsed.message);
+                        streamFinished = true;
+                        if (researchJob) localStorage.removeItem('pending_research_job');
                         
                         if (parsed.limit_reached === true) {
                             console.log('🔒 Message limit reached');
@@ -4264,6 +4338,11 @@ async function sendMessage() {
             }, 100);
         }
 
+        if (researchJob && !streamFinished) {
+            // Stream closed before "done" (server restart, proxy timeout)
+            offerResearchResume(streamingDiv, researchJob);
+        }
+
         console.log('');
         console.log('🏁🏁🏁 SEND MESSAGE COMPLETED 🏁🏁🏁');
         console.log('');
@@ -4280,6 +4359,10 @@ async function sendMessage() {
         
         attachedFiles = uploadedFiles;
         updateFilePreview();
+        
+        if (researchJob) {
+            offerResearchResume(streamingDiv, researchJob);
+        }
     }
 
     sendBtn.disabled = false;
@@ -4288,6 +4371,38 @@ async function sendMessage() {
     updateModeIconsState()
 }
 
+// Re-send an interrupted deep-research message with its job ID; the server
+// replays the finished steps and continues from the last checkpoint
+function resumeResearchJob(job) {
+    if (hasIncompleteMessages()) return;
+    // Already resumed and completed
+    const pending = JSON.parse(localStorage.getItem('pending_research_job') || 'null');
+    if (!pending || pending.job_id !== job.job_id) return;
+    resumeResearchJobId = job.job_id;
+    document.getElementById('message-input').value = job.content;
+    sendMessage();
+}
+
+function offerResearchResume(streamingDiv, job) {
+    streamingDiv.classList.remove('streaming-message');
+    const resumeBtn = document.createElement('button');
+    resumeBtn.className = 'reasoning-refresh-btn';
+    resumeBtn.textContent = '↻ Resume research';
+    resumeBtn.addEventListener('click', () => {
+        resumeBtn.disabled = true;
+        resumeResearchJob(job);
+    });
+    streamingDiv.querySelector('.message-content').appendChild(resumeBtn);
+}
+
+// Back online: resume the interrupted research of the open conversation
+window.addEventListener('online', () => {
+    const job = JSON.parse(localStorage.getItem('pending_research_job') || 'null');
+    if (job && job.conversation_id === currentConversationId) {
+        resumeResearchJob(job);
+    }
+});
+
 function setStreamingToDone(streamingDiv) {
     
     const indicator = streamingDiv.querySelector('.streaming-indicator');
@@ -0,0 +1,261 @@
+"""
+Typed columnar data for lab HTML apps
+
+Parses scraped markdown tables into typed columns (numbers with units and
+magnitudes stripped, dates as ISO strings), drops duplicate rows and merges
+duplicate tables across sources. The result is embedded in the generated app
+as a <script type="application/json" id="research-data"> payload, so the
+model only writes layout and rendering code that reads it, instead of
+re-typing every number into the page.
+"""
+
+import hashlib
+import json
+import re
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+PAYLOAD_ELEMENT_ID = "research-data"
+
+# A column is typed when at least this share of its non-empty cells parse
+TYPE_THRESHOLD = 0.7
+
+_EMPTY_CELLS = {"", "-", "—", "–", "n/a", "na", "null", "none", "?"}
+_NUMBER_PATTERN = r"^(?P<prefix>[^\d+\-.]{0,4}?)\s*(?P<number>[+\-−]?(?:\d[\d,]*)?\.?\d+)\s*(?P<suffix>[^\d]{0,12})$"
+_FOOTNOTE_PATTERN = r"\[\w{1,3}\]|[*†‡]+$"
+_MAGNITUDES = [
+    (r"^(?:thousand|k|K)\b", 1e3),
+    (r"^(?:million|mn|M|mln)\b", 1e6),
+    (r"^(?:billion|bn|B|bln)\b", 1e9),
+    (r"^(?:trillion|tn|T)\b", 1e12),
+]
+_PAYLOAD_PATTERN = re.compile(
+    r'<script type="application/json" id="' + PAYLOAD_ELEMENT_ID + r'">.*?</script>',
+    re.DOTALL
+)
+
+
+def parse_markdown_table(markdown: str) -> Optional[Tuple[str, List[str], List[List[str]]]]:
+    """Split a scraped markdown table into (title, header, rows); None if it isn't one"""
+    title = ""
+    lines = [line.strip() for line in markdown.strip().split("\n") if line.strip()]
+    if lines and lines[0].startswith("**") and lines[0].endswith("**"):
+        title = lines.pop(0).strip("*").strip()
+
+    def cells(line: str) -> List[str]:
+        parts = re.split(r"(?<!\\)\|", line.strip().strip("|"))
+        return [part.strip().replace("\\|", "|") for part in parts]
+
+    table_lines = [line for line in lines if line.startswith("|")]
+    if len(table_lines) < 3 or not re.match(r"^\|\s*-{3}", table_lines[1]):
+        return None
+
+    header = cells(table_lines[0])
+    rows = [cells(line) for line in table_lines[2:]]
+    rows = [(row + [""] * len(header))[:len(header)] for row in rows]
+    return title, header, rows
+
+
+def _unique_names(header: List[str]) -> List[str]:
+    names, seen = [], {}
+    for i, name in enumerate(header, 1):
+        name = name or f"Column {i}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return names
+
+
+def _coerce_number(values: pd.Series, filled: pd.Series) -> Optional[Tuple[pd.Series, str]]:
+    """Numeric version of a column and its unit, or None if it isn't numeric"""
+    cleaned = values.str.replace(_FOOTNOTE_PATTERN, "", regex=True).str.strip()
+    parts = cleaned.str.extract(_NUMBER_PATTERN)
+    parsed = parts["number"].notna() & filled
+    if parsed.sum() < TYPE_THRESHOLD * filled.sum():
+        return None
+
+    numbers = pd.to_numeric(
+        parts["number"].str.replace(",", "", regex=False).str.replace("−", "-", regex=False),
+        errors="coerce"
+    )
+    suffix = parts["suffix"].fillna("").str.strip()
+    multiplier = pd.Series(1.0, index=values.index)
+    for pattern, factor in _MAGNITUDES:
+        matched = suffix.str.contains(pattern, regex=True)
+        multiplier[matched] = factor
+        suffix = suffix.where(~matched, suffix.str.replace(pattern, "", regex=True).str.strip())
+
+    # Unit: the most common currency prefix / unit suffix left after the number
+    units = (parts["prefix"].fillna("").str.strip() + " " + suffix).str.strip()
+    unit_counts = units[parsed & (units != "")].value_counts()
+    unit = unit_counts.index[0] if len(unit_counts) else ""
+
+    return (numbers * multiplier).where(parsed), unit
+
+
+def _coerce_date(values: pd.Series, filled: pd.Series) -> Optional[pd.Series]:
+    """ISO date strings for a date column, or None if it isn't one"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        dates = pd.to_datetime(values.where(filled), errors="coerce", format="mixed")
+    parsed = dates.notna() & filled
+    if parsed.sum() < TYPE_THRESHOLD * filled.sum():
+        return None
+    return dates.dt.strftime("%Y-%m-%d").where(parsed)
+
+
+def _json_values(series: pd.Series) -> List[Any]:
+    values = series.astype(object).where(series.notna(), None).tolist()
+    return [int(v) if isinstance(v, float) and v.is_integer() and abs(v) < 2 ** 53 else v for v in values]
+
+
+def table_to_dataset(markdown: str, max_rows: int = 500) -> Optional[Dict]:
+    """
+    Typed columnar dataset for one markdown table
+
+    Returns: {"title", "columns": [{"name", "type", "unit"}], "data": {name: [values]}, "rows"}
+    """
+    parsed = parse_markdown_table(markdown)
+    if not parsed:
+        return None
+    title, header, rows = parsed
+
+    names = _unique_names(header)
+    frame = pd.DataFrame(rows, columns=names).drop_duplicates()
+    frame = frame.head(max_rows).reset_index(drop=True)
+    if frame.empty:
+        return None
+
+    columns, data = [], {}
+    for name in names:
+        values = frame[name].fillna("").astype(str).str.strip()
+        filled = ~values.str.lower().isin(_EMPTY_CELLS)
+
+        number = _coerce_number(values, filled) if filled.any() else None
+        if number is not None:
+            series, unit = number
+            columns.append({"name": name, "type": "number", "unit": unit})
+            data[name] = _json_values(series)
+            continue
+
+        dates = _coerce_date(values, filled) if filled.any() else None
+        if dates is not None:
+            columns.append({"name": name, "type": "date", "unit": ""})
+            data[name] = _json_values(dates)
+            continue
+
+        columns.append({"name": name, "type": "string", "unit": ""})
+        data[name] = _json_values(values.where(filled))
+
+    return {"title": title, "columns": columns, "data": data, "rows": len(frame)}
+
+
+def build_app_datasets(
+    research_data: Dict,
+    max_rows: int = 500,
+    max_datasets: int = 60,
+    first_id: int = 1
+) -> List[Dict]:
+    """
+    Typed datasets for every table in the research data
+
+    Identical tables found by several queries/sources are merged into one
+    dataset listing all sources. Datasets get stable IDs (d1, d2, ...,
+    starting at first_id when adding to an existing app).
+    """
+    datasets: List[Dict] = []
+    by_content: Dict[str, Dict] = {}
+
+    for i, branch in enumerate(research_data["branches"], 1):
+        for j, sub_query in enumerate(branch["sub_queries"], 1):
+            for table in sub_query.get("tables") or []:
+                dataset = table_to_dataset(table["table"], max_rows)
+                if dataset is None:
+                    continue
+
+                content = json.dumps([dataset["columns"], dataset["data"]], sort_keys=True)
+                key = hashlib.sha1(content.encode("utf-8")).hexdigest()
+                if key in by_content:
+                    existing = by_content[key]
+                    if table["url"] not in existing["sources"]:
+                        existing["sources"].append(table["url"])
+                    continue
+                if len(datasets) >= max_datasets:
+                    continue
+
+                dataset = {
+                    "id": f"d{first_id + len(datasets)}",
+                    **dataset,
+                    "query": f"{i}.{j} {sub_query['question']}",
+                    "sources": [table["url"]],
+                }
+                by_content[key] = dataset
+                datasets.append(dataset)
+
+    return datasets
+
+
+def describe_datasets(datasets: List[Dict], sample_rows: int = 3) -> str:
+    """Compact catalog of the datasets (schema + a few sample rows) for the prompt"""
+    lines = []
+    for dataset in datasets:
+        names = [column["name"] for column in dataset["columns"]]
+        schema = ", ".join(
+            f"{column['name']} ({column['type']}{', ' + column['unit'] if column['unit'] else ''})"
+            for column in dataset["columns"]
+        )
+        lines.append(
+            f"{dataset['id']}: {dataset['title'] or 'untitled table'} — sub-query {dataset['query']} "
+            f"— {dataset['rows']} rows — sources: {', '.join(dataset['sources'])}"
+        )
+        lines.append(f"  columns: {schema}")
+        for row in range(min(sample_rows, dataset["rows"])):
+            lines.append("  sample: " + json.dumps([dataset["data"][name][row] for name in names], ensure_ascii=False))
+    return "\n".join(lines)
+
+
+def payload_script(datasets: List[Dict]) -> str:
+    """The <script type="application/json"> element holding the datasets"""
+    payload = json.dumps({"datasets": datasets}, ensure_ascii=False, separators=(",", ":"))
+    payload = payload.replace("</", "<\\/")
+    return f'<script type="application/json" id="{PAYLOAD_ELEMENT_ID}">{payload}</script>'
+
+
+def inject_payload(html: str, datasets: List[Dict]) -> str:
+    """
+    Embed the datasets in an app, ahead of any script that reads them
+
+    Replaces an existing payload element; otherwise inserts right after <head>
+    (or <html>, or at the start of the document).
+    """
+    script = payload_script(datasets)
+    if _PAYLOAD_PATTERN.search(html):
+        return _PAYLOAD_PATTERN.sub(lambda _: script, html, count=1)
+
+    for pattern in (r"<head[^>]*>", r"<html[^>]*>"):
+        match = re.search(pattern, html, re.IGNORECASE)
+        if match:
+            return html[:match.end()] + "\n" + script + html[match.end():]
+    return script + "\n" + html
+
+
+def extract_payload(html: str) -> Tuple[str, Optional[List[Dict]]]:
+    """
+    Take the datasets out of an app
+
+    Returns (html with an empty payload element, datasets or None), so the app
+    can be edited without sending the data through the model.
+    """
+    match = _PAYLOAD_PATTERN.search(html)
+    if not match:
+        return html, None
+
+    body = match.group(0).split(">", 1)[1].rsplit("</script>", 1)[0]
+    try:
+        datasets = json.loads(body.replace("<\\/", "</"))["datasets"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return html, None
+
+    empty = f'<script type="application/json" id="{PAYLOAD_ELEMENT_ID}"></script>'
+    return html[:match.start()] + empty + html[match.end():], datasets
@@ -130,11 +130,10 @@ def deep_search_task(
             "timestamp": datetime.now(timezone.utc).isoformat()
         })
         
-        # Import Anthropic client
-        import anthropic
-        import os
+        # Shared Anthropic client (one keep-alive pool per worker process)
+        from llm_clients import get_sync_anthropic_client
         
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        client = get_sync_anthropic_client()
         
         # Build conversation history
         messages = []
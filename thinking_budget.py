@@ -0,0 +1,121 @@
+"""
+Adaptive extended-thinking budget for chat turns
+
+ClaudeConversation.send_message used to think with a 10k budget on every
+turn, so "thanks!" waited as long for its first token as a hard analytical
+question. The budget is now picked per message from cheap local signals:
+attached files, message length, analytical phrasing, the mode and the
+follow-up router's decision. Acknowledgements skip thinking (and the search
+query call) entirely.
+
+Tiers never exceed the conversation's own limits (set_token_limits), which
+the "deep" tier uses as-is. A per-request override (thinking_budget, 0 = off,
+clamped to the same limits) bypasses the selection. Disable with
+ADAPTIVE_THINKING=false.
+"""
+
+import re
+from typing import Dict, Optional
+
+from config import config
+from followup_router import route_locally
+
+# Anthropic's minimum budget_tokens when thinking is enabled
+MIN_THINKING_BUDGET = 1024
+
+# Response tokens on top of the thinking budget for overrides
+OVERRIDE_RESPONSE_TOKENS = 6000
+
+THINKING_TIERS: Dict[str, Dict] = {
+    "off": {"budget_tokens": 0, "max_tokens": 4096},
+    "light": {"budget_tokens": 2048, "max_tokens": 8192},
+    "standard": {"budget_tokens": 6000, "max_tokens": 12000},
+    "deep": {"budget_tokens": 10000, "max_tokens": 16000},
+}
+
+# Messages this long (in words) get the deep tier
+DEEP_MIN_WORDS = 60
+# Messages this short (in words) without analytical phrasing get the light tier
+LIGHT_MAX_WORDS = 12
+
+_ANALYTICAL_PATTERN = re.compile(
+    r"\b(why|analy[sz]e|analysis|compare|comparison|versus|vs|trade ?offs?|pros and cons|evaluate|assess|"
+    r"step by step|prove|derive|calculate|solve|estimate|optimi[sz]e|design|architecture|strategy|plan|"
+    r"debug|implement|algorithm|code|explain (in detail|how|why)|in depth|detailed)\b"
+)
+
+
+def _tier(name: str, reason: str, max_tokens: int, max_budget: int, skip_search: bool = False) -> Dict:
+    spec = THINKING_TIERS[name]
+    budget = min(spec["budget_tokens"], max_budget)
+    return {
+        "tier": name,
+        "thinking": budget >= MIN_THINKING_BUDGET,
+        "budget_tokens": budget if budget >= MIN_THINKING_BUDGET else 0,
+        "max_tokens": max(min(spec["max_tokens"], max_tokens), budget + 1),
+        "skip_search": skip_search,
+        "reason": reason,
+    }
+
+
+def select_thinking_budget(
+    message: str,
+    has_files: bool = False,
+    mode: str = "normal",
+    decision: Optional[Dict] = None,
+    override: Optional[int] = None,
+    max_tokens: int = 16000,
+    max_budget: int = 10000
+) -> Dict:
+    """
+    Thinking settings for one chat turn
+
+    Args:
+        message: Latest user message
+        has_files: Whether files are attached
+        mode: "normal", "deep_search" or "lab" (research modes only chat about their artifact)
+        decision: Router output for this turn (classify_followup_message / first-message action)
+        override: Per-request budget; 0 disables thinking, values are clamped to max_budget
+        max_tokens, max_budget: The conversation's limits (the "deep" tier)
+
+    Returns: {"tier", "thinking", "budget_tokens", "max_tokens", "skip_search", "reason"}
+        skip_search is True when the turn needs no web-search query (acknowledgements)
+    """
+    if override is not None:
+        if override <= 0:
+            return {"tier": "override", "thinking": False, "budget_tokens": 0,
+                    "max_tokens": THINKING_TIERS["off"]["max_tokens"], "skip_search": False,
+                    "reason": "request override"}
+        # Clamped to the conversation's limits (max_tokens > max_budget is
+        # checked by ClaudeConversation), so the API never sees an oversized request
+        budget = min(max(MIN_THINKING_BUDGET, override), max_budget)
+        return {"tier": "override", "thinking": True, "budget_tokens": budget,
+                "max_tokens": min(budget + OVERRIDE_RESPONSE_TOKENS, max_tokens), "skip_search": False,
+                "reason": "request override" if budget == override else f"request override (clamped from {override})"}
+
+    if not config.ADAPTIVE_THINKING:
+        return _tier("deep", "adaptive thinking disabled", max_tokens, max_budget)
+
+    if has_files:
+        return _tier("deep", "files attached", max_tokens, max_budget)
+
+    text = " ".join(message.lower().split())
+    words = len(text.split())
+
+    local = route_locally(message, has_existing=False)
+    if local and local["rule"] == "acknowledgement":
+        return _tier("off", "acknowledgement", max_tokens, max_budget, skip_search=True)
+
+    if words >= DEEP_MIN_WORDS:
+        return _tier("deep", f"long message ({words} words)", max_tokens, max_budget)
+    if _ANALYTICAL_PATTERN.search(text):
+        return _tier("deep", "analytical request", max_tokens, max_budget)
+
+    if mode != "normal" and (decision or {}).get("route") == "conversation":
+        # A question about the existing report/app: the answer has to reason over it
+        return _tier("standard", f"question about the {mode} artifact", max_tokens, max_budget)
+
+    if words <= LIGHT_MAX_WORDS:
+        return _tier("light", f"short message ({words} words)", max_tokens, max_budget)
+
+    return _tier("standard", "default", max_tokens, max_budget)